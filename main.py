@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -5,7 +7,36 @@ from src.CRUD.userCRUD import router as user_router
 from src.DatabaseManager.queries import  router as db_router
 from src.CRUD.quizCRUD import router as quiz_router
 from src.CRUD.userAttemptsCRUD import router as user_attempts_router
-app = FastAPI()
+from src.CRUD.statsCRUD import router as stats_router
+from src.CRUD.exportCRUD import router as export_router
+from src.DatabaseManager.databaseRun import init_db
+from src.DatabaseManager.queryBudget import QueryBudgetMiddleware, query_budget_enforced
+from src.DatabaseManager.slowQueries import RouteContextMiddleware
+from src.Config.settings import settings
+from src.Services.requestMetrics import MetricsMiddleware
+from src.Services.attemptWriter import attempt_writer
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await init_db()
+    yield
+    # flush submissions still waiting for their batch
+    await attempt_writer.stop()
+
+
+app = FastAPI(lifespan=lifespan)
+
+if query_budget_enforced():
+    app.add_middleware(QueryBudgetMiddleware)
+
+# outside the budget check, so requests that overrun it are still recorded
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
+# slow statements name their route whether or not metrics are on
+if settings.slow_query_ms > 0:
+    app.add_middleware(RouteContextMiddleware)
 
 
 
@@ -21,6 +52,8 @@ app.include_router(user_router)
 app.include_router(quiz_router)
 
 app.include_router(user_attempts_router)
+app.include_router(stats_router)
+app.include_router(export_router)
 
 
 @app.get("/")
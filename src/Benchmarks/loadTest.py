@@ -0,0 +1,360 @@
+"""
+In-process load test: drives the app from main.py through httpx's ASGI
+transport with --concurrency virtual users per scenario, each with its own
+account and cookies, against a throwaway database seeded through the API.
+
+  login        a login burst: every user logs in again and again
+  browse       catalog pages (offset and cursor), full-text search, tags,
+               tag search and quiz details
+  play         load a quiz for play, submit an attempt, read the result back
+  leaderboard  global and per-quiz rankings and the caller's own ranks
+
+    python -m src.Benchmarks.loadTest --seconds 5 --concurrency 16 --output run.json
+    python -m src.Benchmarks.loadTest --baseline base.json --threshold 0.2   # exit 1 on regressions
+    python -m src.Benchmarks.loadTest --compare base.json run.json
+
+Per route it reports requests per second, p50/p95/p99/max latency and SQL
+statements per request. Statements that the attempt writer's group commit
+issues run on its own task, so POST /quiz/{id}/attempt counts only the
+request's own reads; the writer's batch stats are reported next to the
+scenarios. Client and app share one event loop, so the numbers are the
+app's cost without any network in between.
+
+A route regresses when its p95 grows or its throughput drops by more than
+--threshold (a fraction), when it issues more SQL per request by more than
+that, or when it starts failing.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+
+from src.Benchmarks.loginFlood import percentile
+
+SCENARIOS = ("login", "browse", "play", "leaderboard")
+PASSWORD = "benchpass1"
+# every user has attempted the first few quizzes before the clock starts
+SEEDED_BOARDS = 5
+TOPICS = ("history", "physics", "music", "biology", "geography", "football", "cinema", "chemistry")
+
+# below these a "regression" is timer or cache-hit noise
+_P95_FLOOR_MS = 0.1
+_SQL_FLOOR = 0.05
+
+
+@dataclass
+class RouteSamples:
+    latencies: list[float] = field(default_factory=list)
+    statements: list[int] = field(default_factory=list)
+    errors: Counter = field(default_factory=Counter)
+
+
+class Recorder:
+    """Times each request and counts the SQL statements the app issued for it."""
+
+    def __init__(self):
+        self.routes: dict[str, RouteSamples] = defaultdict(RouteSamples)
+
+    async def call(self, client, route: str, url: str, **kwargs):
+        from src.DatabaseManager.queryBudget import count_statements
+
+        method = route.split(" ", 1)[0]
+        samples = self.routes[route]
+        # the ASGI transport runs the app on this task, so the counter sees its statements
+        with count_statements() as counter:
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+            except Exception as exc:
+                samples.errors[type(exc).__name__] += 1
+                return None
+            finally:
+                samples.latencies.append(time.perf_counter() - started)
+        samples.statements.append(counter.count)
+        if response.status_code >= 400:
+            samples.errors[str(response.status_code)] += 1
+        return response
+
+
+@dataclass
+class VirtualUser:
+    index: int
+    client: object
+    username: str
+
+
+@dataclass
+class Fixture:
+    users: list[VirtualUser]
+    quizzes: list[dict]  # QuizTreeIds of the seeded quizzes
+
+    def quiz(self, user: VirtualUser, n: int) -> dict:
+        return self.quizzes[(user.index + n) % len(self.quizzes)]
+
+
+def _answers(tree: dict, n: int) -> list[dict]:
+    # alternate between the right pair and a wrong pair, so scores differ
+    return [
+        {"question_id": question["id"], "selected_answer_ids": question["answer_ids"][n % 2 * 2:][:2]}
+        for question in tree["questions"]
+    ]
+
+
+async def seed(transport, users: int, quizzes: int, questions: int) -> Fixture:
+    import httpx
+
+    clients = [httpx.AsyncClient(transport=transport, base_url="http://bench") for _ in range(users)]
+    author = clients[0]
+    await author.post("/setup_database")
+
+    async def sign_up(index: int, client) -> VirtualUser:
+        username = f"bench{index}"
+        await client.post("/register", json={
+            "username": username, "email": f"{username}@example.com", "password": PASSWORD,
+        })
+        (await client.post("/login", json={"username": username, "password": PASSWORD})).raise_for_status()
+        return VirtualUser(index, client, username)
+
+    virtual_users = await asyncio.gather(*(sign_up(i, client) for i, client in enumerate(clients)))
+
+    trees = []
+    for i in range(quizzes):
+        topic = TOPICS[i % len(TOPICS)]
+        response = await author.post("/quiz/full", json={
+            "title": f"{topic.capitalize()} quiz {i}",
+            "description": f"Questions about {topic}, set {i}",
+            "tags": [topic, f"level-{i % 3}"],
+            "questions": [
+                {"text": f"{topic} question {j}", "type": "multiple", "points": 1 + j % 3, "answers": [
+                    {"text": f"Option {k}", "is_correct": k < 2} for k in range(4)
+                ]}
+                for j in range(questions)
+            ],
+        })
+        response.raise_for_status()
+        trees.append(response.json())
+
+    fixture = Fixture(list(virtual_users), trees)
+    await asyncio.gather(*(
+        user.client.post(f"/quiz/{tree['quiz_id']}/attempt", json={"answers": _answers(tree, user.index + k)})
+        for user in fixture.users
+        for k, tree in enumerate(trees[:SEEDED_BOARDS])
+    ))
+    return fixture
+
+
+async def step_login(recorder: Recorder, fixture: Fixture, user: VirtualUser, n: int) -> None:
+    await recorder.call(user.client, "POST /login", "/login", json={"username": user.username, "password": PASSWORD})
+
+
+async def step_browse(recorder: Recorder, fixture: Fixture, user: VirtualUser, n: int) -> None:
+    client = user.client
+    page = await recorder.call(client, "GET /quizzes", "/quizzes", params={"limit": 20, "page": 1 + n % 3})
+    cursor = page.json().get("next_cursor") if page is not None and page.status_code == 200 else None
+    if cursor:
+        await recorder.call(client, "GET /quizzes?after", "/quizzes", params={"limit": 20, "after": cursor})
+    topic = TOPICS[(user.index + n) % len(TOPICS)]
+    await recorder.call(
+        client, "GET /quizzes?search", "/quizzes", params={"search": topic, "highlight": True, "limit": 10}
+    )
+    await recorder.call(client, "GET /tags", "/tags")
+    await recorder.call(client, "GET /tags/search", "/tags/search", params={"query": topic[:3]})
+    await recorder.call(client, "GET /quiz/{id}", f"/quiz/{fixture.quiz(user, n)['quiz_id']}")
+
+
+async def step_play(recorder: Recorder, fixture: Fixture, user: VirtualUser, n: int) -> None:
+    tree = fixture.quiz(user, n)
+    client = user.client
+    await recorder.call(client, "GET /quiz/{id}/play", f"/quiz/{tree['quiz_id']}/play")
+    submitted = await recorder.call(
+        client, "POST /quiz/{id}/attempt", f"/quiz/{tree['quiz_id']}/attempt", json={"answers": _answers(tree, n)}
+    )
+    if submitted is not None and submitted.status_code == 200:
+        await recorder.call(client, "GET /attempts/{id}", f"/attempts/{submitted.json()['attempt_id']}")
+
+
+async def step_leaderboard(recorder: Recorder, fixture: Fixture, user: VirtualUser, n: int) -> None:
+    # boards the caller is on, so /rankings/me never 404s
+    quiz_id = fixture.quizzes[(user.index + n) % min(SEEDED_BOARDS, len(fixture.quizzes))]["quiz_id"]
+    client = user.client
+    await recorder.call(client, "GET /rankings", "/rankings", params={"limit": 50})
+    await recorder.call(client, "GET /rankings/me", "/rankings/me")
+    await recorder.call(client, "GET /quiz/{id}/rankings", f"/quiz/{quiz_id}/rankings", params={"limit": 50})
+    await recorder.call(client, "GET /quiz/{id}/rankings/me", f"/quiz/{quiz_id}/rankings/me")
+
+
+STEPS = {
+    "login": step_login,
+    "browse": step_browse,
+    "play": step_play,
+    "leaderboard": step_leaderboard,
+}
+
+
+def summarize(samples: RouteSamples, elapsed: float) -> dict:
+    latencies = samples.latencies
+    statements = samples.statements
+    return {
+        "requests": len(latencies),
+        "errors": dict(samples.errors),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "max_ms": round(max(latencies, default=0.0) * 1000, 3),
+        "sql_per_request": round(sum(statements) / len(statements), 3) if statements else 0.0,
+        "sql_max": max(statements, default=0),
+    }
+
+
+async def run_scenario(name: str, fixture: Fixture, seconds: float) -> dict:
+    recorder = Recorder()
+    step = STEPS[name]
+    deadline = time.perf_counter() + seconds
+
+    async def virtual_user(user: VirtualUser) -> None:
+        n = 0
+        while time.perf_counter() < deadline:
+            await step(recorder, fixture, user, n)
+            n += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(virtual_user(user) for user in fixture.users))
+    elapsed = time.perf_counter() - started
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "routes": {route: summarize(samples, elapsed) for route, samples in recorder.routes.items()},
+    }
+
+
+async def run_load(args) -> dict:
+    import httpx
+    from main import app
+    from src.Config.settings import settings
+    from src.Services.attemptWriter import attempt_writer
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        fixture = await seed(transport, args.concurrency, args.quizzes, args.questions)
+        results = {}
+        for name in args.scenarios:
+            results[name] = await run_scenario(name, fixture, args.seconds)
+        for user in fixture.users:
+            await user.client.aclose()
+        writer = attempt_writer.stats()
+
+    return {
+        "config": {
+            "seconds": args.seconds,
+            "concurrency": args.concurrency,
+            "quizzes": args.quizzes,
+            "questions": args.questions,
+            "fast_responses": settings.fast_responses,
+            "attempt_batch_max": settings.attempt_batch_max,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "scenarios": results,
+        "attempt_writer": {key: writer[key] for key in ("batches", "fallback_batches", "failed", "batch_size")},
+    }
+
+
+def _regressions(before: dict, now: dict, threshold: float) -> list[str]:
+    found = []
+    if now["p95_ms"] > before["p95_ms"] * (1 + threshold) and now["p95_ms"] - before["p95_ms"] > _P95_FLOOR_MS:
+        found.append("p95_ms")
+    if now["rps"] < before["rps"] * (1 - threshold):
+        found.append("rps")
+    sql_before, sql_now = before["sql_per_request"], now["sql_per_request"]
+    if sql_now > sql_before * (1 + threshold) and sql_now - sql_before > _SQL_FLOOR:
+        found.append("sql_per_request")
+    if now["errors"] and not before["errors"]:
+        found.append("errors")
+    return found
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[dict]:
+    """One row per route present in both runs, with the metrics that regressed."""
+    rows = []
+    for scenario, result in current["scenarios"].items():
+        before_routes = baseline["scenarios"].get(scenario, {}).get("routes", {})
+        for route, now in result["routes"].items():
+            before = before_routes.get(route)
+            if before is None:
+                continue
+            rows.append({
+                "scenario": scenario,
+                "route": route,
+                "rps": [before["rps"], now["rps"]],
+                "p95_ms": [before["p95_ms"], now["p95_ms"]],
+                "sql_per_request": [before["sql_per_request"], now["sql_per_request"]],
+                "regressed": _regressions(before, now, threshold),
+            })
+    return rows
+
+
+def report_comparison(baseline: dict, current: dict, threshold: float) -> bool:
+    """Prints the comparison; True when nothing regressed."""
+    settings_keys = ("seconds", "concurrency", "quizzes", "questions", "fast_responses", "attempt_batch_max")
+    differing = [key for key in settings_keys if baseline["config"].get(key) != current["config"].get(key)]
+    if differing:
+        print(f"warning: runs differ in {', '.join(differing)}", file=sys.stderr)
+    rows = compare(baseline, current, threshold)
+    for row in rows:
+        print(json.dumps(row))
+    regressed = [row for row in rows if row["regressed"]]
+    print(json.dumps({"routes_compared": len(rows), "regressions": len(regressed), "threshold": threshold}))
+    return not regressed
+
+
+def _load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5, help="per scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="virtual users, one account each")
+    parser.add_argument("--quizzes", type=int, default=50)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--output", help="write the full results here as JSON")
+    parser.add_argument("--baseline", help="results of an earlier run to compare this one against")
+    parser.add_argument("--threshold", type=float, default=0.15)
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="compare two saved runs and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(0 if report_comparison(_load(args.compare[0]), _load(args.compare[1]), args.threshold) else 1)
+
+    baseline = _load(args.baseline) if args.baseline else None
+    with tempfile.TemporaryDirectory() as tmp:
+        # set before main.py is imported: the app must never seed the real database
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tmp}/loadtest.db"
+        # its middleware keeps its own statement counter, which would hide statements from ours
+        os.environ.pop("QUERY_BUDGET_STRICT", None)
+        results = asyncio.run(run_load(args))
+
+    for scenario, result in results["scenarios"].items():
+        for route, summary in result["routes"].items():
+            print(json.dumps({"scenario": scenario, "route": route, **summary}))
+    print(json.dumps({"attempt_writer": results["attempt_writer"]}))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if baseline is not None and not report_comparison(baseline, results, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Latency of an unrelated endpoint (GET /quiz/{id}) while a burst of logins
+hashes passwords concurrently. Every pool size runs in its own process
+against a throwaway database:
+
+    python -m src.Benchmarks.loginFlood --logins 200 --concurrency 50 --workers 0 4
+
+--workers 0 hashes inline on the event loop, which is how login used to work.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_flood(logins: int, concurrency: int) -> dict:
+    import httpx
+    from main import app
+
+    credentials = {"username": "bench", "password": "benchpass1"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/setup_database")
+        await client.post("/register", json={**credentials, "email": "bench@example.com"})
+        await client.post("/login", json=credentials)
+        quiz_id = (await client.post("/quiz/create", json={"title": "Probe"})).json()["quiz_id"]
+
+        probe_latencies: list[float] = []
+        statuses: Counter[int] = Counter()
+        done = asyncio.Event()
+
+        async def probe():
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get(f"/quiz/{quiz_id}")
+                probe_latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(0.005)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def login():
+            async with semaphore:
+                response = await client.post("/login", json=credentials)
+                statuses[response.status_code] += 1
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+
+    return {
+        "logins": logins,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "logins_per_s": round(logins / elapsed, 1),
+        "statuses": dict(statuses),
+        "probe_requests": len(probe_latencies),
+        "probe_p50_ms": round(percentile(probe_latencies, 0.50) * 1000, 2),
+        "probe_p99_ms": round(percentile(probe_latencies, 0.99) * 1000, 2),
+        "probe_max_ms": round(max(probe_latencies, default=0.0) * 1000, 2),
+    }
+
+
+def run_in_subprocess(workers: int, queue: int, logins: int, concurrency: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite+aiosqlite:///{tmp}/bench.db",
+            "PASSWORD_HASH_WORKERS": str(workers),
+            "PASSWORD_HASH_QUEUE": str(queue),
+        }
+        output = subprocess.run(
+            [sys.executable, "-m", "src.Benchmarks.loginFlood", "--single",
+             "--logins", str(logins), "--concurrency", str(concurrency)],
+            env=env, check=True, capture_output=True, text=True,
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 4])
+    parser.add_argument("--queue", type=int, default=1000, help="pool queue limit; lower it to see 503 shedding")
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(asyncio.run(run_flood(args.logins, args.concurrency))))
+        return
+
+    for workers in args.workers:
+        result = run_in_subprocess(workers, args.queue, args.logins, args.concurrency)
+        print(json.dumps({"workers": workers, **result}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+GET /rankings at scale: the old per-request aggregate over quiz_attempts
+against the maintained user_quiz_best / users.total_score read, plus the cost
+of a full leaderboard rebuild, on a throwaway database.
+
+    python -m src.Benchmarks.rankingsBench --attempts 10000000 --users 100000 --quizzes 5000
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, func, insert, select
+
+from src.DatabaseManager.leaderboard import check_leaderboard, rebuild_leaderboard
+from src.Models.models import Base, QuizAttempt, User, UserQuizBest
+
+
+def populate(conn, attempts: int, users: int, quizzes: int) -> None:
+    Base.metadata.create_all(conn)
+    conn.execute(insert(User), [
+        {"id": i, "username": f"user{i}", "email": f"user{i}@bench.io", "hashed_password": "-"}
+        for i in range(1, users + 1)
+    ])
+    # attempts are generated inside SQLite; quizzes only need to exist as ids
+    conn.exec_driver_sql(
+        f"""INSERT INTO quiz_attempts (user_id, quiz_id, score, max_score)
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {int(attempts)})
+            SELECT abs(random()) % {int(users)} + 1, abs(random()) % {int(quizzes)} + 1,
+                   abs(random()) % 101, 100
+            FROM n"""
+    )
+
+
+def aggregate_rankings():
+    # the query GET /rankings used to run on every call
+    subq = (
+        select(QuizAttempt.user_id, QuizAttempt.quiz_id, func.max(QuizAttempt.score).label("best_score"))
+        .group_by(QuizAttempt.user_id, QuizAttempt.quiz_id)
+        .subquery()
+    )
+    return (
+        select(subq.c.user_id, User.username, func.sum(subq.c.best_score).label("total_score"))
+        .join(User, User.id == subq.c.user_id)
+        .group_by(subq.c.user_id, User.username)
+        .order_by(func.sum(subq.c.best_score).desc())
+        .limit(50)
+    )
+
+
+def indexed_rankings():
+    return (
+        select(User.id, User.username, User.total_score)
+        .where(select(UserQuizBest.user_id).where(UserQuizBest.user_id == User.id).exists())
+        .order_by(User.total_score.desc(), User.id)
+        .limit(50)
+    )
+
+
+def time_query(conn, stmt, repeat: int) -> tuple[dict, list]:
+    samples, rows = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = conn.execute(stmt).all()
+        samples.append(time.perf_counter() - started)
+    return {"median_ms": round(statistics.median(samples) * 1000, 2)}, rows
+
+
+def run(attempts: int, users: int, quizzes: int, repeat: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'rankings.db')}")
+        started = time.perf_counter()
+        with engine.begin() as conn:
+            populate(conn, attempts, users, quizzes)
+        load_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        with engine.begin() as conn:
+            rebuild_leaderboard(conn)
+        rebuild_s = time.perf_counter() - started
+
+        result = {
+            "attempts": attempts, "users": users, "quizzes": quizzes,
+            "load_s": round(load_s, 1), "rebuild_s": round(rebuild_s, 1),
+        }
+        with engine.connect() as conn:
+            result["aggregate"], old_rows = time_query(conn, aggregate_rankings(), repeat)
+            result["indexed"], new_rows = time_query(conn, indexed_rankings(), repeat)
+            result["same_scores"] = [r[2] for r in old_rows] == [r[2] for r in new_rows]
+            started = time.perf_counter()
+            result["check_clean"] = not any(part["count"] for part in check_leaderboard(conn).values())
+            result["check_s"] = round(time.perf_counter() - started, 1)
+        engine.dispose()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--attempts", type=int, default=10_000_000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--quizzes", type=int, default=5_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    print(json.dumps(run(args.attempts, args.users, args.quizzes, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
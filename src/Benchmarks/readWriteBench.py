@@ -0,0 +1,157 @@
+"""
+Read latency while attempts are being submitted, under different engine profiles:
+
+  legacy     one default-pooled engine, rollback journal, synchronous=FULL
+             (what queries.py used to create)
+  unbatched  the tuned engine, but every submission commits on its own
+  tuned      the current defaults: WAL, synchronous=NORMAL, mmap/cache
+             sizing, one writer connection, a read-only pool for GET routes
+             and group commit for submissions
+
+Each profile runs in its own process against a throwaway database:
+
+    python -m src.Benchmarks.readWriteBench --seconds 10 --writers 8 --editors 2 --readers 8
+
+Writers submit attempts; editors PATCH answer texts, which reads before it
+writes (the lock upgrade that used to fail with "database is locked") and
+makes the next submissions reload the answer key.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from src.Benchmarks.loginFlood import percentile
+
+PROFILES = {
+    "legacy": {
+        "DB_SPLIT_READ_WRITE": "0",
+        "SQLITE_JOURNAL_MODE": "DELETE",
+        "SQLITE_SYNCHRONOUS": "FULL",
+        "SQLITE_CACHE_SIZE_KIB": "2000",
+        "SQLITE_MMAP_SIZE": "0",
+        "ATTEMPT_BATCH_MAX": "0",
+    },
+    "unbatched": {"ATTEMPT_BATCH_MAX": "0"},
+    "tuned": {},
+}
+
+
+async def run_load(seconds: float, writers: int, editors: int, readers: int, questions: int) -> dict:
+    import httpx
+    from main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        credentials = {"username": "bench", "password": "benchpass1"}
+        await client.post("/setup_database")
+        await client.post("/register", json={**credentials, "email": "bench@example.com"})
+        await client.post("/login", json=credentials)
+        quiz_id = (await client.post("/quiz/create", json={"title": "Bench quiz"})).json()["quiz_id"]
+        answers = []
+        editable = []
+        for i in range(questions):
+            question = (await client.post("/question", json={
+                "quiz_id": quiz_id, "text": f"Question {i}", "type": "multiple", "points": 1,
+            })).json()
+            ids = []
+            for j in range(4):
+                answer = (await client.post("/answers", json={
+                    "question_id": question["id"], "text": f"Option {j}", "is_correct": j < 2,
+                })).json()
+                ids.append(answer["id"])
+                editable.append((answer["id"], j < 2))
+            answers.append({"question_id": question["id"], "selected_answer_ids": ids[:2]})
+
+        statuses: Counter[str] = Counter()
+        read_latencies: list[float] = []
+        write_latencies: list[float] = []
+        deadline = time.perf_counter() + seconds
+
+        async def call(kind: str, latencies: list[float], request):
+            started = time.perf_counter()
+            try:
+                response = await request()
+                statuses[f"{kind} {response.status_code}"] += 1
+            except Exception as exc:  # "database is locked" surfaces here when the app raises
+                statuses[f"{kind} {type(exc).__name__}"] += 1
+            latencies.append(time.perf_counter() - started)
+
+        async def writer():
+            while time.perf_counter() < deadline:
+                await call("write", write_latencies,
+                           lambda: client.post(f"/quiz/{quiz_id}/attempt", json={"answers": answers}))
+
+        async def editor(offset: int):
+            n = offset
+            while time.perf_counter() < deadline:
+                answer_id, is_correct = editable[n % len(editable)]
+                n += 1
+                await call("edit", write_latencies, lambda: client.patch(
+                    f"/answers/{answer_id}", json={"text": f"Option {n}", "is_correct": is_correct}))
+
+        async def reader():
+            while time.perf_counter() < deadline:
+                await call("read", read_latencies, lambda: client.get(f"/quiz/{quiz_id}/questions"))
+
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(writer() for _ in range(writers)),
+            *(editor(i * 7) for i in range(editors)),
+            *(reader() for _ in range(readers)),
+        )
+        elapsed = time.perf_counter() - started
+
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "writes_per_s": round(len(write_latencies) / elapsed, 1),  # submissions and edits
+        "reads_per_s": round(len(read_latencies) / elapsed, 1),
+        "read_p50_ms": round(percentile(read_latencies, 0.50) * 1000, 2),
+        "read_p99_ms": round(percentile(read_latencies, 0.99) * 1000, 2),
+        "read_max_ms": round(max(read_latencies, default=0.0) * 1000, 2),
+        "write_p99_ms": round(percentile(write_latencies, 0.99) * 1000, 2),
+        "write_max_ms": round(max(write_latencies, default=0.0) * 1000, 2),
+        "statuses": dict(statuses),
+    }
+
+
+def run_in_subprocess(profile: str, seconds: float, writers: int, editors: int, readers: int, questions: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, **PROFILES[profile], "DATABASE_URL": f"sqlite+aiosqlite:///{tmp}/bench.db"}
+        output = subprocess.run(
+            [sys.executable, "-m", "src.Benchmarks.readWriteBench", "--single",
+             "--seconds", str(seconds), "--writers", str(writers), "--editors", str(editors),
+             "--readers", str(readers),
+             "--questions", str(questions)],
+            env=env, check=True, capture_output=True, text=True,
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--editors", type=int, default=2)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--questions", type=int, default=30)
+    parser.add_argument("--profiles", nargs="+", choices=sorted(PROFILES), default=list(PROFILES))
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(asyncio.run(run_load(args.seconds, args.writers, args.editors, args.readers, args.questions))))
+        return
+
+    for profile in args.profiles:
+        result = run_in_subprocess(profile, args.seconds, args.writers, args.editors, args.readers, args.questions)
+        print(json.dumps({"profile": profile, **result}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Catalog search latency: the old `title ILIKE '%term%'` scan against the FTS5
+index, on throwaway databases of the given sizes.
+
+    python -m src.Benchmarks.searchBench --sizes 100000 1000000
+
+Each search issues the statements GET /quizzes runs by default: the filtered
+count plus one page of results. FTS5 lists terms too broad to rank
+(settings.search_rank_max_postings) in quiz id order.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, func, insert, select
+
+from src.Config.settings import settings
+from src.DatabaseManager.search import broad_match, create_search_index, match_expression, \
+    rebuild_search_index, search_hits
+from src.Models.models import Base, Quiz, Tag, quiz_tags
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "ra", "su", "to", "vi", "ze", "an", "or", "el", "un", "is", "ga", "po"]
+BATCH = 10_000
+
+
+def make_vocabulary(rng: random.Random, size: int) -> list[str]:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def populate(conn, quizzes: int, rng: random.Random, vocabulary: list[str]) -> None:
+    # plain table creates: the FTS index is built once at the end, like the migration does
+    for table in Base.metadata.sorted_tables:
+        table.create(conn)
+
+    tag_names = vocabulary[:200]
+    conn.execute(insert(Tag), [{"id": i + 1, "name": name} for i, name in enumerate(tag_names)])
+
+    # Zipf-ish word choice so there are both very common and rare terms
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    for start in range(0, quizzes, BATCH):
+        ids = range(start + 1, min(start + BATCH, quizzes) + 1)
+        conn.execute(insert(Quiz), [
+            {
+                "id": quiz_id,
+                "title": " ".join(rng.choices(vocabulary, weights, k=rng.randint(2, 6))),
+                "description": " ".join(rng.choices(vocabulary, weights, k=rng.randint(5, 20))),
+                "creator_id": 1,
+            }
+            for quiz_id in ids
+        ])
+        conn.execute(insert(quiz_tags), [
+            {"quiz_id": quiz_id, "tag_id": tag_id}
+            for quiz_id in ids
+            for tag_id in rng.sample(range(1, len(tag_names) + 1), 2)
+        ])
+
+    create_search_index(conn)
+    rebuild_search_index(conn)
+
+
+def ilike_search(conn, term: str, limit: int) -> dict:
+    stmt = select(Quiz.id, Quiz.title).where(Quiz.title.ilike(f"%{term}%"))
+    total = conn.execute(select(func.count()).select_from(stmt.subquery())).scalar()
+    conn.execute(stmt.order_by(Quiz.id).limit(limit)).all()
+    return {"matches": total}
+
+
+def fts_search(conn, term: str, limit: int) -> dict:
+    # the route's statements: broad terms get their page in quiz id order
+    match = match_expression(term)
+    ranked = not conn.execute(broad_match(match, settings.search_rank_max_postings)).scalar()
+    hits = search_hits(match, ranked=ranked)
+    stmt = select(Quiz.id, Quiz.title).join(hits, hits.c.quiz_id == Quiz.id)
+    total = conn.execute(select(func.count()).select_from(stmt.subquery())).scalar()
+    if ranked:
+        stmt = stmt.order_by(hits.c.rank, Quiz.id)
+    else:
+        stmt = stmt.order_by(hits.c.quiz_id)
+    conn.execute(stmt.limit(limit)).all()
+    return {"matches": total, "ranked": ranked}
+
+
+def time_search(conn, search, term: str, repeat: int, limit: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = search(conn, term, limit)
+        samples.append(time.perf_counter() - started)
+    return {**result, "median_ms": round(statistics.median(samples) * 1000, 2)}
+
+
+def run(size: int, seed: int, repeat: int, limit: int) -> dict:
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(rng, 5000)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'search.db')}")
+        started = time.perf_counter()
+        with engine.begin() as conn:
+            populate(conn, size, rng, vocabulary)
+        load_s = time.perf_counter() - started
+
+        # the ILIKE path only looks at titles, so match counts differ by design
+        terms = {
+            "common": vocabulary[0],
+            "mid": vocabulary[50],
+            "rare": vocabulary[2000],
+            "prefix": vocabulary[10][:3],
+        }
+        result = {"quizzes": size, "load_s": round(load_s, 1)}
+        with engine.connect() as conn:
+            for label, term in terms.items():
+                result[label] = {
+                    "term": term,
+                    "ilike": time_search(conn, ilike_search, term, repeat, limit),
+                    "fts5": time_search(conn, fts_search, term, repeat, limit),
+                }
+        engine.dispose()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        print(json.dumps(run(size, args.seed, args.repeat, args.limit), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Requests per second of the hot read routes with and without the fast
+response path (settings.fast_responses: plain columns encoded directly,
+orjson when installed, instead of ORM objects + response_model +
+jsonable_encoder):
+
+    python -m src.Benchmarks.serializationBench --seconds 3 --quizzes 200 --questions 50
+
+Each mode runs in its own process against a throwaway database. The response
+cache gets a zero TTL so /quizzes and /tags/search serialize on every request;
+no request sends validators, so nothing is answered with a 304.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = {
+    "default": {"FAST_RESPONSES": "0"},
+    "fast": {"FAST_RESPONSES": "1"},
+}
+
+
+async def run_endpoints(seconds: float, quizzes: int, questions: int) -> dict:
+    import httpx
+    from main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        credentials = {"username": "bench", "password": "benchpass1"}
+        await client.post("/setup_database")
+        await client.post("/register", json={**credentials, "email": "bench@example.com"})
+        await client.post("/login", json=credentials)
+
+        tree = None
+        for i in range(quizzes):
+            tree = (await client.post("/quiz/full", json={
+                "title": f"Bench quiz {i}",
+                "description": f"Quiz number {i} about benchmarks",
+                "tags": [f"topic-{i % 40}", f"level-{i % 3}"],
+                "questions": [
+                    {"text": f"Question {j}", "type": "multiple", "points": 1, "answers": [
+                        {"text": f"Option {k}", "is_correct": k < 2} for k in range(4)
+                    ]}
+                    for j in range(questions)
+                ],
+            })).json()
+        quiz_id = tree["quiz_id"]
+        answers = [
+            {"question_id": question["id"], "selected_answer_ids": question["answer_ids"][:2]}
+            for question in tree["questions"]
+        ]
+        attempt_id = (await client.post(f"/quiz/{quiz_id}/attempt", json={"answers": answers})).json()["attempt_id"]
+
+        endpoints = {
+            "GET /quizzes?limit=50": "/quizzes?limit=50",
+            "GET /quizzes?search": "/quizzes?search=bench&highlight=true&limit=20",
+            "GET /tags": "/tags",
+            "GET /quiz/{id}/tags": f"/quiz/{quiz_id}/tags",
+            "GET /tags/search": "/tags/search?query=topic-1",
+            "GET /quiz/{id}/questions": f"/quiz/{quiz_id}/questions",
+            "GET /question/{id}/answers": f"/question/{tree['questions'][0]['id']}/answers",
+            "GET /attempts/{id}": f"/attempts/{attempt_id}",
+        }
+        results = {}
+        for name, url in endpoints.items():
+            response = await client.get(url)  # warm-up; also checks the route works
+            response.raise_for_status()
+            count = 0
+            started = time.perf_counter()
+            deadline = started + seconds
+            while time.perf_counter() < deadline:
+                await client.get(url)
+                count += 1
+            results[name] = {
+                "rps": round(count / (time.perf_counter() - started), 1),
+                "bytes": len(response.content),
+            }
+    return results
+
+
+def run_in_subprocess(mode: str, seconds: float, quizzes: int, questions: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ, **MODES[mode],
+            "RESPONSE_CACHE_TTL_S": "0",
+            "DATABASE_URL": f"sqlite+aiosqlite:///{tmp}/bench.db",
+        }
+        output = subprocess.run(
+            [sys.executable, "-m", "src.Benchmarks.serializationBench", "--single",
+             "--seconds", str(seconds), "--quizzes", str(quizzes), "--questions", str(questions)],
+            env=env, check=True, capture_output=True, text=True,
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--quizzes", type=int, default=200)
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(asyncio.run(run_endpoints(args.seconds, args.quizzes, args.questions))))
+        return
+
+    results = {mode: run_in_subprocess(mode, args.seconds, args.quizzes, args.questions) for mode in MODES}
+    for endpoint, default in results["default"].items():
+        fast = results["fast"][endpoint]
+        print(json.dumps({
+            "endpoint": endpoint,
+            "bytes": default["bytes"],
+            "default_rps": default["rps"],
+            "fast_rps": fast["rps"],
+            "speedup": round(fast["rps"] / default["rps"], 2) if default["rps"] else None,
+        }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Attempt persistence throughput: the old unit-of-work path (flush for the
+attempt id, one UserAnswer object per answer, UPDATE of the score) against
+Core bulk inserts in persist_attempts.
+
+    python -m src.Benchmarks.submitBench --submissions 500 --questions 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.DatabaseManager.migrations import upgrade
+from src.Models.models import QuizAttempt, UserAnswer, User, Quiz, Question, QuestionType
+from src.Services.attemptStore import PendingAttempt, persist_attempts
+from src.Services.grading import GradedAnswer, GradedAttempt
+
+
+async def orm_submit(session, pending: PendingAttempt) -> int:
+    attempt = QuizAttempt(user_id=pending.user_id, quiz_id=pending.quiz_id, score=0)
+    session.add(attempt)
+    await session.flush()
+    for answer in pending.graded.answers:
+        session.add(UserAnswer(
+            attempt_id=attempt.id,
+            question_id=answer.question_id,
+            answer_text=answer.answer_text,
+            selected_answer_ids=answer.selected_answer_ids,
+        ))
+    attempt.score = pending.graded.score
+    attempt_id = attempt.id
+    await session.commit()
+    return attempt_id
+
+
+async def bulk_submit(session, pending: PendingAttempt) -> int:
+    persisted = await persist_attempts(session, [pending])
+    await session.commit()
+    return persisted.attempt_ids[0]
+
+
+async def run(submissions: int, questions: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'submit.db')}")
+        async with engine.begin() as conn:
+            await conn.run_sync(upgrade)
+            await conn.execute(insert(User), [{"id": 1, "username": "bench", "email": "b@x.io", "hashed_password": "-"}])
+            await conn.execute(insert(Quiz), [{"id": 1, "title": "Bench", "creator_id": 1}])
+            await conn.execute(insert(Question), [
+                {"id": i, "quiz_id": 1, "text": f"Q{i}", "type": QuestionType.multiple, "points": 1}
+                for i in range(1, questions + 1)
+            ])
+
+        graded = GradedAttempt(score=questions, max_score=questions, answers=[
+            GradedAnswer(i, f"Q{i}", None, [4 * i, 4 * i + 1], True, 1, frozenset({4 * i, 4 * i + 1})) for i in range(1, questions + 1)
+        ])
+        pending = PendingAttempt(user_id=1, quiz_id=1, graded=graded)
+        new_session = async_sessionmaker(engine)
+
+        result = {"submissions": submissions, "questions": questions}
+        for name, submit in (("orm_unit_of_work", orm_submit), ("core_bulk", bulk_submit)):
+            started = time.perf_counter()
+            for _ in range(submissions):
+                async with new_session() as session:
+                    await submit(session, pending)
+            elapsed = time.perf_counter() - started
+            result[name] = {"elapsed_s": round(elapsed, 3), "submissions_per_s": round(submissions / elapsed, 1)}
+
+        await engine.dispose()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--submissions", type=int, default=500)
+    parser.add_argument("--questions", type=int, default=50)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.submissions, args.questions)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import AsyncIterator, Literal
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+
+from src.Cache.tokenCache import TokenClaims
+from src.Config.settings import settings
+from src.CRUD.userCRUD import get_admin_claims
+from src.DatabaseManager.queries import new_read_session
+from src.DatabaseManager.queryBudget import query_budget
+from src.Models.models import QuizAttempt, UserAnswer
+from src.Services.serialization import dump_json
+
+router = APIRouter()
+
+ATTEMPT_COLUMNS = (
+    QuizAttempt.id, QuizAttempt.user_id, QuizAttempt.quiz_id,
+    QuizAttempt.score, QuizAttempt.max_score, QuizAttempt.created_at,
+)
+ANSWER_COLUMNS = (
+    UserAnswer.id, UserAnswer.attempt_id, QuizAttempt.user_id, QuizAttempt.quiz_id, QuizAttempt.created_at,
+    UserAnswer.question_id, UserAnswer.answer_text, UserAnswer.selected_answer_ids,
+    UserAnswer.is_correct, UserAnswer.points_awarded,
+)
+
+
+def _naive_utc(moment: datetime | None) -> datetime | None:
+    # created_at is stored as naive UTC
+    if moment is None or moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+async def _export_rows(
+    rows: Literal["attempts", "answers"],
+    quiz_id: int | None,
+    user_id: int | None,
+    from_id: int | None,
+    to_id: int | None,
+    since: datetime | None,
+    until: datetime | None,
+) -> AsyncIterator[list]:
+    """
+    Yields the matching rows in id order, one chunk at a time. Every chunk is
+    its own short read transaction on the read-only pool, so an export of any
+    size neither holds a connection nor pins a WAL snapshot between chunks,
+    and submissions keep committing. The upper id bound is fixed up front:
+    the export covers what was committed when it started.
+    """
+    key = QuizAttempt.id if rows == "attempts" else UserAnswer.id
+    stmt = select(*(ATTEMPT_COLUMNS if rows == "attempts" else ANSWER_COLUMNS))
+    if rows == "answers":
+        stmt = stmt.select_from(UserAnswer).join(QuizAttempt, QuizAttempt.id == UserAnswer.attempt_id)
+    if quiz_id is not None:
+        stmt = stmt.where(QuizAttempt.quiz_id == quiz_id)
+    if user_id is not None:
+        stmt = stmt.where(QuizAttempt.user_id == user_id)
+    if from_id is not None:
+        stmt = stmt.where(QuizAttempt.id >= from_id)
+    if to_id is not None:
+        stmt = stmt.where(QuizAttempt.id <= to_id)
+    if since is not None:
+        stmt = stmt.where(QuizAttempt.created_at >= since)
+    if until is not None:
+        stmt = stmt.where(QuizAttempt.created_at < until)
+
+    async with new_read_session() as session:
+        high = await session.scalar(select(func.max(key)))
+    if high is None:
+        return
+
+    # attempt ids are the key itself: seek straight to the range
+    last = from_id - 1 if rows == "attempts" and from_id is not None else 0
+    chunk = settings.export_chunk_rows
+    while True:
+        async with new_read_session() as session:
+            result = await session.execute(stmt.where(key > last, key <= high).order_by(key).limit(chunk))
+            batch = result.all()
+        if not batch:
+            return
+        yield batch
+        if len(batch) < chunk:
+            return
+        last = batch[-1].id
+
+
+def _plain(row) -> dict:
+    values = dict(row._mapping)
+    if values["created_at"] is not None:
+        values["created_at"] = values["created_at"].isoformat()
+    return values
+
+
+async def _ndjson(chunks: AsyncIterator[list]) -> AsyncIterator[bytes]:
+    async for batch in chunks:
+        yield b"".join(dump_json(_plain(row)) + b"\n" for row in batch)
+
+
+async def _csv(chunks: AsyncIterator[list], columns: tuple) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.key for column in columns])
+    async for batch in chunks:
+        for row in batch:
+            values = _plain(row)
+            if "selected_answer_ids" in values and values["selected_answer_ids"] is not None:
+                values["selected_answer_ids"] = json.dumps(values["selected_answer_ids"])
+            writer.writerow(values.values())
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():  # header only: nothing matched
+        yield buffer.getvalue().encode("utf-8")
+
+
+# the bounds read plus one chunk; bigger exports add a statement per export_chunk_rows rows
+@router.get("/export/attempts")
+@query_budget(2)
+async def export_attempts(
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    rows: Literal["attempts", "answers"] = Query("attempts", description="one row per attempt, or per answer with its attempt's fields"),
+    quiz_id: int | None = Query(None),
+    user_id: int | None = Query(None),
+    from_id: int | None = Query(None, description="first attempt id, inclusive"),
+    to_id: int | None = Query(None, description="last attempt id, inclusive"),
+    since: datetime | None = Query(None, description="created_at lower bound, inclusive"),
+    until: datetime | None = Query(None, description="created_at upper bound, exclusive"),
+    admin: TokenClaims = Depends(get_admin_claims),
+):
+    # the session lives inside the generator: the body is streamed after this
+    # function (and its dependencies) have returned
+    chunks = _export_rows(rows, quiz_id, user_id, from_id, to_id, _naive_utc(since), _naive_utc(until))
+    filename = f"{rows}.{format}"
+    if format == "csv":
+        body = _csv(chunks, ATTEMPT_COLUMNS if rows == "attempts" else ANSWER_COLUMNS)
+        media_type = "text/csv; charset=utf-8"
+    else:
+        body = _ndjson(chunks)
+        media_type = "application/x-ndjson"
+    return StreamingResponse(
+        body, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
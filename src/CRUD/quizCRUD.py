@@ -1,15 +1,30 @@
+from typing import Literal, NamedTuple
 
-from fastapi import HTTPException, Depends, APIRouter, Request, Query
-from sqlalchemy import select, func, distinct
+from fastapi import HTTPException, Depends, APIRouter, Request, Query, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import Select, select, func, or_, and_, update, delete
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 
-from src.DatabaseManager.queries import get_session
+from src.Cache.countCache import quiz_count_cache
+from src.Cache.playCache import play_cache
+from src.Cache.responseCache import response_cache
+from src.Cache.versions import CATALOG, TAGS, Version, bump_versions, conditional_response, etag, quiz_key, \
+    read_versions
+from src.CRUD.pagination import encode_cursor, decode_cursor
+from src.Config.settings import settings
+from src.DatabaseManager.queries import get_session, get_read_session
+from src.DatabaseManager.queryBudget import query_budget
+from src.DatabaseManager.search import broad_match, match_expression, search_hits
 from src.Schemas.QuizShema import QuizCreate, QuestionCreate, AnswerCreate, QuizRead, QuestionRead, AnswerRead, \
-    QuestionBase, TagRead, TagCreate, AnswerBase, QuizPrompt
-from src.Models.models import Quiz, Question, Answer, Tag
+    QuestionBase, TagRead, TagCreate, AnswerBase, QuizPrompt, QuizTree, QuizTreeIds
+from src.Models.models import Quiz, Question, Answer, Tag, quiz_tags
 from src.CRUD.userCRUD import get_current_user_from_cookie, get_current_user_id_from_cookie
+from src.Services.attemptStore import delete_question_stats
+from src.Services.serialization import FastJSONResponse, dump_json, model_columns, render_json, row_dicts
+from src.Services.quizTree import QuizTreeInvalid, create_quiz_tree, load_quiz_tree, sync_quiz_tree
 
 router = APIRouter()
 
@@ -18,8 +33,45 @@ def get_current_uid(request: Request):
     return Depends(lambda: get_current_user_from_cookie(request))
 
 
+Entity = Literal["quiz", "question", "answer"]
+
+
+class Owner(NamedTuple):
+    quiz_id: int
+    creator_id: int
+
+
+def _owner_query(entity: Entity, entity_id: int) -> Select:
+    if entity == "quiz":
+        return select(Quiz.id, Quiz.creator_id).where(Quiz.id == entity_id)
+    query = select(Question.quiz_id, Quiz.creator_id)
+    if entity == "answer":
+        query = query.select_from(Answer).join(Question, Question.id == Answer.question_id)
+        condition = Answer.id == entity_id
+    else:
+        condition = Question.id == entity_id
+    return query.join(Quiz, Quiz.id == Question.quiz_id).where(condition)
+
+
+async def require_owner(session: AsyncSession, entity: Entity, entity_id: int, user_id: int) -> Owner:
+    # One joined SELECT on primary keys, read on every request, and no
+    # entity -> quiz -> owner cache. A cached owner would first have to be
+    # checked against the quiz's content version, which is a SELECT of the
+    # same cost; without that check it answers from rows another worker has
+    # already deleted or moved.
+    # 404 if the row (or the quiz above it) is gone, 403 if the quiz is someone else's
+    row = (await session.execute(_owner_query(entity, entity_id))).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"{entity.capitalize()} not found")
+    owner = Owner(*row)
+    if owner.creator_id != user_id:
+        raise HTTPException(status_code=403, detail="Access denied")
+    return owner
+
+
 
 @router.post("/quiz/create")
+@query_budget(2)
 async def create_quiz(
     data: QuizCreate,
     session: AsyncSession = Depends(get_session),
@@ -31,43 +83,237 @@ async def create_quiz(
         creator_id=user_id,
     )
     session.add(quiz)
+    await session.flush()
+    quiz_id = quiz.id
+    await bump_versions(session, CATALOG, quiz_key(quiz_id))
     await session.commit()
-    await session.refresh(quiz)
-    return {"quiz_id": quiz.id}
+    quiz_count_cache.invalidate()
+    response_cache.invalidate()
+    return {"quiz_id": quiz_id}
+
+@router.post("/quiz/full", response_model=QuizTreeIds)
+@query_budget(7)
+async def create_full_quiz(
+    data: QuizTree,
+    session: AsyncSession = Depends(get_session),
+    user_id: int = Depends(get_current_user_id_from_cookie)
+):
+    # весь квиз (вопросы, ответы, теги) одной транзакцией
+    try:
+        ids = await create_quiz_tree(session, user_id, data)
+    except QuizTreeInvalid as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    await bump_versions(session, CATALOG, quiz_key(ids.quiz_id), *([TAGS] if data.tags else []))
+    await session.commit()
+    quiz_count_cache.invalidate()
+    response_cache.invalidate()
+    return ids
+
+
+@router.put("/quiz/{quiz_id}/full", response_model=QuizTreeIds)
+@query_budget(18)
+async def replace_full_quiz(
+    quiz_id: int,
+    data: QuizTree,
+    session: AsyncSession = Depends(get_session),
+    user_id: int = Depends(get_current_user_id_from_cookie)
+):
+    stored = await load_quiz_tree(session, quiz_id)
+    if not stored:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    if stored.creator_id != user_id:
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    try:
+        ids = await sync_quiz_tree(session, quiz_id, stored, data)
+    except QuizTreeInvalid as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    changed = any(ids.changes.values())
+    if changed:
+        await bump_versions(session, CATALOG, quiz_key(quiz_id), *([TAGS] if data.tags else []))
+    await session.commit()
+    if changed:
+        quiz_count_cache.invalidate()
+        response_cache.invalidate()
+    return ids
 
 @router.get("/quizzes")
+@query_budget(5)
 async def get_quizzes(
+    request: Request,
+    response: Response,
     search: str | None = Query(None),
     tag: str | None = Query(None),
     page: int = Query(1, ge=1),
     limit: int = Query(4, ge=1),
-    session: AsyncSession = Depends(get_session),
+    highlight: bool = Query(False),
+    after: str | None = Query(None, description="next_cursor of the previous page; replaces page"),
+    include_total: bool | None = Query(None, description="defaults to true for page, false for after"),
+    session: AsyncSession = Depends(get_read_session),
 ):
-    stmt = select(Quiz)
-
-    if search:
-        stmt = stmt.where(Quiz.title.ilike(f"%{search}%"))
-
+    version, = await read_versions(session, CATALOG)
+    not_modified = conditional_response(request, response, etag("catalog", version), version)
+    if not_modified:
+        return not_modified
+
+    match = match_expression(search) if search else None
+    if include_total is None:
+        include_total = after is None
+    # keyed by the shared catalog version: a write on another worker never
+    # reaches this process's invalidate()
+    cache_key = ("quizzes", version, match, tag, limit, highlight, include_total, after if after is not None else page)
+
+    generation = response_cache.generation
+    body = response_cache.get(cache_key)
+    if body is None:
+        if settings.fast_responses:
+            page_data = await _quiz_page(
+                session, version, match, tag, page, limit, highlight, after, include_total, fast=True
+            )
+            body = dump_json(page_data)
+        else:
+            page_data = await _quiz_page(session, version, match, tag, page, limit, highlight, after, include_total)
+            body = render_json(jsonable_encoder(page_data))
+        response_cache.put(cache_key, body, generation)
+    return Response(content=body, media_type="application/json", headers=dict(response.headers))
+
+
+async def _quiz_page(
+    session: AsyncSession,
+    version: Version,
+    match: str | None,
+    tag: str | None,
+    page: int,
+    limit: int,
+    highlight: bool,
+    after: str | None,
+    include_total: bool,
+    fast: bool = False,
+) -> dict:
+    # fast: plain columns and one query for the tags instead of ORM objects
+    stmt = select(*model_columns(QuizRead, Quiz)) if fast else select(Quiz)
     if tag:
         stmt = stmt.join(Quiz.tags).where(Tag.name == tag)
 
-    total_stmt = select(func.count(distinct(Quiz.id)))
-    if search or tag:
-        total_stmt = total_stmt.select_from(stmt.subquery())
-
-    total = await session.scalar(total_stmt)
-
-    stmt = stmt.offset((page - 1) * limit).limit(limit)
-    result = await session.execute(stmt)
-    quizzes = result.scalars().all()
-
-    return {"quizzes": quizzes, "total": total}
+    filter_key = [match, tag]
+    cursor = None
+    if after is not None:
+        cursor = decode_cursor(after)
+        if cursor.get("f") != filter_key:
+            raise HTTPException(status_code=400, detail="Cursor does not match the current filters")
+
+    ranked = False
+    if match:
+        # bm25 reads every quiz containing a search word before the first row
+        # can be sorted; broad searches (whose scores barely differ anyway)
+        # are listed in quiz id order, which the index streams. Later pages
+        # follow the first one.
+        if cursor is not None:
+            ranked = "rank" in cursor
+        else:
+            ranked = not await session.scalar(broad_match(match, settings.search_rank_max_postings))
+
+    total = None
+    if include_total:
+        total = quiz_count_cache.get((version, match, tag))
+        if total is None:
+            counted = stmt
+            if match:
+                matches = search_hits(match, ranked=False)
+                counted = counted.join(matches, matches.c.quiz_id == Quiz.id)
+            generation = quiz_count_cache.generation
+            total = await session.scalar(select(func.count()).select_from(counted.subquery()))
+            quiz_count_cache.put((version, match, tag), total, generation)
+
+    hits = None
+    if match:
+        hits = search_hits(match, with_snippet=highlight, ranked=ranked)
+        stmt = stmt.join(hits, hits.c.quiz_id == Quiz.id)
+
+    # keyset pagination: seek past the last row of the previous page on the
+    # same sort key instead of counting OFFSET rows
+    if cursor is not None:
+        if ranked:
+            rank = cursor["rank"]
+            if not isinstance(rank, (int, float)):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            stmt = stmt.where(or_(hits.c.rank > rank, and_(hits.c.rank == rank, Quiz.id > cursor["id"])))
+        elif hits is not None:
+            stmt = stmt.where(hits.c.quiz_id > cursor["id"])
+        else:
+            stmt = stmt.where(Quiz.id > cursor["id"])
+
+    if ranked:
+        stmt = stmt.add_columns(hits.c.rank).order_by(hits.c.rank, Quiz.id)
+    elif hits is not None:
+        stmt = stmt.order_by(hits.c.quiz_id)
+    else:
+        stmt = stmt.order_by(Quiz.id)
+    if hits is not None and highlight:
+        stmt = stmt.add_columns(hits.c.snippet)
+
+    if not fast:
+        stmt = stmt.options(selectinload(Quiz.tags))
+    stmt = stmt.limit(limit + 1)
+    if after is None:
+        stmt = stmt.offset((page - 1) * limit)
+    rows = (await session.execute(stmt)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        payload = {"id": last.id if fast else last.Quiz.id, "f": filter_key}
+        if ranked:
+            payload["rank"] = last.rank
+        next_cursor = encode_cursor(payload)
+
+    if fast:
+        tags = await _tags_by_quiz(session, [row.id for row in rows])
+        quizzes = [
+            {
+                "title": row.title, "description": row.description, "id": row.id, "creator_id": row.creator_id,
+                "tags": tags.get(row.id, []),
+            }
+            for row in rows
+        ]
+        if hits is not None and highlight:
+            for quiz, row in zip(quizzes, rows):
+                quiz["snippet"] = row.snippet
+    elif hits is not None and highlight:
+        quizzes = [{**jsonable_encoder(row.Quiz), "snippet": row.snippet} for row in rows]
+    else:
+        quizzes = [row.Quiz for row in rows]
+
+    return {"quizzes": quizzes, "total": total, "next_cursor": next_cursor}
+
+
+async def _tags_by_quiz(session: AsyncSession, quiz_ids: list[int]) -> dict[int, list[dict]]:
+    if not quiz_ids:
+        return {}
+    result = await session.execute(
+        select(quiz_tags.c.quiz_id, Tag.name, Tag.id)
+        .join(Tag, Tag.id == quiz_tags.c.tag_id)
+        .where(quiz_tags.c.quiz_id.in_(quiz_ids))
+    )
+    tags: dict[int, list[dict]] = {}
+    for quiz_id, name, tag_id in result:
+        tags.setdefault(quiz_id, []).append({"name": name, "id": tag_id})
+    return tags
 
 @router.get("/quiz/{quiz_id}", response_model=QuizRead)
+@query_budget(2)
 async def get_quiz(
     quiz_id: int,
-    session: AsyncSession = Depends(get_session)
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_read_session)
 ):
+    version, = await read_versions(session, quiz_key(quiz_id))
+    not_modified = conditional_response(request, response, etag(f"quiz{quiz_id}", version), version)
+    if not_modified:
+        return not_modified
+
     result = await session.execute(select(Quiz).where(Quiz.id == quiz_id))
     quiz = result.scalar_one_or_none()
     if not quiz:
@@ -75,66 +321,96 @@ async def get_quiz(
     return quiz
 
 
+@router.get("/quiz/{quiz_id}/play")
+@query_budget(2)
+async def get_quiz_for_play(
+    quiz_id: int,
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_read_session),
+    user_id: int = Depends(get_current_user_id_from_cookie)
+):
+    # всё, что нужно для прохождения квиза, одним ответом (без is_correct)
+    # the shared validator: a 304 costs this one read, as on every conditional GET (see versions.py)
+    version, = await read_versions(session, quiz_key(quiz_id))
+    not_modified = conditional_response(request, response, etag(f"play{quiz_id}", version), version)
+    if not_modified:
+        return not_modified
+
+    body = await play_cache.get(session, quiz_id, version.counter)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    return Response(content=body, media_type="application/json", headers=dict(response.headers))
+
+
 @router.patch("/quiz/{quiz_id}")
+@query_budget(3)
 async def update_quiz(
     quiz_id: int,
     data: QuizCreate,
     session: AsyncSession = Depends(get_session),
     user_id: int = Depends(get_current_user_id_from_cookie)  # ✅ use correct dependency
 ):
-    result = await session.execute(select(Quiz).where(Quiz.id == quiz_id))
-    quiz = result.scalar_one_or_none()
-    if not quiz:
-        raise HTTPException(status_code=404, detail="Quiz not found")
-    if quiz.creator_id != user_id:
-        raise HTTPException(status_code=403, detail="Access denied")
-
-    for key, value in data.dict().items():
-        setattr(quiz, key, value)
-
+    await require_owner(session, "quiz", quiz_id, user_id)
+    await session.execute(update(Quiz).where(Quiz.id == quiz_id).values(**data.dict()))
+    await bump_versions(session, CATALOG, quiz_key(quiz_id))
     await session.commit()
+    quiz_count_cache.invalidate()
+    response_cache.invalidate()
     return {"message": "Quiz updated"}
 
 
 @router.delete("/quiz/{quiz_id}")
+@query_budget(12)
 async def delete_quiz(
     quiz_id: int,
     session: AsyncSession = Depends(get_session),
     user_id: int = Depends(get_current_user_id_from_cookie)
 ):
-    result = await session.execute(select(Quiz).where(Quiz.id == quiz_id))
+    await require_owner(session, "quiz", quiz_id, user_id)
+    # cascade delete needs the questions/answers tree and the tag links in the session
+    result = await session.execute(
+        select(Quiz)
+        .options(
+            selectinload(Quiz.questions).selectinload(Question.answers),
+            selectinload(Quiz.tags),
+        )
+        .where(Quiz.id == quiz_id)
+    )
     quiz = result.scalar_one_or_none()
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
-    if quiz.creator_id != user_id:
-        raise HTTPException(status_code=403, detail="Access denied")
 
+    await delete_question_stats(session, [question.id for question in quiz.questions])
     await session.delete(quiz)
+    await bump_versions(session, CATALOG, quiz_key(quiz_id))
     await session.commit()
+    quiz_count_cache.invalidate()
+    response_cache.invalidate()
     return {"message": "Quiz deleted"}
 
 @router.post("/question", response_model=QuestionRead)
+@query_budget(4)
 async def create_question(
     data: QuestionCreate,
     session: AsyncSession = Depends(get_session),
     user_id: int = Depends(get_current_user_id_from_cookie)
 ):
-    result = await session.execute(select(Quiz).where(Quiz.id == data.quiz_id))
-    quiz = result.scalar_one_or_none()
-    if not quiz or quiz.creator_id != user_id:
-        raise HTTPException(status_code=403, detail="Access denied")
+    await require_owner(session, "quiz", data.quiz_id, user_id)
 
     question = Question(**data.dict())
     session.add(question)
+    await bump_versions(session, quiz_key(data.quiz_id))
     await session.commit()
     await session.refresh(question)
     return question
 
 
 @router.get("/question/{question_id}", response_model=QuestionRead)
+@query_budget(1)
 async def get_question(
     question_id: int,
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     result = await session.execute(select(Question).where(Question.id == question_id))
     question = result.scalar_one_or_none()
@@ -144,76 +420,63 @@ async def get_question(
 
 
 @router.patch("/question/{question_id}")
+@query_budget(3)
 async def update_question(
     question_id: int,
     data: QuestionBase,
     session: AsyncSession = Depends(get_session),
     user_id: int = Depends(get_current_user_id_from_cookie)
 ):
-    result = await session.execute(select(Question).where(Question.id == question_id))
-    question = result.scalar_one_or_none()
-    if not question:
-        raise HTTPException(status_code=404, detail="Question not found")
-
-    quiz_result = await session.execute(select(Quiz).where(Quiz.id == question.quiz_id))
-    quiz = quiz_result.scalar_one_or_none()
-    if not quiz or quiz.creator_id != user_id:
-        raise HTTPException(status_code=403, detail="Access denied")
-
-    for key, value in data.dict().items():
-        setattr(question, key, value)
-
+    owner = await require_owner(session, "question", question_id, user_id)
+    await session.execute(update(Question).where(Question.id == question_id).values(**data.dict()))
+    await bump_versions(session, quiz_key(owner.quiz_id))
     await session.commit()
     return {"message": "Question updated"}
 
 
 @router.delete("/question/{question_id}")
+@query_budget(8)
 async def delete_question(
     question_id: int,
     session: AsyncSession = Depends(get_session),
     user_id: int = Depends(get_current_user_id_from_cookie)
 ):
-    result = await session.execute(select(Question).where(Question.id == question_id))
+    owner = await require_owner(session, "question", question_id, user_id)
+    result = await session.execute(
+        select(Question).options(selectinload(Question.answers)).where(Question.id == question_id)
+    )
     question = result.scalar_one_or_none()
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
 
-    quiz_result = await session.execute(select(Quiz).where(Quiz.id == question.quiz_id))
-    quiz = quiz_result.scalar_one_or_none()
-    if not quiz or quiz.creator_id != user_id:
-        raise HTTPException(status_code=403, detail="Access denied")
-
+    await delete_question_stats(session, [question_id])
     await session.delete(question)
+    await bump_versions(session, quiz_key(owner.quiz_id))
     await session.commit()
     return {"message": "Question deleted"}
 
 
 @router.post("/answers", response_model=AnswerRead)
+@query_budget(4)
 async def create_answer(
     data: AnswerCreate,
     session: AsyncSession = Depends(get_session),
     user_id: int = Depends(get_current_user_id_from_cookie)
 ):
-    question_result = await session.execute(select(Question).where(Question.id == data.question_id))
-    question = question_result.scalar_one_or_none()
-    if not question:
-        raise HTTPException(status_code=404, detail="Question not found")
-
-    quiz_result = await session.execute(select(Quiz).where(Quiz.id == question.quiz_id))
-    quiz = quiz_result.scalar_one_or_none()
-    if not quiz or quiz.creator_id != user_id:
-        raise HTTPException(status_code=403, detail="Access denied")
+    owner = await require_owner(session, "question", data.question_id, user_id)
 
     answer = Answer(**data.dict())
     session.add(answer)
+    await bump_versions(session, quiz_key(owner.quiz_id))
     await session.commit()
     await session.refresh(answer)
     return answer
 
 @router.get("/answers/{answer_id}", response_model=AnswerRead)
+@query_budget(1)
 async def get_answer(
     answer_id: int,
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     result = await session.execute(select(Answer).where(Answer.id == answer_id))
     answer = result.scalar_one_or_none()
@@ -223,55 +486,41 @@ async def get_answer(
 
 
 @router.patch("/answers/{answer_id}", response_model=AnswerRead)
+@query_budget(3)
 async def update_answer(
     answer_id: int,
     data: AnswerBase,
     session: AsyncSession = Depends(get_session),
     user_id: int = Depends(get_current_user_id_from_cookie)
 ):
-    result = await session.execute(select(Answer).where(Answer.id == answer_id))
-    answer = result.scalar_one_or_none()
-    if not answer:
+    owner = await require_owner(session, "answer", answer_id, user_id)
+    result = await session.execute(
+        update(Answer).where(Answer.id == answer_id).values(**data.dict())
+        .returning(*model_columns(AnswerRead, Answer))
+    )
+    answer = result.one_or_none()
+    if answer is None:
         raise HTTPException(status_code=404, detail="Answer not found")
-
-    question_result = await session.execute(select(Question).where(Question.id == answer.question_id))
-    question = question_result.scalar_one_or_none()
-
-    quiz_result = await session.execute(select(Quiz).where(Quiz.id == question.quiz_id))
-    quiz = quiz_result.scalar_one_or_none()
-    if not quiz or quiz.creator_id != user_id:
-        raise HTTPException(status_code=403, detail="Access denied")
-
-    for key, value in data.dict().items():
-        setattr(answer, key, value)
-
+    await bump_versions(session, quiz_key(owner.quiz_id))
     await session.commit()
-    await session.refresh(answer)
-    return answer
+    return answer._asdict()
 
 @router.delete("/answers/{answer_id}")
+@query_budget(4)
 async def delete_answer(
     answer_id: int,
     session: AsyncSession = Depends(get_session),
     user_id: int = Depends(get_current_user_id_from_cookie)
 ):
-    result = await session.execute(select(Answer).where(Answer.id == answer_id))
-    answer = result.scalar_one_or_none()
-    if not answer:
-        raise HTTPException(status_code=404, detail="Answer not found")
-
-    question_result = await session.execute(select(Question).where(Question.id == answer.question_id))
-    question = question_result.scalar_one_or_none()
-    quiz_result = await session.execute(select(Quiz).where(Quiz.id == question.quiz_id))
-    quiz = quiz_result.scalar_one_or_none()
-    if not quiz or quiz.creator_id != user_id:
-        raise HTTPException(status_code=403, detail="Access denied")
-
-    await session.delete(answer)
+    owner = await require_owner(session, "answer", answer_id, user_id)
+    await session.execute(delete(Answer).where(Answer.id == answer_id))
+    await delete_question_stats(session, answer_ids=[answer_id])
+    await bump_versions(session, quiz_key(owner.quiz_id))
     await session.commit()
     return {"message": "Answer deleted successfully"}
 
 @router.post("/tags", response_model=TagRead)
+@query_budget(4)
 async def create_tag(
     data: TagCreate,
     session: AsyncSession = Depends(get_session)
@@ -284,17 +533,33 @@ async def create_tag(
 
     tag = Tag(name=data.name)
     session.add(tag)
+    await bump_versions(session, TAGS)
     await session.commit()
     await session.refresh(tag)
     return tag
 
 @router.get("/tags", response_model=list[TagRead])
-async def get_all_tags(session: AsyncSession = Depends(get_session)):
+@query_budget(2)
+async def get_all_tags(
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_read_session)
+):
+    version, = await read_versions(session, TAGS)
+    not_modified = conditional_response(request, response, etag("tags", version), version)
+    if not_modified:
+        return not_modified
+
+    if settings.fast_responses:
+        rows = await session.execute(select(*model_columns(TagRead, Tag)))
+        return FastJSONResponse(row_dicts(rows), headers=dict(response.headers))
+
     result = await session.execute(select(Tag))
     return result.scalars().all()
 
 
 @router.patch("/tags/{tag_id}", response_model=TagRead)
+@query_budget(4)
 async def update_tag(
         tag_id: int,
         data: TagCreate,
@@ -306,46 +571,72 @@ async def update_tag(
         raise HTTPException(status_code=404, detail="Tag not found")
 
     tag.name = data.name
+    await bump_versions(session, CATALOG, TAGS)
     await session.commit()
+    quiz_count_cache.invalidate()
+    response_cache.invalidate()
     await session.refresh(tag)
     return tag
 
 
 @router.post("/quiz/{quiz_id}/add-tag", response_model=TagRead)
+@query_budget(6)
 async def add_tag_to_quiz(
     quiz_id: int,
     tag_data: TagCreate,
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_session),
+    user_id: int = Depends(get_current_user_id_from_cookie)
 ):
+    await require_owner(session, "quiz", quiz_id, user_id)
     tag_result = await session.execute(select(Tag).where(Tag.name == tag_data.name))
     tag = tag_result.scalar_one_or_none()
 
-    if not tag:
+    created = tag is None
+    if created:
         tag = Tag(name=tag_data.name)
         session.add(tag)
         await session.flush()  # нужен до commit'а
 
-    quiz_result = await session.execute(
-        select(Quiz).options(selectinload(Quiz.tags)).where(Quiz.id == quiz_id)
+    # уже привязанный тег просто пропускается
+    await session.execute(
+        sqlite_insert(quiz_tags).values(quiz_id=quiz_id, tag_id=tag.id).on_conflict_do_nothing()
     )
-    quiz = quiz_result.scalar_one_or_none()
-    if not quiz:
-        raise HTTPException(status_code=404, detail="Quiz not found")
-
-    if all(existing_tag.id != tag.id for existing_tag in quiz.tags):
-        quiz.tags.append(tag)
-
+    await bump_versions(session, CATALOG, quiz_key(quiz_id), *([TAGS] if created else []))
     await session.commit()
+    quiz_count_cache.invalidate()
+    response_cache.invalidate()
     await session.refresh(tag)
 
     return TagRead.model_validate(tag)
 
 
 @router.get("/quiz/{quiz_id}/tags", response_model=list[TagRead])
+@query_budget(3)
 async def get_tags_by_quiz_id(
     quiz_id: int,
-    session: AsyncSession = Depends(get_session)
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_read_session)
 ):
+    # ссылки на теги меняют версию квиза, переименование тега — версию тегов
+    versions = await read_versions(session, quiz_key(quiz_id), TAGS)
+    not_modified = conditional_response(request, response, etag(f"quiztags{quiz_id}", *versions), *versions)
+    if not_modified:
+        return not_modified
+
+    if settings.fast_responses:
+        # one query: a quiz without tags still yields one all-NULL row
+        rows = (await session.execute(
+            select(Tag.name, Tag.id)
+            .select_from(Quiz)
+            .outerjoin(quiz_tags, quiz_tags.c.quiz_id == Quiz.id)
+            .outerjoin(Tag, Tag.id == quiz_tags.c.tag_id)
+            .where(Quiz.id == quiz_id)
+        )).all()
+        if not rows:
+            raise HTTPException(status_code=404, detail="Quiz not found")
+        return FastJSONResponse(row_dicts(row for row in rows if row.id is not None), headers=dict(response.headers))
+
     result = await session.execute(
         select(Quiz).options(selectinload(Quiz.tags)).where(Quiz.id == quiz_id)
     )
@@ -355,37 +646,64 @@ async def get_tags_by_quiz_id(
     return quiz.tags
 
 @router.get("/tags/search", response_model=list[QuizRead])
+@query_budget(2)
 async def search_quizzes_by_tag_name(
     query: str,
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
-    result = await session.execute(
-        select(Quiz)
-        .join(Quiz.tags)
-        .options(selectinload(Quiz.tags))
-        .where(Tag.name.ilike(f"{query}%"))
-        .distinct()
-    )
-    quizzes = result.scalars().all()
-    return quizzes
+    version, = await read_versions(session, CATALOG)
+    # LIKE ignores case for ASCII only, so only those queries share a key
+    cache_key = ("tag_search", version, query.lower() if query.isascii() else query)
+    generation = response_cache.generation
+    body = response_cache.get(cache_key)
+    if body is None:
+        # drive the lookup from the (small) tags table through ix_quiz_tags_tag_id
+        matching_tags = select(Tag.id).where(Tag.name.ilike(f"{query}%"))
+        matching = select(quiz_tags.c.quiz_id).where(quiz_tags.c.tag_id.in_(matching_tags))
+        if settings.fast_responses:
+            rows = await session.execute(select(*model_columns(QuizRead, Quiz)).where(Quiz.id.in_(matching)))
+            body = dump_json(row_dicts(rows))
+        else:
+            result = await session.execute(select(Quiz).where(Quiz.id.in_(matching)))
+            quizzes = result.scalars().all()
+            body = render_json([QuizRead.model_validate(quiz).model_dump(mode="json") for quiz in quizzes])
+        response_cache.put(cache_key, body, generation)
+    return Response(content=body, media_type="application/json")
 
 @router.get("/quiz/{quiz_id}/questions", response_model=list[QuestionRead])
+@query_budget(2)
 async def get_questions_by_quiz_id(
     quiz_id: int,
-    session: AsyncSession = Depends(get_session),
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_read_session),
     user_id: int = Depends(get_current_user_id_from_cookie)  # проверка авторизации
 ):
+    version, = await read_versions(session, quiz_key(quiz_id))
+    not_modified = conditional_response(request, response, etag(f"questions{quiz_id}", version), version)
+    if not_modified:
+        return not_modified
+
+    if settings.fast_responses:
+        rows = await session.execute(select(*model_columns(QuestionRead, Question)).where(Question.quiz_id == quiz_id))
+        return FastJSONResponse(row_dicts(rows), headers=dict(response.headers))
+
     result = await session.execute(select(Question).where(Question.quiz_id == quiz_id))
     questions = result.scalars().all()
     return questions
 
 
 @router.get("/question/{question_id}/answers", response_model=list[AnswerRead])
+@query_budget(1)
 async def get_answers_by_question_id(
     question_id: int,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     user_id: int = Depends(get_current_user_id_from_cookie)
 ):
+    if settings.fast_responses:
+        rows = await session.execute(select(*model_columns(AnswerRead, Answer)).where(Answer.question_id == question_id))
+        return FastJSONResponse(row_dicts(rows))
+
     result = await session.execute(select(Answer).where(Answer.question_id == question_id))
     answers = result.scalars().all()
     return answers
@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import PlainTextResponse
+
+from src.Cache.answerKeyCache import answer_key_cache
+from src.Cache.countCache import quiz_count_cache
+from src.Cache.leaderboardCache import leaderboard_cache
+from src.Cache.playCache import play_cache
+from src.Cache.responseCache import response_cache
+from src.Cache.tokenCache import TokenClaims, token_cache
+from src.Config.settings import settings
+from src.CRUD.userCRUD import get_admin_claims
+from src.Services.attemptWriter import attempt_writer
+from src.DatabaseManager.queryBudget import query_budget
+from src.DatabaseManager.slowQueries import slow_query_log
+from src.Services.passwordHasher import password_hasher
+from src.Services.requestMetrics import request_metrics
+
+router = APIRouter()
+
+
+@router.get("/stats")
+@query_budget(0)
+async def get_stats(admin: TokenClaims = Depends(get_admin_claims)):
+    return {
+        "password_hasher": password_hasher.stats(),
+        "token_cache": token_cache.stats(),
+        "quiz_count_cache": quiz_count_cache.stats(),
+        "answer_key_cache": answer_key_cache.stats(),
+        "leaderboard_cache": leaderboard_cache.stats(),
+        "play_cache": play_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "attempt_writer": attempt_writer.stats(),
+    }
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+@query_budget(0)
+async def get_metrics():
+    return PlainTextResponse(request_metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/slow-queries")
+@query_budget(1)
+async def get_slow_queries(
+    limit: int = Query(50, ge=1, le=1_000),
+    admin: TokenClaims = Depends(get_admin_claims),
+):
+    return {
+        "threshold_ms": settings.slow_query_ms,
+        "recorded": slow_query_log.recorded,
+        "entries": slow_query_log.entries(limit),
+    }
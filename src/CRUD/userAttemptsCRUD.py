@@ -1,15 +1,24 @@
 # routers/attempts.py
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, and_
 
-from src.DatabaseManager.queries import get_session
+from src.Cache.answerKeyCache import answer_key_cache
+from src.Cache.leaderboardCache import leaderboard_cache
+from src.Config.settings import settings
+from src.DatabaseManager.queries import get_read_session
+from src.DatabaseManager.queryBudget import query_budget
 from src.Schemas.QuizShema import QuizAttemptCreate, QuizAttemptResult, UserAnswerRead, QuestionType, CorrectAnswerInfo, \
-    UserRanking
-from src.Models.models import Quiz, Question, Answer, UserAnswer, QuizAttempt, User
+    UserRanking, RankingEntry, MyRank, AnswerOptionStatsRead, QuestionStatsRead, QuizStatsRead
+from src.Models.models import Quiz, Question, Answer, UserAnswer, QuizAttempt, User, UserQuizBest, QuestionStats, \
+    AnswerOptionStats
 from src.CRUD.userCRUD import get_current_user_id_from_cookie
+from src.Services.attemptStore import PendingAttempt
+from src.Services.attemptWriter import attempt_writer
+from src.Services.grading import grade_attempt
+from src.Services.serialization import FastJSONResponse
 
 router = APIRouter()
 
@@ -103,228 +112,139 @@ router = APIRouter()
 #     )
 
 @router.post("/quiz/{quiz_id}/attempt", response_model=QuizAttemptResult)
+@query_budget(9)
 async def submit_quiz_attempt(
     quiz_id: int,
     data: QuizAttemptCreate,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     user_id: int = Depends(get_current_user_id_from_cookie)
 ):
-    quiz_result = await session.execute(select(Quiz).where(Quiz.id == quiz_id))
-    quiz = quiz_result.scalar_one_or_none()
-    if not quiz:
+    answer_key = await answer_key_cache.get(session, quiz_id)
+    # don't hold a pooled connection while the write waits for its batch
+    await session.close()
+    if answer_key is None:
         raise HTTPException(status_code=404, detail="Quiz not found")
-
-    question_result = await session.execute(select(Question).where(Question.quiz_id == quiz_id))
-    questions = {q.id: q for q in question_result.scalars().all()}
-    if not questions:
+    if not answer_key.questions:
         raise HTTPException(status_code=400, detail="No questions in this quiz")
 
-    all_question_ids = list(questions.keys())
-    answer_result = await session.execute(select(Answer).where(Answer.question_id.in_(all_question_ids)))
-    all_answers = answer_result.scalars().all()
-
-    # Построим словарь правильных ответов
-    correct_ids_map: dict[int, list[int]] = {}
-    for ans in all_answers:
-        if ans.is_correct:
-            correct_ids_map.setdefault(ans.question_id, []).append(ans.id)
-
-    attempt = QuizAttempt(user_id=user_id, quiz_id=quiz_id, score=0)
-    session.add(attempt)
-    await session.flush()
-    attempt_id = attempt.id
-
-    total_score = 0
-    max_score = 0
-    user_answer_reads = []
-
-    for user_answer in data.answers:
-        question = questions.get(user_answer.question_id)
-        if not question:
-            continue
-
-        submitted_ids = user_answer.selected_answer_ids or []
-        correct_ids = sorted(correct_ids_map.get(question.id, []))
-        is_correct = False
-        points_awarded = 0
-
-        max_score += question.points
-
-        q_type = question.type.value if hasattr(question.type, "value") else str(question.type)
-
-        if q_type == "text":
-            is_correct = True
-            points_awarded = question.points
-
-        elif q_type == "single":
-            if len(correct_ids) == 1 and len(submitted_ids) == 1 and submitted_ids[0] == correct_ids[0]:
-                is_correct = True
-                points_awarded = question.points
+    graded = grade_attempt(answer_key, data.answers)
 
-        elif q_type == "multiple":
-            if sorted(submitted_ids) == correct_ids:
-                is_correct = True
-                points_awarded = question.points
-
-        session.add(UserAnswer(
-            attempt_id=attempt_id,
-            question_id=user_answer.question_id,
-            answer_text=user_answer.answer_text,
-            selected_answer_ids=submitted_ids
-        ))
-
-        total_score += points_awarded
-
-        user_answer_reads.append(UserAnswerRead(
-            question_id=user_answer.question_id,
-            question_text=question.text,
-            answer_text=user_answer.answer_text,
-            selected_answer_ids=submitted_ids,
-            is_correct=is_correct,
-            points_awarded=points_awarded
-        ))
-
-    attempt.score = total_score
-    await session.commit()
+    # group commit: the writer task stores this with whatever else is queued
+    written = await attempt_writer.submit(PendingAttempt(user_id, quiz_id, graded))
+    attempt_id = written.attempt_id
 
     return QuizAttemptResult(
         attempt_id=attempt_id,
-        score=total_score,
-        max_score=max_score,
-        answers=user_answer_reads
+        score=graded.score,
+        max_score=graded.max_score,
+        answers=[
+            UserAnswerRead(
+                question_id=answer.question_id,
+                question_text=answer.question_text,
+                answer_text=answer.answer_text,
+                selected_answer_ids=answer.selected_answer_ids,
+                is_correct=answer.is_correct,
+                points_awarded=answer.points_awarded
+            )
+            for answer in graded.answers
+        ]
     )
 
 
 
 @router.get("/attempts/{attempt_id}", response_model=QuizAttemptResult)
+@query_budget(1)
 async def get_quiz_attempt_result(
     attempt_id: int,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     user_id: int = Depends(get_current_user_id_from_cookie)
 ):
-    attempt = await session.get(QuizAttempt, attempt_id)
-    if not attempt or attempt.user_id != user_id:
-        raise HTTPException(status_code=403, detail="Access denied")
-
-    answers_result = await session.execute(
-        select(UserAnswer).where(UserAnswer.attempt_id == attempt_id)
-    )
-    answers = answers_result.scalars().all()
-
-    question_ids = [a.question_id for a in answers]
-    questions_result = await session.execute(
-        select(Question).where(Question.id.in_(question_ids))
-    )
-    questions = {q.id: q for q in questions_result.scalars().all()}
-
-    answer_result = await session.execute(
-        select(Answer).where(Answer.question_id.in_(questions.keys()))
+    # grading was stored at submission time, so this is a plain read
+    result = await session.execute(
+        select(
+            QuizAttempt.score,
+            QuizAttempt.max_score,
+            UserAnswer.question_id,
+            Question.text,
+            UserAnswer.answer_text,
+            UserAnswer.selected_answer_ids,
+            UserAnswer.is_correct,
+            UserAnswer.points_awarded,
+        )
+        .select_from(QuizAttempt)
+        .outerjoin(UserAnswer, UserAnswer.attempt_id == QuizAttempt.id)
+        .outerjoin(Question, Question.id == UserAnswer.question_id)
+        .where(QuizAttempt.id == attempt_id, QuizAttempt.user_id == user_id)
+        .order_by(UserAnswer.id)
     )
-    answer_map = {}
-    for a in answer_result.scalars().all():
-        answer_map.setdefault(a.question_id, []).append(a)
-
-    result_answers = []
-
-    for ua in answers:
-        question = questions.get(ua.question_id)
-        if not question:
-            continue
-
-        q_type = question.type.value if hasattr(question.type, "value") else str(question.type)
-        is_correct = False
-
-        if q_type == "text":
-            is_correct = True
-        elif q_type == "single":
-            correct = next((a for a in answer_map[question.id] if a.is_correct), None)
-            if correct and ua.selected_answer_ids == [correct.id]:
-                is_correct = True
-        elif q_type == "multiple":
-            correct_ids = sorted([a.id for a in answer_map[question.id] if a.is_correct])
-            user_ids = sorted(ua.selected_answer_ids or [])
-            if correct_ids == user_ids:
-                is_correct = True
-
-        result_answers.append(UserAnswerRead(
-            question_id=ua.question_id,
-            question_text=question.text,
-            answer_text=ua.answer_text,
-            selected_answer_ids=ua.selected_answer_ids,
-            is_correct=is_correct,
-            points_awarded=question.points if is_correct else 0
-        ))
+    rows = result.all()
+    if not rows:
+        raise HTTPException(status_code=403, detail="Access denied")
 
-    return QuizAttemptResult(
-        attempt_id=attempt.id,
-        score=attempt.score,
-        max_score=sum(q.points for q in questions.values()),
-        answers=result_answers,
-    )
+    content = {
+        "attempt_id": attempt_id,
+        "score": rows[0].score,
+        "max_score": rows[0].max_score,
+        "answers": [
+            {
+                "question_id": row.question_id,
+                "question_text": row.text,
+                "answer_text": row.answer_text,
+                "selected_answer_ids": row.selected_answer_ids,
+                "is_correct": row.is_correct,
+                "points_awarded": row.points_awarded,
+            }
+            for row in rows
+            if row.text is not None  # no answers, or the question was deleted since
+        ],
+    }
+    if settings.fast_responses:
+        return FastJSONResponse(content)
+    return QuizAttemptResult(**content)
 
 @router.get("/attempts/{attempt_id}/correct-answers", response_model=List[CorrectAnswerInfo])
+@query_budget(1)
 async def get_correct_answers(
     attempt_id: int,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     user_id: int = Depends(get_current_user_id_from_cookie)
 ):
-    attempt = await session.get(QuizAttempt, attempt_id)
-    if not attempt or attempt.user_id != user_id:
-        raise HTTPException(status_code=403, detail="Access denied")
-
-    # Получаем вопросы
-    answers_result = await session.execute(
-        select(UserAnswer).where(UserAnswer.attempt_id == attempt_id)
-    )
-    answers = answers_result.scalars().all()
-    question_ids = [a.question_id for a in answers]
-
-    question_result = await session.execute(
-        select(Question).where(Question.id.in_(question_ids))
+    result = await session.execute(
+        select(Question.id, Question.text, Answer.text.label("answer_text"))
+        .select_from(QuizAttempt)
+        .outerjoin(UserAnswer, UserAnswer.attempt_id == QuizAttempt.id)
+        .outerjoin(Question, Question.id == UserAnswer.question_id)
+        .outerjoin(Answer, and_(Answer.question_id == Question.id, Answer.is_correct))
+        .where(QuizAttempt.id == attempt_id, QuizAttempt.user_id == user_id)
+        .order_by(Question.id, Answer.id)
     )
-    questions = {q.id: q for q in question_result.scalars().all()}
+    rows = result.all()
+    if not rows:
+        raise HTTPException(status_code=403, detail="Access denied")
 
-    answer_result = await session.execute(
-        select(Answer).where(Answer.question_id.in_(question_ids))
-    )
-    correct_answers_by_question: dict[int, list[str]] = {}
-    for a in answer_result.scalars().all():
-        if a.is_correct:
-            correct_answers_by_question.setdefault(a.question_id, []).append(a.text)
+    questions: dict[int, CorrectAnswerInfo] = {}
+    seen: set[tuple[int, str]] = set()
+    for row in rows:
+        if row.id is None:
+            continue
+        info = questions.setdefault(row.id, CorrectAnswerInfo(id=row.id, text=row.text, correct_answers=[]))
+        # a question answered twice in one attempt yields its answers twice
+        if row.answer_text is not None and (row.id, row.answer_text) not in seen:
+            seen.add((row.id, row.answer_text))
+            info.correct_answers.append(row.answer_text)
 
-    return [
-        CorrectAnswerInfo(
-            id=q.id,
-            text=q.text,
-            correct_answers=correct_answers_by_question.get(q.id, [])
-        )
-        for q in questions.values()
-    ]
+    return list(questions.values())
 
 @router.get("/rankings", response_model=List[UserRanking])
-async def get_user_rankings(session: AsyncSession = Depends(get_session)):
+@query_budget(1)
+async def get_user_rankings(session: AsyncSession = Depends(get_read_session)):
 
-    # подзапрос: лучший результат юзера по каждому квизу
-    subq = (
-        select(
-            QuizAttempt.user_id,
-            QuizAttempt.quiz_id,
-            func.max(QuizAttempt.score).label("best_score")
-        )
-        .group_by(QuizAttempt.user_id, QuizAttempt.quiz_id)
-        .subquery()
-    )
-
-    # основной запрос: суммируем лучшие результаты
+    # total_score ведётся при отправке попыток (см. attemptStore), читаем индекс;
+    # EXISTS оставляет в рейтинге только тех, кто проходил хотя бы один квиз
     stmt = (
-        select(
-            subq.c.user_id,
-            User.username,
-            func.sum(subq.c.best_score).label("total_score")
-        )
-        .join(User, User.id == subq.c.user_id)
-        .group_by(subq.c.user_id, User.username)
-        .order_by(func.sum(subq.c.best_score).desc())
+        select(User.id, User.username, User.total_score)
+        .where(select(UserQuizBest.user_id).where(UserQuizBest.user_id == User.id).exists())
+        .order_by(User.total_score.desc(), User.id)
         .limit(50)
     )
 
@@ -332,9 +252,130 @@ async def get_user_rankings(session: AsyncSession = Depends(get_session)):
 
     return [
         UserRanking(
-            user_id=row.user_id,
+            user_id=row.id,
             username=row.username,
             total_score=row.total_score
         )
         for row in result.all()
     ]
+
+
+async def _with_usernames(session: AsyncSession, entries: list[tuple[int, int, int]]) -> list[RankingEntry]:
+    if not entries:
+        return []
+    result = await session.execute(
+        select(User.id, User.username).where(User.id.in_([user_id for _, user_id, _ in entries]))
+    )
+    usernames = dict(result.tuples().all())
+    return [
+        RankingEntry(rank=rank, user_id=user_id, username=usernames.get(user_id, ""), score=score)
+        for rank, user_id, score in entries
+    ]
+
+
+@router.get("/rankings/me", response_model=MyRank)
+@query_budget(1)
+async def get_my_global_rank(
+    session: AsyncSession = Depends(get_read_session),
+    user_id: int = Depends(get_current_user_id_from_cookie)
+):
+    board = await leaderboard_cache.global_board()
+    position = board.rank(user_id)
+    if position is None:
+        raise HTTPException(status_code=404, detail="No attempts yet")
+    rank, score = position
+    return MyRank(rank=rank, score=score, participants=len(board))
+
+
+@router.get("/quiz/{quiz_id}/rankings", response_model=List[RankingEntry])
+@query_budget(3)
+async def get_quiz_rankings(
+    quiz_id: int,
+    limit: int = Query(50, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    session: AsyncSession = Depends(get_read_session)
+):
+    board = await leaderboard_cache.quiz_board(quiz_id)
+    if not len(board):
+        # an empty board is either an untried quiz or no quiz at all
+        quiz = await session.scalar(select(Quiz.id).where(Quiz.id == quiz_id))
+        if quiz is None:
+            raise HTTPException(status_code=404, detail="Quiz not found")
+    return await _with_usernames(session, board.top(limit, offset))
+
+
+@router.get("/quiz/{quiz_id}/rankings/me", response_model=MyRank)
+@query_budget(1)
+async def get_my_quiz_rank(
+    quiz_id: int,
+    session: AsyncSession = Depends(get_read_session),
+    user_id: int = Depends(get_current_user_id_from_cookie)
+):
+    board = await leaderboard_cache.quiz_board(quiz_id)
+    position = board.rank(user_id)
+    if position is None:
+        raise HTTPException(status_code=404, detail="No attempts on this quiz")
+    rank, score = position
+    return MyRank(rank=rank, score=score, participants=len(board))
+
+
+@router.get("/quiz/{quiz_id}/stats", response_model=QuizStatsRead)
+@query_budget(1)
+async def get_quiz_stats(
+    quiz_id: int,
+    session: AsyncSession = Depends(get_read_session),
+    user_id: int = Depends(get_current_user_id_from_cookie)
+):
+    # счётчики ведутся при отправке попыток: user_answers здесь не читается
+    rows = (await session.execute(
+        select(
+            Quiz.creator_id,
+            Question.id.label("question_id"), Question.text.label("question_text"), Question.type,
+            QuestionStats.answered, QuestionStats.correct,
+            Answer.id.label("answer_id"), Answer.text.label("answer_text"), Answer.is_correct,
+            AnswerOptionStats.picks,
+        )
+        .select_from(Quiz)
+        .outerjoin(Question, Question.quiz_id == Quiz.id)
+        .outerjoin(QuestionStats, QuestionStats.question_id == Question.id)
+        .outerjoin(Answer, Answer.question_id == Question.id)
+        .outerjoin(AnswerOptionStats, and_(
+            AnswerOptionStats.question_id == Question.id, AnswerOptionStats.answer_id == Answer.id
+        ))
+        .where(Quiz.id == quiz_id)
+        .order_by(Question.id, Answer.id)
+    )).all()
+    if not rows:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    if rows[0].creator_id != user_id:
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    questions: dict[int, QuestionStatsRead] = {}
+    for row in rows:
+        if row.question_id is None:
+            continue
+        question = questions.get(row.question_id)
+        if question is None:
+            answered, correct = row.answered or 0, row.correct or 0
+            question = questions[row.question_id] = QuestionStatsRead(
+                question_id=row.question_id,
+                text=row.question_text,
+                type=row.type.value,
+                answered=answered,
+                correct=correct,
+                correct_rate=round(correct / answered, 4) if answered else None,
+                most_chosen_wrong=None,
+                options=[],
+            )
+        if row.answer_id is None:
+            continue
+        option = AnswerOptionStatsRead(
+            answer_id=row.answer_id, text=row.answer_text, is_correct=row.is_correct, picks=row.picks or 0
+        )
+        question.options.append(option)
+        # при равенстве остаётся вариант с меньшим id
+        wrong = question.most_chosen_wrong
+        if not option.is_correct and option.picks and (wrong is None or option.picks > wrong.picks):
+            question.most_chosen_wrong = option
+
+    return QuizStatsRead(quiz_id=quiz_id, questions=list(questions.values()))
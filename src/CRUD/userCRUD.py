@@ -4,19 +4,22 @@ from datetime import timedelta, datetime, timezone
 from jose import JWTError, jwt
 from fastapi import HTTPException, Depends, APIRouter, Request, Response
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
-from src.DatabaseManager.queries import get_session
+from src.Config.settings import settings
+from src.Cache.tokenCache import token_cache, TokenClaims
+from src.DatabaseManager.queries import get_session, get_read_session
+from src.DatabaseManager.queryBudget import query_budget
 from src.Schemas.QuizShema import QuizRead
 from src.Schemas.UserSchema import RegisterUserSchema, LoginUserSchema, Token
 from src.Models.models import User, Quiz
-from passlib.context import CryptContext
+from src.Services.passwordHasher import password_hasher, PasswordHasherBusy
 from fastapi.security import OAuth2PasswordBearer
 
 router = APIRouter()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 # JWT SETTINGS
@@ -24,13 +27,28 @@ SECRET_KEY = "MY_SUPER_SECRET"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 COOKIE_NAME = "access_token"
+# v2 tokens carry the numeric user id in "uid"; older tokens only have "sub"
+TOKEN_VERSION = 2
 
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server is busy, try again shortly",
+        headers={"Retry-After": "1"},
+    )
+
+async def hash_password(password: str) -> str:
+    try:
+        return await password_hasher.hash(password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    try:
+        return await password_hasher.verify(plain_password, hashed_password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
 
 
 
@@ -44,7 +62,7 @@ async def update_user():
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "ver": TOKEN_VERSION})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
@@ -56,58 +74,105 @@ def decode_token(token: str):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
 
-async def get_current_user_from_cookie(request: Request):
+def get_token_from_cookie(request: Request) -> str:
     token = request.cookies.get(COOKIE_NAME)
     if not token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    return token
+
+
+async def get_current_user_from_cookie(request: Request):
+    token = get_token_from_cookie(request)
+    claims = token_cache.get(token)
+    if claims:
+        return claims.username
     payload = decode_token(token)
     return payload.get("sub")
 
-async def get_current_user_id_from_cookie(
+
+async def get_token_claims(
     request: Request,
-    session: AsyncSession = Depends(get_session)
-) -> int:
-    token = request.cookies.get(COOKIE_NAME)
-    if not token:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    session: AsyncSession = Depends(get_read_session)
+) -> TokenClaims:
+    token = get_token_from_cookie(request)
+    claims = token_cache.get(token)
+    if claims:
+        return claims
 
     payload = decode_token(token)
     username = payload.get("sub")
     if not username:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
 
-    result = await session.execute(select(User).where(User.username == username))
-    user = result.scalar_one_or_none()
+    user_id = payload.get("uid")
+    if payload.get("ver") != TOKEN_VERSION or user_id is None:
+        # token issued before ids were embedded: resolve it once, the cache keeps the answer
+        user_id = await session.scalar(select(User.id).where(User.username == username))
+        if user_id is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+    claims = TokenClaims(user_id=user_id, username=username, exp=int(payload["exp"]))
+    token_cache.put(token, claims)
+    return claims
+
+
+async def get_current_user_id_from_cookie(claims: TokenClaims = Depends(get_token_claims)) -> int:
+    return claims.user_id
+
+
+async def get_admin_claims(claims: TokenClaims = Depends(get_token_claims)) -> TokenClaims:
+    if claims.username not in settings.admin_usernames:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin only")
+    return claims
+
+
+async def get_current_user(
+    session: AsyncSession = Depends(get_read_session),
+    user_id: int = Depends(get_current_user_id_from_cookie)
+) -> User:
+    # only for endpoints that really need the row; the id alone comes from the token
+    user = await session.get(User, user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-
-    return user.id
+    return user
 
 @router.post("/register")
+@query_budget(2)
 async def register_user(data: RegisterUserSchema, session: AsyncSession = Depends(get_session)):
-    result = await session.execute(select(User).where(User.email == data.email))
-    if result.scalar_one_or_none():
+    existing_id = await session.scalar(select(User.id).where(User.email == data.email))
+    if existing_id is not None:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_password = pwd_context.hash(data.password)
+    # hand the pooled connection back while bcrypt runs
+    await session.close()
+    hashed_password = await hash_password(data.password)
     user = User(username=data.username, email=data.email, hashed_password=hashed_password)
     session.add(user)
-    await session.commit()
+    try:
+        await session.commit()
+    except IntegrityError as exc:
+        # a concurrent registration took the email (or the username) while bcrypt ran
+        await session.rollback()
+        if "users.username" in str(exc.orig):
+            raise HTTPException(status_code=400, detail="Username already taken")
+        raise HTTPException(status_code=400, detail="Email already registered")
     return {"message": "User registered"}
 
 @router.post("/login", response_model=Token)
+@query_budget(1)
 async def login_user(
     data: LoginUserSchema,
     response: Response,
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     result = await session.execute(select(User).where(User.username == data.username))
     user = result.scalar_one_or_none()
+    await session.close()
 
-    if not user or not pwd_context.verify(data.password, user.hashed_password):
+    if not user or not await verify_password(data.password, user.hashed_password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
-    token = create_access_token(data={"sub": user.username})
+    token = create_access_token(data={"sub": user.username, "uid": user.id})
     expire_duration = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
 
     response.set_cookie(
@@ -122,18 +187,23 @@ async def login_user(
 
 
 @router.get("/me")
+@query_budget(0)
 async def read_me(current_user: str = Depends(get_current_user_from_cookie)):
     return {"user": current_user}
 
 
 @router.get("/logout")
-async def logout(response: Response):
+async def logout(request: Request, response: Response):
+    token = request.cookies.get(COOKIE_NAME)
+    if token:
+        token_cache.discard(token)
     response.delete_cookie(COOKIE_NAME)
     return {"message": "Logged out"}
 
 @router.get("/quiz/my-quizzes", response_model=list[QuizRead])
+@query_budget(1)
 async def get_my_quizzes(
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     user_id: int = Depends(get_current_user_id_from_cookie)
 ):
     result = await session.execute(select(Quiz).where(Quiz.creator_id == user_id))
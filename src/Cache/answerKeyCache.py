@@ -0,0 +1,99 @@
+from dataclasses import dataclass
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.Cache.lru import LRUCache
+from src.Cache.versions import Version, quiz_key, read_versions
+from src.Config.settings import settings
+from src.Models.models import Quiz, Question, Answer
+
+
+@dataclass(frozen=True, slots=True)
+class GradingEntry:
+    type: str
+    points: int
+    text: str
+    correct_ids: frozenset[int]
+    option_ids: frozenset[int]
+
+
+@dataclass(frozen=True, slots=True)
+class AnswerKey:
+    quiz_id: int
+    version: Version
+    questions: dict[int, GradingEntry]
+
+
+class AnswerKeyCache:
+    """
+    Compiled grading tables per quiz: question id -> type, points, the set of
+    correct answer ids and the set of all its answer ids. Bounded by the
+    total number of cached questions.
+    Every lookup reads the quiz's persisted content version, which the
+    question/answer/quiz write routes bump in their transaction, so a key
+    compiled before a write on any worker is never used after it.
+    """
+
+    def __init__(self, max_questions: int):
+        self._entries: LRUCache[int, AnswerKey] = LRUCache(max_questions, weigh=lambda key: len(key.questions) + 1)
+
+    async def get(self, session: AsyncSession, quiz_id: int) -> AnswerKey | None:
+        """Returns None when the quiz does not exist."""
+        version, = await read_versions(session, quiz_key(quiz_id))
+        key = self._entries.get(quiz_id)
+        if key is not None and key.version == version:
+            return key
+
+        # read before the load: the key is at least as new as its version
+        key = await self._load(session, quiz_id, version)
+        if key is not None:
+            self._entries.put(quiz_id, key)
+        return key
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return self._entries.stats()
+
+    @staticmethod
+    async def _load(session: AsyncSession, quiz_id: int, version: Version) -> AnswerKey | None:
+        result = await session.execute(
+            select(Quiz.id, Question.id, Question.type, Question.points, Question.text, Answer.id, Answer.is_correct)
+            .select_from(Quiz)
+            .outerjoin(Question, Question.quiz_id == Quiz.id)
+            .outerjoin(Answer, Answer.question_id == Question.id)
+            .where(Quiz.id == quiz_id)
+        )
+        rows = result.all()
+        if not rows:
+            return None
+
+        meta: dict[int, tuple[str, int, str]] = {}
+        correct: dict[int, set[int]] = {}
+        options: dict[int, set[int]] = {}
+        for _, question_id, q_type, points, text, answer_id, is_correct in rows:
+            if question_id is None:
+                continue
+            meta[question_id] = (q_type.value, points, text)
+            correct.setdefault(question_id, set())
+            options.setdefault(question_id, set())
+            if answer_id is not None:
+                options[question_id].add(answer_id)
+            if is_correct:
+                correct[question_id].add(answer_id)
+
+        return AnswerKey(
+            quiz_id=quiz_id,
+            version=version,
+            questions={
+                question_id: GradingEntry(
+                    q_type, points, text, frozenset(correct[question_id]), frozenset(options[question_id])
+                )
+                for question_id, (q_type, points, text) in meta.items()
+            },
+        )
+
+
+answer_key_cache = AnswerKeyCache(settings.answer_key_cache_questions)
@@ -0,0 +1,34 @@
+from typing import Hashable
+
+from src.Cache.lru import LRUCache
+from src.Config.settings import settings
+
+
+class CountCache:
+    """
+    Catalog totals per catalog version and normalized filter, so a write on
+    any worker moves readers to fresh keys. Quiz and tag writes in this
+    process also call invalidate(); the generation check keeps a count
+    computed before a write from being stored after it.
+    """
+
+    def __init__(self, maxsize: int):
+        self._entries: LRUCache[Hashable, int] = LRUCache(maxsize)
+        self.generation = 0
+
+    def get(self, key: Hashable) -> int | None:
+        return self._entries.get(key)
+
+    def put(self, key: Hashable, total: int, generation: int) -> None:
+        if generation == self.generation:
+            self._entries.put(key, total)
+
+    def invalidate(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {**self._entries.stats(), "generation": self.generation}
+
+
+quiz_count_cache = CountCache(settings.count_cache_size)
@@ -0,0 +1,137 @@
+import asyncio
+import contextvars
+import time
+from typing import NamedTuple
+
+from sqlalchemy import Select, select
+
+from src.Cache.lru import LRUCache
+from src.Config.settings import settings
+from src.Models.models import User, UserQuizBest
+from src.Services.rankIndex import Leaderboard
+
+GLOBAL = None  # key of the global board in _loads / _missed
+
+
+class CachedBoard(NamedTuple):
+    board: Leaderboard
+    expires_at: float  # time.monotonic()
+
+
+class LeaderboardCache:
+    """
+    In-memory leaderboards: one per quiz, built lazily from user_quiz_best, and
+    a global one built from users.total_score. submit calls record() after its
+    commit to move loaded boards forward, one logarithmic update per score.
+    Per-quiz boards share an LRU bound on their total number of entries; the
+    global board stays resident.
+
+    Requests only wait for a board that is not loaded yet, and concurrent
+    callers share that one load. record() only sees this process's
+    submissions, so a board older than `ttl` seconds is reloaded too, but in
+    the background: requests keep reading the old board until the new one is
+    swapped in. Writes by other workers and by `leaderboard --rebuild` show
+    up within about that time.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self._quizzes: LRUCache[int, CachedBoard] = LRUCache(max_entries, weigh=lambda cached: len(cached.board) + 1)
+        self._global: CachedBoard | None = None
+        self.ttl = ttl
+        self.reloads = 0
+        self.generation = 0
+        # boards being loaded -> their one load, and the updates recorded
+        # meanwhile; those are replayed on the loaded board (raise_score is
+        # idempotent) so none fall in the gap
+        self._loads: dict[int | None, asyncio.Task] = {}
+        self._missed: dict[int | None, list[tuple[int, int]]] = {}
+
+    async def quiz_board(self, quiz_id: int) -> Leaderboard:
+        return await self._board(quiz_id, self._quizzes.get(quiz_id))
+
+    async def global_board(self) -> Leaderboard:
+        return await self._board(GLOBAL, self._global)
+
+    def record(self, quiz_bests: list[tuple[int, int, int]], totals: dict[int, int]) -> None:
+        """Applies committed (user_id, quiz_id, best_score) rows and new users.total_score values."""
+        for user_id, quiz_id, best in quiz_bests:
+            cached = self._quizzes.peek(quiz_id)
+            if cached is not None:
+                cached.board.raise_score(user_id, best)
+            if quiz_id in self._missed:
+                self._missed[quiz_id].append((user_id, best))
+        for user_id, total in totals.items():
+            if self._global is not None:
+                self._global.board.raise_score(user_id, total)
+            if GLOBAL in self._missed:
+                self._missed[GLOBAL].append((user_id, total))
+
+    def clear(self) -> None:
+        # loads still running finish for their callers but are not stored
+        self.generation += 1
+        self._quizzes.clear()
+        self._global = None
+        self._loads.clear()
+        self._missed.clear()
+
+    def stats(self) -> dict:
+        return {
+            **self._quizzes.stats(),
+            "global_entries": len(self._global.board) if self._global is not None else None,
+            "ttl_seconds": self.ttl,
+            "reloads": self.reloads,
+            "loading": len(self._loads),
+        }
+
+    async def _board(self, key: int | None, cached: CachedBoard | None) -> Leaderboard:
+        if cached is None:
+            load = self._loads.get(key) or self._start_load(key, contextvars.copy_context())
+            # shielded: a caller that goes away does not cancel the load the others wait for
+            return await asyncio.shield(load)
+        if cached.expires_at <= time.monotonic() and key not in self._loads:
+            self.reloads += 1
+            # an empty context: a refresh is not part of the request that noticed it
+            self._start_load(key, contextvars.Context())
+        return cached.board
+
+    def _start_load(self, key: int | None, context: contextvars.Context) -> asyncio.Task:
+        self._missed[key] = []
+        task = asyncio.get_running_loop().create_task(self._load(key, self.generation), context=context)
+        self._loads[key] = task
+        return task
+
+    async def _load(self, key: int | None, generation: int) -> Leaderboard:
+        # queries.py imports this module for /setup_database
+        from src.DatabaseManager.queries import new_read_session
+
+        try:
+            async with new_read_session() as session:
+                rows = (await session.execute(self._scores_query(key))).tuples().all()
+            # sorting a million users takes over a second: off the event loop
+            board = await asyncio.to_thread(lambda: Leaderboard(dict(rows)))
+            if generation == self.generation:
+                for user_id, score in self._missed[key]:
+                    board.raise_score(user_id, score)
+                cached = CachedBoard(board, time.monotonic() + self.ttl)
+                if key is GLOBAL:
+                    self._global = cached
+                else:
+                    self._quizzes.put(key, cached)
+            return board
+        finally:
+            if self._loads.get(key) is asyncio.current_task():
+                del self._loads[key]
+                del self._missed[key]
+
+    @staticmethod
+    def _scores_query(key: int | None) -> Select:
+        if key is GLOBAL:
+            # same population as GET /rankings: users with at least one attempt
+            return (
+                select(User.id, User.total_score)
+                .where(select(UserQuizBest.user_id).where(UserQuizBest.user_id == User.id).exists())
+            )
+        return select(UserQuizBest.user_id, UserQuizBest.best_score).where(UserQuizBest.quiz_id == key)
+
+
+leaderboard_cache = LeaderboardCache(settings.leaderboard_cache_entries, settings.leaderboard_refresh_s)
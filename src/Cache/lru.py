@@ -0,0 +1,83 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """
+    Bounded mapping that evicts the least recently used entry first.
+    With `weigh`, maxsize bounds the summed weight of the values instead of
+    their number.
+    """
+
+    def __init__(self, maxsize: int, weigh: Callable[[V], int] | None = None):
+        self.maxsize = maxsize
+        self._weigh = weigh
+        self._data: OrderedDict[K, V] = OrderedDict()
+        self._weights: dict[K, int] = {}
+        self.weight = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key: K) -> V | None:
+        """Lookup that neither refreshes recency nor counts as a hit or miss."""
+        with self._lock:
+            return self._data.get(key)
+
+    def put(self, key: K, value: V) -> None:
+        with self._lock:
+            self._discard(key)
+            self._data[key] = value
+            weight = self._weigh(value) if self._weigh else 1
+            self._weights[key] = weight
+            self.weight += weight
+            while self.weight > self.maxsize and len(self._data) > 1:
+                oldest = next(iter(self._data))
+                self._discard(oldest)
+                self.evictions += 1
+
+    def pop(self, key: K) -> V | None:
+        with self._lock:
+            return self._discard(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._weights.clear()
+            self.weight = 0
+
+    def _discard(self, key: K) -> V | None:
+        value = self._data.pop(key, None)
+        if value is not None:
+            self.weight -= self._weights.pop(key)
+        return value
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "weight": self.weight,
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
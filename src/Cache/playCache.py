@@ -0,0 +1,87 @@
+from typing import NamedTuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.Cache.lru import LRUCache
+from src.Config.settings import settings
+from src.Models.models import Quiz, Question, Answer
+from src.Services.serialization import render_json
+
+
+class PlayPayload(NamedTuple):
+    version: int
+    body: bytes
+
+
+class PlayCache:
+    """
+    Serialized GET /quiz/{id}/play bodies (quiz, questions and answer options
+    without is_correct), keyed by quiz id and checked against the quiz's
+    persisted content version. Bounded by the total size of the cached bodies.
+    """
+
+    def __init__(self, max_bytes: int):
+        self._entries: LRUCache[int, PlayPayload] = LRUCache(max_bytes, weigh=lambda payload: len(payload.body))
+
+    async def get(self, session: AsyncSession, quiz_id: int, version: int) -> bytes | None:
+        """Body for version counter `version` of the quiz; None when the quiz does not exist."""
+        payload = self._entries.get(quiz_id)
+        if payload is not None and payload.version == version:
+            return payload.body
+
+        body = await self._load(session, quiz_id)
+        # the version was read before the load, so the body is at least that
+        # new; never replace a newer entry with it
+        if body is not None and (payload is None or payload.version < version):
+            self._entries.put(quiz_id, PlayPayload(version, body))
+        return body
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return self._entries.stats()
+
+    @staticmethod
+    async def _load(session: AsyncSession, quiz_id: int) -> bytes | None:
+        result = await session.execute(
+            select(
+                Quiz.title, Quiz.description, Quiz.creator_id,
+                Question.id, Question.text, Question.type, Question.points,
+                Answer.id, Answer.text,
+            )
+            .select_from(Quiz)
+            .outerjoin(Question, Question.quiz_id == Quiz.id)
+            .outerjoin(Answer, Answer.question_id == Question.id)
+            .where(Quiz.id == quiz_id)
+            .order_by(Question.id, Answer.id)
+        )
+        rows = result.all()
+        if not rows:
+            return None
+
+        title, description, creator_id = rows[0][:3]
+        questions: dict[int, dict] = {}
+        for *_, question_id, question_text, q_type, points, answer_id, answer_text in rows:
+            if question_id is None:
+                continue
+            question = questions.get(question_id)
+            if question is None:
+                question = questions[question_id] = {
+                    "id": question_id, "text": question_text, "type": q_type.value, "points": points, "answers": [],
+                }
+            if answer_id is not None:
+                question["answers"].append({"id": answer_id, "text": answer_text})
+
+        payload = {
+            "id": quiz_id,
+            "title": title,
+            "description": description,
+            "creator_id": creator_id,
+            "questions": list(questions.values()),
+        }
+        return render_json(payload)
+
+
+play_cache = PlayCache(settings.play_cache_bytes)
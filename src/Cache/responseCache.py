@@ -0,0 +1,62 @@
+import time
+from typing import Hashable, NamedTuple
+
+from src.Cache.lru import LRUCache
+from src.Config.settings import settings
+
+
+class CachedBody(NamedTuple):
+    body: bytes
+    expires_at: float
+
+
+class ResponseCache:
+    """
+    Serialized JSON bodies of the catalog reads (GET /quizzes, GET
+    /tags/search) keyed by route and normalized query parameters. Entries
+    expire after `ttl` seconds and the LRU is bounded by the total body size.
+
+    Both routes only change when quizzes, tag links or tag names do, so their
+    keys carry the persisted catalog version: a write on any worker moves
+    readers to fresh keys. The routes that write in this process also call
+    invalidate() to free the old bodies. As in CountCache, put() takes the
+    generation read before the query, so a body computed before a write is
+    never stored after it.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self._entries: LRUCache[Hashable, CachedBody] = LRUCache(max_bytes, weigh=lambda entry: len(entry.body))
+        self.ttl = ttl
+        self.generation = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._entries.pop(key)
+            self.expirations += 1
+            return None
+        return entry.body
+
+    def put(self, key: Hashable, body: bytes, generation: int) -> None:
+        if generation == self.generation:
+            self._entries.put(key, CachedBody(body, time.monotonic() + self.ttl))
+
+    def invalidate(self) -> None:
+        self.generation += 1
+        self.invalidations += 1
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            **self._entries.stats(),
+            "ttl_seconds": self.ttl,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+response_cache = ResponseCache(settings.response_cache_bytes, settings.response_cache_ttl_s)
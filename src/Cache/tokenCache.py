@@ -0,0 +1,43 @@
+import time
+from typing import NamedTuple
+
+from src.Cache.lru import LRUCache
+from src.Config.settings import settings
+
+
+class TokenClaims(NamedTuple):
+    user_id: int
+    username: str
+    exp: int
+
+
+class TokenCache:
+    """
+    Remembers tokens whose signature has already been verified, so repeat
+    requests skip both jwt.decode and the user lookup. Entries are dropped
+    once the token's own `exp` has passed.
+    """
+
+    def __init__(self, maxsize: int):
+        self._entries: LRUCache[str, TokenClaims] = LRUCache(maxsize)
+
+    def get(self, token: str) -> TokenClaims | None:
+        claims = self._entries.get(token)
+        if claims is None:
+            return None
+        if claims.exp <= time.time():
+            self._entries.pop(token)
+            return None
+        return claims
+
+    def put(self, token: str, claims: TokenClaims) -> None:
+        self._entries.put(token, claims)
+
+    def discard(self, token: str) -> None:
+        self._entries.pop(token)
+
+    def stats(self) -> dict:
+        return self._entries.stats()
+
+
+token_cache = TokenCache(settings.token_cache_size)
@@ -0,0 +1,118 @@
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from typing import NamedTuple
+
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.Models.models import ContentVersion
+
+# Version counters for cached and conditional reads, stored in the
+# content_versions table so every worker (and the CLI tools) sees the same
+# ones. Write routes bump what they changed inside their own transaction:
+#
+#   quiz_key(id)   the quiz row, its questions, answers and tag links
+#   TAGS           the tag table (new or renamed tags)
+#   CATALOG        anything GET /quizzes can show: quiz rows, tag links, tag names
+#
+# Readers take the version before loading, so a payload is never labelled
+# with a version newer than its content.
+#
+# A 304 therefore still costs a pooled read session and one primary-key
+# SELECT of this table. That is deliberate: an in-process map bumped by the
+# write paths would only see this worker's writes and would answer 304 for
+# content another worker has changed.
+
+CATALOG = "catalog"
+TAGS = "tags"
+
+versions_table = ContentVersion.__table__
+
+
+def quiz_key(quiz_id: int) -> str:
+    return f"quiz:{quiz_id}"
+
+
+class Version(NamedTuple):
+    counter: int
+    modified: float  # unix time of the last bump, 0.0 before the first one
+
+
+NEVER_BUMPED = Version(0, 0.0)
+
+
+async def read_versions(session: AsyncSession, *keys: str) -> list[Version]:
+    """One SELECT for all `keys`, in the order given."""
+    result = await session.execute(
+        select(versions_table.c.key, versions_table.c.counter, versions_table.c.modified)
+        .where(versions_table.c.key.in_(keys))
+    )
+    stored = {key: Version(counter, modified) for key, counter, modified in result}
+    return [stored.get(key, NEVER_BUMPED) for key in keys]
+
+
+async def bump_versions(session: AsyncSession, *keys: str) -> None:
+    """One upsert for all `keys`; commits (or rolls back) with the caller's write."""
+    now = time.time()
+    upsert = sqlite_insert(versions_table).values([
+        {"key": key, "counter": 1, "modified": now} for key in dict.fromkeys(keys)
+    ])
+    await session.execute(upsert.on_conflict_do_update(
+        index_elements=[versions_table.c.key],
+        set_={"counter": versions_table.c.counter + 1, "modified": upsert.excluded.modified},
+    ))
+
+
+def etag(label: str, *versions: Version) -> str:
+    # the bump time tells apart counters that restarted after /setup_database
+    return f'"{label}-{".".join(f"{v.counter}:{int(v.modified * 1000)}" for v in versions)}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match uses the weak comparison: W/ prefixes are ignored."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
+
+
+def _not_modified_since(if_modified_since: str | None, modified: float) -> bool:
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+    return bool(modified) and int(modified) <= since
+
+
+def conditional_response(request: Request, response: Response, etag: str, *versions: Version) -> Response | None:
+    """
+    Validators for a read route. Returns a bodiless 304 when the client's
+    copy is current; otherwise puts ETag/Last-Modified on `response` (the
+    route's injected Response) and returns None.
+
+    If-None-Match wins over If-Modified-Since. Last-Modified has one-second
+    resolution, so it is only sent once the second of the last write is
+    over; a later write in that same second would otherwise carry the same
+    date and be answered with a 304. Content whose versions were never
+    bumped has no modification time, hence no Last-Modified either.
+    """
+    modified = max(version.modified for version in versions)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if modified and int(modified) < int(time.time()):
+        headers["Last-Modified"] = formatdate(int(modified), usegmt=True)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        fresh = etag_matches(if_none_match, etag)
+    else:
+        fresh = _not_modified_since(request.headers.get("if-modified-since"), modified)
+    if fresh:
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return None
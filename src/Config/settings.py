@@ -0,0 +1,69 @@
+from typing import Literal
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+    database_url: str = "sqlite+aiosqlite:///questions.db"
+    # one writer connection plus a pool of read-only ones for GET routes
+    db_split_read_write: bool = True
+    db_read_pool_size: int = 8
+    # sqlite engine profile, applied to every new connection
+    sqlite_journal_mode: Literal["WAL", "DELETE", "TRUNCATE", "PERSIST", "MEMORY", "OFF"] = "WAL"
+    sqlite_synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5_000
+    sqlite_cache_size_kib: int = 65_536
+    sqlite_mmap_size: int = 268_435_456
+
+    # auth
+    token_cache_size: int = 10_000
+    # users allowed on the admin routes (e.g. /export/attempts); JSON list in the env
+    admin_usernames: list[str] = []
+    # bcrypt pool: running jobs plus at most `password_hash_queue` waiting ones
+    password_hash_workers: int = 4
+    password_hash_queue: int = 64
+
+    # catalog
+    count_cache_size: int = 1_000
+    # serialized GET /quizzes and /tags/search bodies: LRU bound on their total size, and a TTL
+    response_cache_bytes: int = 16 * 1024 * 1024
+    response_cache_ttl_s: float = 60.0
+    # searches whose words occur in more quizzes than this (summed over the
+    # words) are listed in quiz id order instead of by bm25, which reads all
+    # of them first
+    search_rank_max_postings: int = 20_000
+
+    # attempts: LRU bound on the total number of questions in compiled answer keys
+    answer_key_cache_questions: int = 50_000
+    # LRU bound on the total number of users across cached per-quiz leaderboards
+    leaderboard_cache_entries: int = 1_000_000
+    # loaded leaderboards are reloaded after this long: other workers and the
+    # leaderboard --rebuild CLI write the same tables
+    leaderboard_refresh_s: float = 30.0
+    # group commit: submissions queued within the window share one transaction;
+    # attempt_batch_max=0 commits every submission on its own
+    attempt_batch_max: int = 64
+    attempt_batch_window_ms: float = 2.0
+    # rows per keyset chunk of GET /export/attempts; each chunk is one short read
+    export_chunk_rows: int = 1_000
+
+    # LRU bound on the total size of cached GET /quiz/{id}/play bodies
+    play_cache_bytes: int = 32 * 1024 * 1024
+    # hot read routes select plain columns and encode them directly (orjson when
+    # installed) instead of going through ORM objects and response_model
+    fast_responses: bool = False
+
+    # per-route request, latency and SQL metrics, served at /metrics
+    metrics_enabled: bool = True
+    # statements at least this slow are kept, with their query plan, in a ring
+    # buffer (GET /slow-queries) and a size-rotated JSON-lines file; 0 disables
+    slow_query_ms: float = 100.0
+    slow_query_buffer: int = 200
+    slow_query_log_path: str = "slow_queries.log"
+    slow_query_log_bytes: int = 10 * 1024 * 1024
+    slow_query_log_backups: int = 3
+
+
+settings = Settings()
@@ -0,0 +1,18 @@
+from sqlalchemy import Table, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def insert_returning_ids(session: AsyncSession, table: Table, rows: list[dict]) -> list[int]:
+    """
+    Bulk-inserts `rows` and returns their new ids in input order.
+
+    SQLAlchemy can only honour RETURNING(..., sort_by_parameter_order=True) on
+    SQLite by falling back to one INSERT per row. SQLite does assign rowids
+    to the rows of a multi-row INSERT in VALUES order, though; only the order
+    of the RETURNING output is unspecified. So the rows go out as multi-row
+    INSERTs and the returned ids are sorted instead.
+    """
+    if not rows:
+        return []
+    result = await session.execute(insert(table).returning(table.c.id), rows)
+    return sorted(result.scalars())
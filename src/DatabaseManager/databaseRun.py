@@ -1,8 +1,14 @@
-from sqlalchemy.connectors import asyncio
+import asyncio
+
+from src.DatabaseManager.migrations import upgrade
+from src.DatabaseManager.queries import engine
 
 
 async def init_db():
-    ...
+    async with engine.begin() as conn:
+        applied = await conn.run_sync(upgrade)
+    return applied
+
 
-# if __name__ == "__main__":
-# asyncio.run(init_db())
\ No newline at end of file
+if __name__ == "__main__":
+    print(asyncio.run(init_db()) or "schema is up to date")
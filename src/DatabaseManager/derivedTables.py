@@ -0,0 +1,45 @@
+"""
+The shared part of the consistency checks for tables maintained
+incrementally from others (leaderboard.py, questionStats.py): recompute
+with SQL, diff against what is stored, optionally rebuild first, and exit 1
+on drift. Each module supplies only its queries.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from typing import Callable
+
+from sqlalchemy.engine import Connection
+
+
+def check_drift(conn: Connection, queries: dict[str, str], sample: int = 10) -> dict:
+    """Runs each drift query; counts and samples the rows it returns. All zeros means consistent."""
+    report = {}
+    for name, query in queries.items():
+        rows = conn.exec_driver_sql(query).all()
+        report[name] = {"count": len(rows), "sample": [list(row) for row in rows[:sample]]}
+    return report
+
+
+async def _run(rebuild: Callable[[Connection], None], check: Callable[[Connection], dict], do_rebuild: bool) -> dict:
+    from src.DatabaseManager.queries import engine
+
+    async with engine.begin() as conn:
+        if do_rebuild:
+            await conn.run_sync(rebuild)
+        report = await conn.run_sync(check)
+    await engine.dispose()
+    return report
+
+
+def main(description: str, rebuild: Callable[[Connection], None], check: Callable[[Connection], dict]) -> None:
+    """The command line of a check module: prints the report, exits 1 if anything drifted."""
+    parser = argparse.ArgumentParser(description=description, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rebuild", action="store_true")
+    args = parser.parse_args()
+
+    report = asyncio.run(_run(rebuild, check, args.rebuild))
+    print(json.dumps(report, indent=2))
+    if any(part["count"] for part in report.values()):
+        sys.exit(1)
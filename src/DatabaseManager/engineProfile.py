@@ -0,0 +1,56 @@
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from src.Config.settings import Settings
+
+
+def sqlite_pragmas(settings: Settings, read_only: bool = False) -> list[str]:
+    pragmas = [
+        f"PRAGMA journal_mode = {settings.sqlite_journal_mode}",
+        f"PRAGMA synchronous = {settings.sqlite_synchronous}",
+        f"PRAGMA busy_timeout = {int(settings.sqlite_busy_timeout_ms)}",
+        # negative cache_size is in KiB rather than pages
+        f"PRAGMA cache_size = -{int(settings.sqlite_cache_size_kib)}",
+        f"PRAGMA mmap_size = {int(settings.sqlite_mmap_size)}",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    return pragmas
+
+
+def apply_sqlite_profile(engine: AsyncEngine, settings: Settings, read_only: bool = False) -> None:
+    """Runs the profile's PRAGMAs on every new DBAPI connection of `engine`."""
+    if engine.dialect.name != "sqlite":
+        return
+    pragmas = sqlite_pragmas(settings, read_only)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, _record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def create_engines(settings: Settings) -> tuple[AsyncEngine, AsyncEngine]:
+    """
+    (writer, reader) engines. SQLite takes one writer at a time, so mutations
+    queue on a single pooled connection inside the process instead of fighting
+    over the file lock; in WAL mode GET routes read from their own pool of
+    query_only connections without waiting for that writer. With
+    db_split_read_write off both names point at one default-pooled engine.
+    """
+    if not settings.db_split_read_write:
+        engine = create_async_engine(settings.database_url, echo=False)
+        apply_sqlite_profile(engine, settings)
+        return engine, engine
+
+    writer = create_async_engine(settings.database_url, echo=False, pool_size=1, max_overflow=0)
+    reader = create_async_engine(
+        settings.database_url, echo=False, pool_size=settings.db_read_pool_size, max_overflow=0
+    )
+    apply_sqlite_profile(writer, settings)
+    apply_sqlite_profile(reader, settings, read_only=True)
+    return writer, reader
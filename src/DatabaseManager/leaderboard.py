@@ -0,0 +1,47 @@
+"""
+Consistency check for the incrementally maintained leaderboard:
+user_quiz_best must hold max(score) per (user, quiz) over quiz_attempts, and
+users.total_score the sum of a user's bests.
+
+    python -m src.DatabaseManager.leaderboard            # report drift, exit 1 if any
+    python -m src.DatabaseManager.leaderboard --rebuild  # recompute both from quiz_attempts
+"""
+from sqlalchemy.engine import Connection
+
+from src.DatabaseManager import derivedTables
+
+_BESTS_FROM_ATTEMPTS = "SELECT user_id, quiz_id, max(score) FROM quiz_attempts GROUP BY user_id, quiz_id"
+_BESTS_STORED = "SELECT user_id, quiz_id, best_score FROM user_quiz_best"
+_TOTAL_OF_USER = "coalesce((SELECT sum(b.best_score) FROM user_quiz_best b WHERE b.user_id = users.id), 0)"
+
+REBUILD_STATEMENTS = [
+    "DELETE FROM user_quiz_best",
+    f"INSERT INTO user_quiz_best (user_id, quiz_id, best_score) {_BESTS_FROM_ATTEMPTS}",
+    f"UPDATE users SET total_score = {_TOTAL_OF_USER}",
+]
+
+
+def rebuild_leaderboard(conn: Connection) -> None:
+    for statement in REBUILD_STATEMENTS:
+        conn.exec_driver_sql(statement)
+
+
+def check_leaderboard(conn: Connection, sample: int = 10) -> dict:
+    """Counts (and samples) rows that disagree with quiz_attempts. All zeros means consistent."""
+    return derivedTables.check_drift(conn, {
+        # missing or wrong best_score
+        "bests_missing": f"{_BESTS_FROM_ATTEMPTS} EXCEPT {_BESTS_STORED}",
+        # bests with no attempt behind them
+        "bests_stale": f"{_BESTS_STORED} EXCEPT {_BESTS_FROM_ATTEMPTS}",
+        "totals_wrong": (
+            f"SELECT id, total_score, {_TOTAL_OF_USER} FROM users WHERE total_score != {_TOTAL_OF_USER}"
+        ),
+    }, sample)
+
+
+def main():
+    derivedTables.main(__doc__, rebuild_leaderboard, check_leaderboard)
+
+
+if __name__ == "__main__":
+    main()
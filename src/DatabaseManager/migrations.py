@@ -0,0 +1,245 @@
+from typing import Callable
+
+from sqlalchemy import inspect, select, update, bindparam
+from sqlalchemy.engine import Connection
+
+from src.Cache.answerKeyCache import GradingEntry
+from src.DatabaseManager import leaderboard, questionStats, search
+from src.Models.models import Base, Question, Answer, UserAnswer
+from src.Services.grading import is_answer_correct
+
+# Versioned schema changes for databases that already hold data. The applied
+# version lives in SQLite's PRAGMA user_version. Fresh databases are built with
+# create_all() and stamped with the latest version directly.
+#
+# Append new steps at the end; never edit or reorder one that has shipped.
+
+
+def _add_search_index(conn: Connection) -> None:
+    search.create_search_index(conn)
+    search.rebuild_search_index(conn)
+
+
+def _add_column(conn: Connection, table: str, column_ddl: str) -> None:
+    name = column_ddl.split()[0]
+    if name not in {column["name"] for column in inspect(conn).get_columns(table)}:
+        conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column_ddl}")
+
+
+BACKFILL_CHUNK = 5_000
+
+
+def _store_grading_results(conn: Connection) -> None:
+    _add_column(conn, "user_answers", "is_correct BOOLEAN NOT NULL DEFAULT 0")
+    _add_column(conn, "user_answers", "points_awarded INTEGER NOT NULL DEFAULT 0")
+    _add_column(conn, "quiz_attempts", "max_score INTEGER NOT NULL DEFAULT 0")
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_user_answers_attempt_id ON user_answers (attempt_id)")
+
+    # grade existing answers against today's answer key, exactly as the old
+    # read path did on every request
+    entries: dict[int, GradingEntry] = {}
+    correct: dict[int, set[int]] = {}
+    options: dict[int, set[int]] = {}
+    for answer_id, question_id, is_correct in conn.execute(
+        select(Answer.id, Answer.question_id, Answer.is_correct)
+    ):
+        options.setdefault(question_id, set()).add(answer_id)
+        if is_correct:
+            correct.setdefault(question_id, set()).add(answer_id)
+    for question_id, q_type, points, text in conn.execute(
+        select(Question.id, Question.type, Question.points, Question.text)
+    ):
+        entries[question_id] = GradingEntry(
+            q_type.value, points, text,
+            frozenset(correct.get(question_id, ())), frozenset(options.get(question_id, ())),
+        )
+
+    table = UserAnswer.__table__
+    set_result = (
+        update(table)
+        .where(table.c.id == bindparam("row_id"))
+        .values(is_correct=bindparam("correct"), points_awarded=bindparam("points"))
+    )
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            select(table.c.id, table.c.question_id, table.c.selected_answer_ids)
+            .where(table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(BACKFILL_CHUNK)
+        ).all()
+        if not rows:
+            break
+        params = []
+        for row_id, question_id, selected_ids in rows:
+            entry = entries.get(question_id)
+            is_correct = entry is not None and is_answer_correct(entry, selected_ids or [])
+            params.append({"row_id": row_id, "correct": is_correct, "points": entry.points if is_correct else 0})
+        conn.execute(set_result, params)
+        last_id = rows[-1][0]
+
+    # the old read path reported the points of every question answered
+    conn.exec_driver_sql(
+        """UPDATE quiz_attempts SET max_score = (
+            SELECT coalesce(sum(q.points), 0) FROM questions q
+            WHERE q.id IN (SELECT ua.question_id FROM user_answers ua WHERE ua.attempt_id = quiz_attempts.id)
+        )"""
+    )
+
+
+def _add_leaderboard(conn: Connection) -> None:
+    Base.metadata.tables["user_quiz_best"].create(conn, checkfirst=True)
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_users_total_score ON users (total_score)")
+    leaderboard.rebuild_leaderboard(conn)
+
+
+def _add_lookup_indexes(conn: Connection) -> None:
+    # names match what create_all() generates for the models, so fresh and
+    # migrated databases end up with the same schema
+    for table in ("questions", "answers", "quizzes", "quiz_tags", "quiz_attempts", "user_quiz_best"):
+        for index in Base.metadata.tables[table].indexes:
+            index.create(conn, checkfirst=True)
+
+
+def _add_attempt_timestamps(conn: Connection) -> None:
+    # SQLite cannot ADD COLUMN with a CURRENT_TIMESTAMP default; new rows get
+    # the time from the model default, older ones stay NULL
+    _add_column(conn, "quiz_attempts", "created_at DATETIME")
+
+
+def _add_question_stats(conn: Connection) -> None:
+    for table in ("question_stats", "answer_option_stats"):
+        Base.metadata.tables[table].create(conn, checkfirst=True)
+    questionStats.rebuild_question_stats(conn)
+
+
+def _rebuild_table(conn: Connection, name: str, columns: tuple[str, ...], ddl: str, indexes: tuple[str, ...]) -> None:
+    """SQLite cannot alter a table's primary key in place: copy it into a fresh one."""
+    conn.exec_driver_sql(f"CREATE TABLE {name}_rebuilt ({ddl})")
+    listed = ", ".join(columns)
+    conn.exec_driver_sql(f"INSERT INTO {name}_rebuilt ({listed}) SELECT {listed} FROM {name}")
+    # takes the table's indexes and triggers with it
+    conn.exec_driver_sql(f"DROP TABLE {name}")
+    conn.exec_driver_sql(f"ALTER TABLE {name}_rebuilt RENAME TO {name}")
+    for index in indexes:
+        conn.exec_driver_sql(index)
+
+
+# The three tables as they stood when this step shipped, not as the models
+# describe them today: steps added later bring them up from here.
+_AUTOINCREMENT_TABLES = {
+    "answers": (
+        ("id", "question_id", "text", "is_correct"),
+        """id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+        question_id INTEGER NOT NULL,
+        text VARCHAR NOT NULL,
+        is_correct BOOLEAN NOT NULL,
+        FOREIGN KEY(question_id) REFERENCES questions (id)""",
+        ("CREATE INDEX ix_answers_question_id ON answers (question_id)",),
+    ),
+    "questions": (
+        ("id", "quiz_id", "text", "type", "points"),
+        """id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+        quiz_id INTEGER NOT NULL,
+        text VARCHAR NOT NULL,
+        type VARCHAR(8) NOT NULL,
+        points INTEGER NOT NULL,
+        FOREIGN KEY(quiz_id) REFERENCES quizzes (id)""",
+        ("CREATE INDEX ix_questions_quiz_id ON questions (quiz_id)",),
+    ),
+    "quizzes": (
+        ("id", "title", "description", "creator_id"),
+        """id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+        title VARCHAR(200) NOT NULL,
+        description VARCHAR,
+        creator_id INTEGER NOT NULL,
+        FOREIGN KEY(creator_id) REFERENCES users (id)""",
+        (
+            "CREATE INDEX ix_quizzes_creator_id ON quizzes (creator_id)",
+            "CREATE INDEX ix_quizzes_title ON quizzes (title)",
+        ),
+    ),
+}
+
+
+def _never_reuse_ids(conn: Connection) -> None:
+    # The copy seeds sqlite_sequence with today's max(id); ids above it that
+    # were deleted before this migration can still come back once.
+    for name, (columns, ddl, indexes) in _AUTOINCREMENT_TABLES.items():
+        _rebuild_table(conn, name, columns, ddl, indexes)
+    # the quizzes triggers went with the old table
+    search.create_search_index(conn)
+
+
+def _drop_dead_counters(conn: Connection) -> None:
+    for index in Base.metadata.tables["answer_option_stats"].indexes:
+        index.create(conn, checkfirst=True)
+    # forgets counters of deleted questions and options, and picks of ids
+    # that were never options of the question
+    questionStats.rebuild_question_stats(conn)
+
+
+def _add_content_versions(conn: Connection) -> None:
+    # starts empty: every quiz, the tag table and the catalog read as never bumped
+    Base.metadata.tables["content_versions"].create(conn, checkfirst=True)
+
+
+def _add_search_prefixes(conn: Connection) -> None:
+    # fts5 options are fixed at CREATE time; the triggers on quizzes and tags
+    # stay and write to the new table
+    conn.exec_driver_sql(f"DROP TABLE IF EXISTS {search.VOCAB_TABLE}")
+    conn.exec_driver_sql(f"DROP TABLE {search.SEARCH_TABLE}")
+    search.create_search_index(conn)
+    search.rebuild_search_index(conn)
+
+
+MIGRATIONS: list[tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "fts5 quiz search index", _add_search_index),
+    (2, "store grading results per answer and attempt max_score", _store_grading_results),
+    (3, "user_quiz_best leaderboard and users.total_score index", _add_leaderboard),
+    (4, "indexes for per-quiz, per-question, per-creator and per-tag lookups", _add_lookup_indexes),
+    (5, "quiz_attempts.created_at", _add_attempt_timestamps),
+    (6, "question_stats and answer_option_stats counters", _add_question_stats),
+    (7, "AUTOINCREMENT ids for quizzes, questions and answers", _never_reuse_ids),
+    (8, "question counters for live questions and options only", _drop_dead_counters),
+    (9, "content_versions shared by all workers", _add_content_versions),
+    (10, "prefix indexes and term counts for the quiz search", _add_search_prefixes),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_version(conn: Connection) -> int:
+    return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def _set_version(conn: Connection, version: int) -> None:
+    conn.exec_driver_sql(f"PRAGMA user_version = {int(version)}")
+
+
+def upgrade(conn: Connection) -> list[str]:
+    """
+    Brings the schema up to LATEST_VERSION and returns the applied step names.
+    Runs under BEGIN IMMEDIATE so concurrently starting workers take turns.
+    """
+    conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    if not inspect(conn).has_table("quizzes"):
+        Base.metadata.create_all(conn)
+        _set_version(conn, LATEST_VERSION)
+        return ["create_all"]
+
+    current = get_version(conn)
+    applied = []
+    for version, name, step in MIGRATIONS:
+        if version > current:
+            step(conn)
+            _set_version(conn, version)
+            applied.append(name)
+    return applied
+
+
+def reset(conn: Connection) -> None:
+    """Drops everything and recreates the latest schema (used by /setup_database)."""
+    Base.metadata.drop_all(conn)
+    upgrade(conn)
@@ -0,0 +1,207 @@
+"""
+Query-plan regression check. Drives every CRUD route through the ASGI app on
+a throwaway database, records each SQL statement with the route that issued
+it, and runs EXPLAIN QUERY PLAN on all of them. A full `SCAN <table>` of a
+real table that is not listed in ALLOWED_SCANS is a failure:
+
+    python -m src.DatabaseManager.planCheck            # exit 1 on unexpected scans
+    python -m src.DatabaseManager.planCheck --verbose  # print every plan
+
+Ordered walks of an index ("SCAN t USING [COVERING] INDEX ...", e.g. a
+top-N by an indexed column) are not full scans and pass.
+"""
+import argparse
+import asyncio
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# (route, table) -> why scanning the whole table is the point of the query
+ALLOWED_SCANS: dict[tuple[str, str], str] = {
+    ("GET /tags", "tags"): "lists every tag",
+    ("GET /quizzes", "quizzes"): "unfiltered catalog count (cached per filter)",
+    ("GET /tags/search", "tags"): "prefix match on lower(name) cannot use the unique index",
+}
+
+_STATEMENT = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+_SCAN = re.compile(r"^SCAN (\w+)(.*)$")
+_ALIAS_SUFFIX = re.compile(r"_\d+$")
+
+_route: ContextVar[str | None] = ContextVar("plan_check_route", default=None)
+
+
+async def drive_routes(client, call) -> None:
+    """One pass over the API; `call(method, template, **kwargs)` labels each request."""
+    await call("POST", "/register", json={"username": "alice", "email": "a@x.io", "password": "password1"})
+    await call("POST", "/register", json={"username": "bob", "email": "b@x.io", "password": "password1"})
+    await call("POST", "/login", json={"username": "alice", "password": "password1"})
+    await call("GET", "/me")
+    quiz_id = (await call("POST", "/quiz/create", json={"title": "Space facts", "description": "Planets"})).json()["quiz_id"]
+    await call("POST", "/quiz/create", json={"title": "Cell biology", "description": "Mitochondria"})
+    q1 = (await call("POST", "/question", json={"text": "Biggest planet?", "type": "single", "points": 5, "quiz_id": quiz_id})).json()["id"]
+    q2 = (await call("POST", "/question", json={"text": "Gas giants?", "type": "multiple", "points": 3, "quiz_id": quiz_id})).json()["id"]
+    a1 = (await call("POST", "/answers", json={"text": "Jupiter", "is_correct": True, "question_id": q1})).json()["id"]
+    a2 = (await call("POST", "/answers", json={"text": "Mars", "is_correct": False, "question_id": q1})).json()["id"]
+    b1 = (await call("POST", "/answers", json={"text": "Saturn", "is_correct": True, "question_id": q2})).json()["id"]
+    await call("PATCH", "/answers/{answer_id}", answer_id=a2, json={"text": "Mars!", "is_correct": False})
+    tag_id = (await call("POST", "/tags", json={"name": "astronomy"})).json()["id"]
+    await call("POST", "/quiz/{quiz_id}/add-tag", quiz_id=quiz_id, json={"name": "science"})
+    await call("PATCH", "/tags/{tag_id}", tag_id=tag_id, json={"name": "astro"})
+    await call("GET", "/tags")
+    await call("GET", "/quiz/{quiz_id}/tags", quiz_id=quiz_id)
+    await call("GET", "/tags/search", params={"query": "sci"})
+    page = (await call("GET", "/quizzes", params={"limit": 1})).json()
+    await call("GET", "/quizzes", params={"limit": 1, "after": page["next_cursor"]})
+    await call("GET", "/quizzes", params={"search": "space", "highlight": True})
+    await call("GET", "/quizzes", params={"tag": "science"})
+    await call("GET", "/quiz/{quiz_id}", quiz_id=quiz_id)
+    await call("PATCH", "/quiz/{quiz_id}", quiz_id=quiz_id, json={"title": "Space facts!", "description": "Planets"})
+    await call("GET", "/quiz/my-quizzes")
+    await call("GET", "/quiz/{quiz_id}/questions", quiz_id=quiz_id)
+    await call("GET", "/quiz/{quiz_id}/play", quiz_id=quiz_id)
+    await call("GET", "/question/{question_id}", question_id=q1)
+    await call("PATCH", "/question/{question_id}", question_id=q1, json={"text": "Largest planet?", "type": "single", "points": 5})
+    await call("GET", "/question/{question_id}/answers", question_id=q1)
+    await call("GET", "/answers/{answer_id}", answer_id=a1)
+    answers = [{"question_id": q1, "selected_answer_ids": [a1]}, {"question_id": q2, "selected_answer_ids": [b1]}]
+    attempt_id = (await call("POST", "/quiz/{quiz_id}/attempt", quiz_id=quiz_id, json={"answers": answers})).json()["attempt_id"]
+    await call("POST", "/quiz/{quiz_id}/attempt", quiz_id=quiz_id, json={"answers": answers[:1]})
+    await call("GET", "/attempts/{attempt_id}", attempt_id=attempt_id)
+    await call("GET", "/attempts/{attempt_id}/correct-answers", attempt_id=attempt_id)
+    await call("GET", "/export/attempts", params={"quiz_id": quiz_id})
+    await call("GET", "/export/attempts", params={"rows": "answers", "format": "csv", "user_id": 1, "from_id": attempt_id})
+    await call("GET", "/rankings")
+    await call("GET", "/rankings/me")
+    await call("GET", "/quiz/{quiz_id}/rankings", quiz_id=quiz_id)
+    await call("GET", "/quiz/{quiz_id}/rankings/me", quiz_id=quiz_id)
+    await call("GET", "/quiz/{quiz_id}/stats", quiz_id=quiz_id)
+    await call("GET", "/stats")
+    await call("GET", "/metrics")
+    await call("GET", "/slow-queries", params={"limit": 5})
+    tree = {"title": "Ocean life", "description": "Reefs", "tags": ["science", "biology"], "questions": [
+        {"text": "Largest fish?", "type": "single", "points": 2, "answers": [
+            {"text": "Whale shark", "is_correct": True}, {"text": "Tuna", "is_correct": False}]},
+        {"text": "Name a mammal", "type": "text", "points": 1, "answers": [{"text": "Dolphin", "is_correct": True}]},
+    ]}
+    ids = (await call("POST", "/quiz/full", json=tree)).json()
+    first, second = ids["questions"]
+    tree["tags"] = ["biology", "oceans"]
+    tree["questions"] = [
+        {**tree["questions"][0], "id": first["id"], "answers": [
+            {"text": "Whale shark!", "is_correct": True, "id": first["answer_ids"][0]},
+            {"text": "Marlin", "is_correct": False}]},
+        {"text": "Deepest trench?", "type": "single", "points": 3, "answers": [{"text": "Mariana", "is_correct": True}]},
+    ]
+    await call("PUT", "/quiz/{quiz_id}/full", quiz_id=ids["quiz_id"], json=tree)
+    await call("DELETE", "/answers/{answer_id}", answer_id=a2)
+    await call("DELETE", "/question/{question_id}", question_id=q2)
+    await call("DELETE", "/quiz/{quiz_id}", quiz_id=quiz_id)
+
+
+async def capture_statements() -> list[tuple[str, str, tuple]]:
+    """Runs drive_routes against the app and returns (route, sql, params) in issue order."""
+    import httpx
+    from main import app
+
+    captured: list[tuple[str, str, tuple]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        # executemany passes a list of parameter tuples; bulk INSERT ... RETURNING
+        # ("insertmanyvalues") batches arrive as one flat tuple instead
+        if executemany and parameters and isinstance(parameters[0], (tuple, list, dict)):
+            parameters = parameters[0]
+        # statements from the attempt writer run outside any request context
+        captured.append((_route.get() or "attempt writer", statement, tuple(parameters or ())))
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://plans") as client:
+            await client.post("/setup_database")
+
+            async def call(method: str, template: str, json=None, params=None, **path):
+                token = _route.set(f"{method} {template}")
+                try:
+                    response = await client.request(method, template.format(**path), json=json, params=params)
+                finally:
+                    _route.reset(token)
+                if response.status_code >= 400:
+                    raise RuntimeError(f"{method} {template} -> {response.status_code}: {response.text}")
+                return response
+
+            event.listen(Engine, "before_cursor_execute", record)
+            try:
+                await drive_routes(client, call)
+            finally:
+                event.remove(Engine, "before_cursor_execute", record)
+    return captured
+
+
+def scanned_tables(plan: list[str], tables: set[str]) -> list[str]:
+    scans = []
+    for detail in plan:
+        match = _SCAN.match(detail)
+        if not match or "USING" in match.group(2) or "VIRTUAL TABLE" in match.group(2):
+            continue
+        name = match.group(1)
+        # SQLAlchemy aliases a table as name_1, name_2, ...; anon_N / hits are subqueries
+        table = name if name in tables else _ALIAS_SUFFIX.sub("", name)
+        if table in tables:
+            scans.append(table)
+    return scans
+
+
+def explain(database: str, captured: list[tuple[str, str, tuple]]) -> list[dict]:
+    conn = sqlite3.connect(database)
+    try:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        reports = []
+        seen = set()
+        for route, statement, parameters in captured:
+            if not _STATEMENT.match(statement) or (route, statement) in seen:
+                continue
+            seen.add((route, statement))
+            plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+            scans = scanned_tables(plan, tables)
+            reports.append({
+                "route": route,
+                "statement": " ".join(statement.split()),
+                "plan": plan,
+                "unexpected": [table for table in scans if (route, table) not in ALLOWED_SCANS],
+            })
+        return reports
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, "plans.db")
+        # must be set before the app (and its engines) are imported
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{database}"
+        os.environ["ADMIN_USERNAMES"] = '["alice"]'
+        captured = asyncio.run(capture_statements())
+        reports = explain(database, captured)
+
+    failures = [report for report in reports if report["unexpected"]]
+    for report in reports:
+        if args.verbose or report["unexpected"]:
+            marker = "FULL SCAN " + ", ".join(report["unexpected"]) if report["unexpected"] else "ok"
+            print(f"[{marker}] {report['route']}\n  {report['statement']}")
+            for detail in report["plan"]:
+                print(f"    {detail}")
+    print(f"{len(reports)} statements checked, {len(failures)} with unexpected full scans")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
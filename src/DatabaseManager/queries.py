@@ -1,21 +1,35 @@
 from fastapi import Depends, APIRouter
 
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
 from typing import Annotated
 
 
-from src.Models.models import Base, Quiz, QuestionType, Question, Answer
+from src.Cache.answerKeyCache import answer_key_cache
+from src.Cache.leaderboardCache import leaderboard_cache
+from src.Cache.countCache import quiz_count_cache
+from src.Cache.playCache import play_cache
+from src.Cache.responseCache import response_cache
+from src.Config.settings import settings
+from src.DatabaseManager import migrations
+from src.DatabaseManager.engineProfile import create_engines
+from src.Models.models import Quiz, QuestionType, Question, Answer
 
 router = APIRouter()
 
-engine = create_async_engine('sqlite+aiosqlite:///questions.db', echo=False)
+# engine пишет (одно соединение), read_engine только читает — для GET-роутов
+engine, read_engine = create_engines(settings)
 
 new_session = async_sessionmaker(engine)
+new_read_session = async_sessionmaker(read_engine)
 
 async def get_session() -> AsyncSession:
     async with new_session() as session:
         yield session
 
+async def get_read_session() -> AsyncSession:
+    async with new_read_session() as session:
+        yield session
+
 SessionDep = Annotated[AsyncSession, Depends(get_session)]
 
 
@@ -107,8 +121,12 @@ async def seed_data():
 @router.post("/setup_database")
 async def setup_database():
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
-        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(migrations.reset)
+    quiz_count_cache.invalidate()
+    answer_key_cache.clear()
+    leaderboard_cache.clear()
+    play_cache.clear()
+    response_cache.invalidate()
     return {"success": True}
 
 
@@ -0,0 +1,90 @@
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+        self.statements: list[str] = []
+
+
+_current_counter: ContextVar[StatementCounter | None] = ContextVar("statement_counter", default=None)
+
+
+# Listening on the Engine class covers every engine in the process,
+# including the sync engine hidden behind create_async_engine.
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    counter = _current_counter.get()
+    if counter is not None:
+        counter.count += 1
+        counter.statements.append(statement)
+
+
+@contextmanager
+def count_statements():
+    counter = StatementCounter()
+    token = _current_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _current_counter.reset(token)
+
+
+@contextmanager
+def assert_max_statements(budget: int, label: str = "block"):
+    with count_statements() as counter:
+        yield counter
+    if counter.count > budget:
+        raise QueryBudgetExceeded(_format_overrun(label, budget, counter))
+
+
+def query_budget(max_statements: int):
+    """Declares how many SQL statements a route may issue per request."""
+    def decorator(endpoint):
+        endpoint.__query_budget__ = max_statements
+        return endpoint
+    return decorator
+
+
+def _format_overrun(label: str, budget: int, counter: StatementCounter) -> str:
+    statements = "\n".join(f"  {i}. {s}" for i, s in enumerate(counter.statements, 1))
+    return f"{label} issued {counter.count} SQL statements, budget is {budget}:\n{statements}"
+
+
+def query_budget_enforced() -> bool:
+    return os.getenv("QUERY_BUDGET_STRICT", "").lower() in ("1", "true", "yes")
+
+
+class QueryBudgetMiddleware:
+    """
+    Test-time guard: counts the statements issued while handling a request and
+    raises QueryBudgetExceeded when the matched route declared a smaller
+    @query_budget. Enabled in main.py when QUERY_BUDGET_STRICT=1.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with count_statements() as counter:
+            await self.app(scope, receive, send)
+
+        # The router stores the matched endpoint in the shared scope dict.
+        endpoint = scope.get("endpoint")
+        budget = getattr(endpoint, "__query_budget__", None)
+        if budget is not None and counter.count > budget:
+            label = f"{scope['method']} {scope['path']}"
+            raise QueryBudgetExceeded(_format_overrun(label, budget, counter))
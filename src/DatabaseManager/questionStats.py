@@ -0,0 +1,63 @@
+"""
+Consistency check for the incrementally maintained question statistics:
+question_stats must hold count(*) and sum(is_correct) per question over
+user_answers, and answer_option_stats the number of answers that selected
+each option. Only questions and options that still exist are counted.
+
+    python -m src.DatabaseManager.questionStats            # report drift, exit 1 if any
+    python -m src.DatabaseManager.questionStats --rebuild  # recompute both from user_answers
+
+The rebuild is two set-based statements: json_each unpacks every
+selected_answer_ids array inside SQLite, so historical answers are never
+decoded row by row in Python.
+"""
+from sqlalchemy.engine import Connection
+
+from src.DatabaseManager import derivedTables
+
+_QUESTIONS_FROM_ANSWERS = (
+    "SELECT ua.question_id, count(*), coalesce(sum(ua.is_correct), 0) "
+    "FROM user_answers ua JOIN questions q ON q.id = ua.question_id GROUP BY ua.question_id"
+)
+_QUESTIONS_STORED = "SELECT question_id, answered, correct FROM question_stats"
+# an answer that lists an option twice still picks it once; ids that are not
+# options of the question are ignored, as they are at submit time
+_PICKS_FROM_ANSWERS = (
+    "SELECT ua.question_id, picked.value, count(DISTINCT ua.id) "
+    "FROM user_answers ua, json_each(ua.selected_answer_ids) picked "
+    "JOIN answers a ON a.id = picked.value AND a.question_id = ua.question_id "
+    "WHERE picked.type = 'integer' GROUP BY ua.question_id, picked.value"
+)
+_PICKS_STORED = "SELECT question_id, answer_id, picks FROM answer_option_stats"
+
+REBUILD_STATEMENTS = [
+    "DELETE FROM question_stats",
+    f"INSERT INTO question_stats (question_id, answered, correct) {_QUESTIONS_FROM_ANSWERS}",
+    "DELETE FROM answer_option_stats",
+    f"INSERT INTO answer_option_stats (question_id, answer_id, picks) {_PICKS_FROM_ANSWERS}",
+]
+
+
+def rebuild_question_stats(conn: Connection) -> None:
+    for statement in REBUILD_STATEMENTS:
+        conn.exec_driver_sql(statement)
+
+
+def check_question_stats(conn: Connection, sample: int = 10) -> dict:
+    """Counts (and samples) rows that disagree with user_answers. All zeros means consistent."""
+    return derivedTables.check_drift(conn, {
+        # missing or wrong counters
+        "questions_missing": f"{_QUESTIONS_FROM_ANSWERS} EXCEPT {_QUESTIONS_STORED}",
+        # counters with no answers behind them
+        "questions_stale": f"{_QUESTIONS_STORED} EXCEPT {_QUESTIONS_FROM_ANSWERS}",
+        "picks_missing": f"{_PICKS_FROM_ANSWERS} EXCEPT {_PICKS_STORED}",
+        "picks_stale": f"{_PICKS_STORED} EXCEPT {_PICKS_FROM_ANSWERS}",
+    }, sample)
+
+
+def main():
+    derivedTables.main(__doc__, rebuild_question_stats, check_question_stats)
+
+
+if __name__ == "__main__":
+    main()
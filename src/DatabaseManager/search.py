@@ -0,0 +1,132 @@
+import re
+
+from sqlalchemy import DDL, and_, bindparam, column, event, exists, func, literal_column, select, table, union_all
+from sqlalchemy.engine import Connection
+
+from src.Models.models import Base
+
+# Full-text index over quiz title, description and tag names. rowid is the quiz
+# id; the triggers below keep it in sync with every write path, ORM or not.
+SEARCH_TABLE = "quiz_search"
+# per-term counts of the index above, read by broad_match()
+VOCAB_TABLE = "quiz_search_vocab"
+
+# bm25 column weights: title, description, tags
+BM25_WEIGHTS = (10.0, 2.0, 5.0)
+
+_TAGS_OF_QUIZ = (
+    "(SELECT coalesce(group_concat(t.name, ' '), '') FROM quiz_tags qt "
+    "JOIN tags t ON t.id = qt.tag_id WHERE qt.quiz_id = {quiz_id})"
+)
+
+CREATE_STATEMENTS = [
+    # prefix: "word"* queries of 3 and 4 characters (most of what people type
+    # first) read one ready-made doclist instead of merging every term they
+    # expand to, which costs the whole merge even for a LIMIT 5 page
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        title, description, tags, tokenize = 'unicode61 remove_diacritics 2', prefix = '3 4'
+    )""",
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {VOCAB_TABLE} USING fts5vocab({SEARCH_TABLE}, row)",
+    f"""CREATE TRIGGER IF NOT EXISTS quiz_search_ai AFTER INSERT ON quizzes BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, title, description, tags)
+        VALUES (new.id, new.title, coalesce(new.description, ''), '');
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS quiz_search_au AFTER UPDATE OF title, description ON quizzes BEGIN
+        UPDATE {SEARCH_TABLE} SET title = new.title, description = coalesce(new.description, '')
+        WHERE rowid = new.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS quiz_search_ad AFTER DELETE ON quizzes BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS quiz_search_qt_ai AFTER INSERT ON quiz_tags BEGIN
+        UPDATE {SEARCH_TABLE} SET tags = {_TAGS_OF_QUIZ.format(quiz_id="new.quiz_id")}
+        WHERE rowid = new.quiz_id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS quiz_search_qt_ad AFTER DELETE ON quiz_tags BEGIN
+        UPDATE {SEARCH_TABLE} SET tags = {_TAGS_OF_QUIZ.format(quiz_id="old.quiz_id")}
+        WHERE rowid = old.quiz_id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS quiz_search_tag_au AFTER UPDATE OF name ON tags BEGIN
+        UPDATE {SEARCH_TABLE} SET tags = {_TAGS_OF_QUIZ.format(quiz_id=f"{SEARCH_TABLE}.rowid")}
+        WHERE rowid IN (SELECT quiz_id FROM quiz_tags WHERE tag_id = new.id);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS quiz_search_tag_ad AFTER DELETE ON tags BEGIN
+        UPDATE {SEARCH_TABLE} SET tags = {_TAGS_OF_QUIZ.format(quiz_id=f"{SEARCH_TABLE}.rowid")}
+        WHERE rowid IN (SELECT quiz_id FROM quiz_tags WHERE tag_id = old.id);
+    END""",
+]
+
+REBUILD_STATEMENTS = [
+    f"DELETE FROM {SEARCH_TABLE}",
+    f"""INSERT INTO {SEARCH_TABLE}(rowid, title, description, tags)
+        SELECT q.id, q.title, coalesce(q.description, ''), {_TAGS_OF_QUIZ.format(quiz_id="q.id")}
+        FROM quizzes q""",
+]
+
+
+def create_search_index(conn: Connection) -> None:
+    for statement in CREATE_STATEMENTS:
+        conn.exec_driver_sql(statement)
+
+
+def rebuild_search_index(conn: Connection) -> None:
+    for statement in REBUILD_STATEMENTS:
+        conn.exec_driver_sql(statement)
+
+
+# create_all / drop_all (fresh databases, /setup_database) manage the index too;
+# existing databases get it from the migration in migrations.py.
+for _statement in CREATE_STATEMENTS:
+    event.listen(Base.metadata, "after_create", DDL(_statement))
+event.listen(Base.metadata, "before_drop", DDL(f"DROP TABLE IF EXISTS {VOCAB_TABLE}"))
+event.listen(Base.metadata, "before_drop", DDL(f"DROP TABLE IF EXISTS {SEARCH_TABLE}"))
+
+
+def match_expression(text: str) -> str | None:
+    """Turns free user input into an FTS5 query: every word must match as a prefix."""
+    words = re.findall(r"\w+", text.lower())
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def search_hits(match: str, with_snippet: bool = False, ranked: bool = True):
+    """
+    Subquery of (quiz_id[, rank][, snippet]) for quizzes matching `match`.
+    Lower rank is better (bm25 returns negated scores). ranked=False leaves
+    bm25 out for broad terms (see broad_match); order those by quiz_id, which
+    the index returns in order.
+    """
+    index = table(SEARCH_TABLE, column("rowid"))
+    fts = literal_column(SEARCH_TABLE)
+    columns = [index.c.rowid.label("quiz_id")]
+    if ranked:
+        columns.append(func.bm25(fts, *BM25_WEIGHTS).label("rank"))
+    if with_snippet:
+        columns.append(func.snippet(fts, -1, "<mark>", "</mark>", "…", 12).label("snippet"))
+
+    return (
+        select(*columns)
+        .select_from(index)
+        .where(fts.op("MATCH")(bindparam("fts_match", match)))
+        .subquery("hits")
+    )
+
+
+def broad_match(match: str, max_postings: int):
+    """
+    Whether the words of `match` occur in more than `max_postings` quizzes,
+    summed over the words (a prefix counts every term it expands to). bm25
+    reads that many index entries before it can rank anything; fts5vocab
+    counts them term by term without merging prefixes the way MATCH does,
+    and the running sum stops at the first term past the limit.
+    """
+    vocab = table(VOCAB_TABLE, column("term"), column("doc"))
+    per_word = [
+        # one range per word: fts5vocab only seeks on plain term bounds
+        select(vocab.c.doc).where(and_(vocab.c.term >= word, vocab.c.term < word + "\U0010ffff"))
+        for word in re.findall(r'"(\w+)"', match)
+    ]
+    entries = union_all(*per_word).subquery("entries")
+    running = select(func.sum(entries.c.doc).over(rows=(None, 0)).label("total")).subquery("running")
+    return select(exists().where(running.c.total > max_postings))
@@ -0,0 +1,141 @@
+import json
+import logging
+import re
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.Config.settings import settings
+from src.Services.requestMetrics import UNMATCHED_ROUTE
+
+_EXPLAINABLE = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+
+# its own request context rather than MetricsMiddleware's, so entries keep
+# their route with metrics_enabled=False
+_current_scope: ContextVar[dict | None] = ContextVar("slow_query_scope", default=None)
+
+
+def current_route() -> str | None:
+    """'GET /quiz/{quiz_id}' for the request being handled, None outside requests."""
+    scope = _current_scope.get()
+    if scope is None:
+        return None
+    # the router stores the matched APIRoute in the shared scope dict
+    return f"{scope['method']} {getattr(scope.get('route'), 'path_format', None) or UNMATCHED_ROUTE}"
+
+
+class RouteContextMiddleware:
+    """Exposes the request being handled to the statement listeners below. Installed in main.py."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = _current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_scope.reset(token)
+
+
+def parameter_shape(parameters, executemany: bool) -> str:
+    """Types of the bound values, never the values themselves (think password hashes)."""
+    if executemany and parameters and isinstance(parameters[0], (tuple, list, dict)):
+        return f"{len(parameters)} x {parameter_shape(parameters[0], False)}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{name}: {type(value).__name__}" for name, value in parameters.items()) + "}"
+    return "(" + ", ".join(type(value).__name__ for value in parameters or ()) + ")"
+
+
+def _explain(conn, statement: str, parameters, executemany: bool) -> list[str]:
+    if not _EXPLAINABLE.match(statement):
+        return []
+    # insertmanyvalues batches arrive as one flat tuple with executemany=False
+    if executemany and parameters and isinstance(parameters[0], (tuple, list, dict)):
+        parameters = parameters[0]
+    # a raw DBAPI cursor on the same connection: no engine events fire, so the
+    # EXPLAIN is invisible to query budgets and request metrics
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+        return [row[3] for row in cursor.fetchall()]
+    except Exception as error:
+        return [f"EXPLAIN failed: {error}"]
+    finally:
+        cursor.close()
+
+
+class SlowQueryLog:
+    """
+    Statements that took at least settings.slow_query_ms: the newest
+    `max_entries` in memory for GET /slow-queries, and every one of them as a
+    JSON line in a size-rotated file when settings.slow_query_log_path is set.
+    Each entry has the SQL, the parameter types, the route that issued it
+    (None for background work such as the attempt writer), the duration and
+    the EXPLAIN QUERY PLAN rows.
+    """
+
+    def __init__(self, max_entries: int, path: str, max_bytes: int, backups: int):
+        self._entries: deque[dict] = deque(maxlen=max_entries)
+        self.recorded = 0
+        self._logger = logging.getLogger("slow_queries")
+        self._logger.propagate = False
+        if path:
+            self._logger.setLevel(logging.INFO)
+            handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8", delay=True)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._logger.addHandler(handler)
+
+    def record(self, entry: dict) -> None:
+        self._entries.append(entry)
+        self.recorded += 1
+        self._logger.info(json.dumps(entry))
+
+    def entries(self, limit: int) -> list[dict]:
+        """Newest first."""
+        return list(reversed(self._entries))[:limit]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+slow_query_log = SlowQueryLog(
+    settings.slow_query_buffer, settings.slow_query_log_path,
+    settings.slow_query_log_bytes, settings.slow_query_log_backups,
+)
+
+
+def _statement_started(conn, cursor, statement, parameters, context, executemany):
+    conn.info["slow_query_started"] = time.perf_counter()
+
+
+def _statement_finished(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("slow_query_started", None)
+    if started is None:
+        return
+    duration_ms = (time.perf_counter() - started) * 1000
+    if duration_ms < settings.slow_query_ms:
+        return
+    slow_query_log.record({
+        "at": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+        "route": current_route(),
+        "duration_ms": round(duration_ms, 3),
+        "statement": " ".join(statement.split()),
+        "parameters": parameter_shape(parameters, executemany),
+        "plan": _explain(conn, statement, parameters, executemany),
+    })
+
+
+# slow_query_ms=0 turns the log off without leaving listeners behind
+if settings.slow_query_ms > 0:
+    event.listen(Engine, "before_cursor_execute", _statement_started)
+    event.listen(Engine, "after_cursor_execute", _statement_finished)
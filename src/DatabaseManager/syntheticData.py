@@ -0,0 +1,275 @@
+"""
+Synthetic dataset for benchmarks: builds a fresh SQLite database at PATH
+holding --scale times the base row counts.
+
+    python -m src.DatabaseManager.syntheticData bench.db --scale 1 --seed 42
+    DATABASE_URL=sqlite+aiosqlite:///bench.db uvicorn main:app
+
+  scale 1   20k users, 2k quizzes (~25k questions, ~100k answers), 300 tags,
+            200k attempts (~2.3M user answers)
+
+  quiz popularity   Zipf over a shuffled quiz order: a few quizzes get most attempts
+  user activity     Pareto weights: a few users make most attempts
+  authorship        Zipf over 5% of the users
+  tags              Zipf: a handful of tags sit on most quizzes
+  correctness       logistic in user skill minus question difficulty
+
+Rows go in with chunked Core executemany INSERTs and pre-assigned ids, so
+nothing is read back. user_quiz_best, users.total_score and the question
+statistics are then rebuilt with their set-based statements. The same
+arguments and --seed produce the same rows, bar the bcrypt salt of the one
+password hash every user shares (--password).
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.engine import Connection
+
+BASE_COUNTS = {"users": 20_000, "quizzes": 2_000, "tags": 300, "attempts": 200_000}
+CHUNK_ROWS = 50_000
+
+QUIZ_POPULARITY_S = 1.1
+AUTHOR_POPULARITY_S = 1.0
+TAG_POPULARITY_S = 1.2
+USER_ACTIVITY_ALPHA = 1.16  # the 80/20 Pareto shape
+AUTHOR_SHARE = 0.05
+
+WORDS = (
+    "history", "physics", "music", "biology", "geography", "football", "cinema", "chemistry", "art", "space",
+    "ocean", "ancient", "modern", "world", "european", "asian", "language", "math", "algebra", "geometry",
+    "literature", "poetry", "novel", "painting", "jazz", "rock", "classical", "olympic", "tennis", "chess",
+    "computer", "internet", "python", "database", "network", "economy", "finance", "politics", "law", "medicine",
+    "anatomy", "genetics", "evolution", "climate", "weather", "volcano", "river", "mountain", "desert", "forest",
+    "animal", "bird", "insect", "plant", "food", "cooking", "wine", "coffee", "travel", "capital",
+)
+
+
+@dataclass(slots=True)
+class GeneratedQuestion:
+    id: int
+    type: str
+    points: int
+    difficulty: float
+    correct_ids: list[int]
+    wrong_ids: list[int]
+
+
+@dataclass
+class Report:
+    rows: dict[str, int] = field(default_factory=dict)
+    seconds: dict[str, float] = field(default_factory=dict)
+
+
+def cumulative_zipf(n: int, s: float) -> list[float]:
+    return list(itertools.accumulate(1.0 / rank ** s for rank in range(1, n + 1)))
+
+
+def _phrase(rng: random.Random, word_weights: list[float], low: int, high: int) -> str:
+    return " ".join(rng.choices(WORDS, cum_weights=word_weights, k=rng.randint(low, high)))
+
+
+class Inserter:
+    """Buffers rows per table and writes them with one executemany per CHUNK_ROWS."""
+
+    def __init__(self, conn: Connection, report: Report):
+        self.conn = conn
+        self.report = report
+        self.buffers: dict[str, list[dict]] = {}
+
+    def add(self, table: str, row: dict) -> None:
+        buffer = self.buffers.setdefault(table, [])
+        buffer.append(row)
+        if len(buffer) >= CHUNK_ROWS:
+            self.flush()
+
+    def flush(self) -> None:
+        from src.Models.models import Base
+
+        # parents first: the buffers were filled in dependency order
+        for table, rows in self.buffers.items():
+            if rows:
+                self.conn.execute(insert(Base.metadata.tables[table]), rows)
+                self.report.rows[table] = self.report.rows.get(table, 0) + len(rows)
+                rows.clear()
+        self.conn.commit()
+
+
+def generate(conn: Connection, scale: float, seed: int, password_hash: str, end: datetime, days: int) -> Report:
+    from src.DatabaseManager import leaderboard, questionStats
+
+    rng = random.Random(seed)
+    counts = {name: max(1, round(count * scale)) for name, count in BASE_COUNTS.items()}
+    report = Report()
+    out = Inserter(conn, report)
+    word_weights = cumulative_zipf(len(WORDS), 1.0)
+
+    def phase(name: str, started: float) -> None:
+        out.flush()
+        report.seconds[name] = round(time.perf_counter() - started, 2)
+
+    started = time.perf_counter()
+    user_ids = range(1, counts["users"] + 1)
+    for user_id in user_ids:
+        out.add("users", {
+            "id": user_id, "username": f"user{user_id}", "email": f"user{user_id}@example.com",
+            "hashed_password": password_hash, "total_score": 0,
+        })
+    skill = [rng.betavariate(2, 2) for _ in user_ids]
+    activity = list(itertools.accumulate(rng.paretovariate(USER_ACTIVITY_ALPHA) for _ in user_ids))
+
+    tag_ids = range(1, counts["tags"] + 1)
+    for tag_id in tag_ids:
+        out.add("tags", {"id": tag_id, "name": f"{WORDS[(tag_id - 1) % len(WORDS)]}-{(tag_id - 1) // len(WORDS)}"})
+    phase("users_tags", started)
+
+    started = time.perf_counter()
+    authors = rng.sample(list(user_ids), max(1, round(len(user_ids) * AUTHOR_SHARE)))
+    author_weights = cumulative_zipf(len(authors), AUTHOR_POPULARITY_S)
+    tag_order = rng.sample(list(tag_ids), len(tag_ids))
+    tag_weights = cumulative_zipf(len(tag_order), TAG_POPULARITY_S)
+    quizzes: list[list[GeneratedQuestion]] = []
+    question_id = answer_id = 0
+    for quiz_id in range(1, counts["quizzes"] + 1):
+        out.add("quizzes", {
+            "id": quiz_id,
+            "title": _phrase(rng, word_weights, 2, 5).capitalize(),
+            "description": _phrase(rng, word_weights, 6, 18).capitalize(),
+            "creator_id": rng.choices(authors, cum_weights=author_weights)[0],
+        })
+        for tag_id in set(rng.choices(tag_order, cum_weights=tag_weights, k=rng.randint(1, 4))):
+            out.add("quiz_tags", {"quiz_id": quiz_id, "tag_id": tag_id})
+
+        questions = []
+        for _ in range(int(rng.triangular(5, 25, 10))):
+            question_id += 1
+            q_type = rng.choices(("single", "multiple", "text"), weights=(6, 3, 1))[0]
+            points = rng.choices((1, 2, 5), weights=(6, 3, 1))[0]
+            out.add("questions", {
+                "id": question_id, "quiz_id": quiz_id, "type": q_type,
+                "text": f"{_phrase(rng, word_weights, 4, 10).capitalize()}?", "points": points,
+            })
+            if q_type == "text":
+                options, correct = 1, 1
+            elif q_type == "single":
+                options, correct = rng.randint(3, 5), 1
+            else:
+                options = rng.randint(4, 6)
+                correct = rng.randint(2, options - 1)
+            ids = list(range(answer_id + 1, answer_id + options + 1))
+            answer_id += options
+            for position, option_id in enumerate(ids):
+                out.add("answers", {
+                    "id": option_id, "question_id": question_id,
+                    "text": _phrase(rng, word_weights, 1, 4), "is_correct": position < correct,
+                })
+            questions.append(GeneratedQuestion(question_id, q_type, points, rng.random(), ids[:correct], ids[correct:]))
+        quizzes.append(questions)
+    phase("quizzes", started)
+
+    started = time.perf_counter()
+    quiz_order = rng.sample(range(len(quizzes)), len(quizzes))
+    quiz_weights = cumulative_zipf(len(quiz_order), QUIZ_POPULARITY_S)
+    first = end - timedelta(days=days)
+    moments = sorted(rng.random() for _ in range(counts["attempts"]))
+    user_answer_id = 0
+    for attempt_id, moment in enumerate(moments, 1):
+        quiz_index = rng.choices(quiz_order, cum_weights=quiz_weights)[0]
+        user_id = rng.choices(user_ids, cum_weights=activity)[0]
+        ability = skill[user_id - 1]
+        score = max_score = 0
+        answers = []
+        for question in quizzes[quiz_index]:
+            answer_text = None
+            if question.type == "text":
+                # free text is accepted as is, exactly as grading does
+                is_correct, selected = True, []
+                answer_text = rng.choice(WORDS)
+            else:
+                is_correct = rng.random() < 1 / (1 + math.exp(-6 * (ability - question.difficulty)))
+                if is_correct:
+                    selected = question.correct_ids
+                elif question.type == "single":
+                    selected = [rng.choice(question.wrong_ids)]
+                else:
+                    selected = question.correct_ids[:-1] + [rng.choice(question.wrong_ids)]
+            points = question.points if is_correct else 0
+            score += points
+            max_score += question.points
+            user_answer_id += 1
+            answers.append({
+                "id": user_answer_id, "attempt_id": attempt_id, "question_id": question.id,
+                "answer_text": answer_text, "selected_answer_ids": selected,
+                "is_correct": is_correct, "points_awarded": points,
+            })
+        out.add("quiz_attempts", {
+            "id": attempt_id, "user_id": user_id, "quiz_id": quiz_index + 1, "score": score,
+            "max_score": max_score, "created_at": first + (end - first) * moment,
+        })
+        for answer in answers:
+            out.add("user_answers", answer)
+    phase("attempts", started)
+
+    started = time.perf_counter()
+    leaderboard.rebuild_leaderboard(conn)
+    questionStats.rebuild_question_stats(conn)
+    conn.exec_driver_sql("ANALYZE")
+    conn.commit()
+    report.seconds["derived"] = round(time.perf_counter() - started, 2)
+    return report
+
+
+async def _run(args) -> Report:
+    from src.DatabaseManager import migrations
+    from src.DatabaseManager.queries import engine
+    from src.Services.passwordHasher import password_hasher
+
+    # one hash for everyone: bcrypt per user would dominate the run
+    password_hash = password_hasher.context.hash(args.password)
+    end = datetime.fromisoformat(args.end)
+    async with engine.connect() as conn:
+        await conn.run_sync(migrations.upgrade)
+        await conn.commit()
+        report = await conn.run_sync(generate, args.scale, args.seed, password_hash, end, args.days)
+    await engine.dispose()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="SQLite file to create")
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--password", default="password1")
+    parser.add_argument("--end", default="2025-01-01", help="attempts are spread over the --days before this date")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--overwrite", action="store_true")
+    args = parser.parse_args()
+
+    if os.path.exists(args.path):
+        if not args.overwrite:
+            parser.error(f"{args.path} exists; pass --overwrite to replace it")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.path + suffix):
+                os.remove(args.path + suffix)
+    # set before queries.py creates its engines
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.abspath(args.path)}"
+
+    started = time.perf_counter()
+    report = asyncio.run(_run(args))
+    print(json.dumps({
+        "path": args.path, "scale": args.scale, "seed": args.seed,
+        "rows": report.rows, "seconds": {**report.seconds, "total": round(time.perf_counter() - started, 2)},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
+from datetime import datetime, timezone
+
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from typing import Annotated
 
 from sqlalchemy import (
-    String, Integer, Boolean, ForeignKey, Table, Enum, JSON, Column
+    String, Integer, Boolean, ForeignKey, Table, Enum, JSON, Column, Index, DateTime, Float
 )
 import enum
 
@@ -11,6 +13,16 @@ class Base(DeclarativeBase):
     pass
 
 
+# Relationships never load implicitly (lazy="raise"): every endpoint declares
+# the loader options it needs, and an accidental lazy load fails loudly instead
+# of fanning out into a cascade of SELECTs.
+
+# Quiz, question and answer ids are never handed out twice (AUTOINCREMENT):
+# history (user_answers, counters, versions, client ETags) keeps pointing at
+# rows by id after they are deleted.
+NEVER_REUSE_IDS = {"sqlite_autoincrement": True}
+
+
 
 class QuestionType(enum.Enum):
     single = "single"
@@ -26,61 +38,64 @@ class User(Base):
     username: Mapped[str] = mapped_column(String(50), unique=True, index=True)
     email: Mapped[str] = mapped_column(String(100), unique=True)
     hashed_password: Mapped[str] = mapped_column(String)
-    total_score: Mapped[int] = mapped_column(default=0)
+    total_score: Mapped[int] = mapped_column(default=0, index=True)  # сумма user_quiz_best.best_score
 
     quizzes: Mapped[list["Quiz"]] = relationship(
-        back_populates="creator", lazy="selectin"
+        back_populates="creator", lazy="raise"
     )
     attempts: Mapped[list["QuizAttempt"]] = relationship(
-        back_populates="user", lazy="selectin"
+        back_populates="user", lazy="raise"
     )
 
 # Квиз
 class Quiz(Base):
     __tablename__ = 'quizzes'
+    __table_args__ = NEVER_REUSE_IDS
 
     id: Mapped[int] = mapped_column(primary_key=True)
     title: Mapped[str] = mapped_column(String(200), index=True)
     description: Mapped[str] = mapped_column(String, nullable=True)
-    creator_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    creator_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
 
     creator: Mapped["User"] = relationship(
-        back_populates="quizzes", lazy="selectin"
+        back_populates="quizzes", lazy="raise"
     )
     questions: Mapped[list["Question"]] = relationship(
-        back_populates="quiz", cascade="all, delete-orphan", lazy="selectin"
+        back_populates="quiz", cascade="all, delete-orphan", lazy="raise"
     )
     tags: Mapped[list["Tag"]] = relationship(
-        secondary="quiz_tags", back_populates="quizzes", lazy="selectin"
+        secondary="quiz_tags", back_populates="quizzes", lazy="raise"
     )
 
 # Вопрос
 class Question(Base):
     __tablename__ = 'questions'
+    __table_args__ = NEVER_REUSE_IDS
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    quiz_id: Mapped[int] = mapped_column(ForeignKey("quizzes.id"))
+    quiz_id: Mapped[int] = mapped_column(ForeignKey("quizzes.id"), index=True)
     text: Mapped[str] = mapped_column(String)
     type: Mapped[QuestionType] = mapped_column(Enum(QuestionType))
     points: Mapped[int] = mapped_column()
 
     quiz: Mapped["Quiz"] = relationship(
-        back_populates="questions", lazy="selectin"
+        back_populates="questions", lazy="raise"
     )
     answers: Mapped[list["Answer"]] = relationship(
-        back_populates="question", cascade="all, delete-orphan", lazy="selectin"
+        back_populates="question", cascade="all, delete-orphan", lazy="raise"
     )
 
 class Answer(Base):
     __tablename__ = 'answers'
+    __table_args__ = NEVER_REUSE_IDS
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    question_id: Mapped[int] = mapped_column(ForeignKey("questions.id"))
+    question_id: Mapped[int] = mapped_column(ForeignKey("questions.id"), index=True)
     text: Mapped[str] = mapped_column(String)
     is_correct: Mapped[bool] = mapped_column(Boolean)
 
     question: Mapped["Question"] = relationship(
-        back_populates="answers", lazy="selectin"
+        back_populates="answers", lazy="raise"
     )
 
 # Тег
@@ -91,7 +106,7 @@ class Tag(Base):
     name: Mapped[str] = mapped_column(String(50), unique=True)
 
     quizzes: Mapped[list["Quiz"]] = relationship(
-        secondary="quiz_tags", back_populates="tags", lazy="selectin"
+        secondary="quiz_tags", back_populates="tags", lazy="raise"
     )
 
 # "quiz_tags"
@@ -99,38 +114,82 @@ quiz_tags = Table(
     "quiz_tags",
     Base.metadata,
     Column("quiz_id", ForeignKey("quizzes.id", ondelete="CASCADE"), primary_key=True),
-    Column("tag_id", ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True)
+    Column("tag_id", ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True, index=True)
 )
 
 # Попытка прохождения квиза
 class QuizAttempt(Base):
     __tablename__ = 'quiz_attempts'
+    # лучший результат по (user, quiz) берётся прямо из индекса
+    __table_args__ = (Index("ix_quiz_attempts_user_quiz_score", "user_id", "quiz_id", "score"),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
     quiz_id: Mapped[int] = mapped_column(ForeignKey("quizzes.id"))
     score: Mapped[int] = mapped_column(default=0)
+    max_score: Mapped[int] = mapped_column(default=0, server_default="0")
+    # время отправки (UTC); NULL у попыток, сохранённых до появления колонки
+    created_at: Mapped[datetime | None] = mapped_column(
+        DateTime, nullable=True, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None)
+    )
 
     user: Mapped["User"] = relationship(
-        back_populates="attempts", lazy="selectin"
+        back_populates="attempts", lazy="raise"
     )
     answers: Mapped[list["UserAnswer"]] = relationship(
-        back_populates="attempt", cascade="all, delete", lazy="selectin"
+        back_populates="attempt", cascade="all, delete", lazy="raise"
     )
 
+# Лучший результат пользователя по квизу (ведётся при отправке попытки)
+class UserQuizBest(Base):
+    __tablename__ = 'user_quiz_best'
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    quiz_id: Mapped[int] = mapped_column(ForeignKey("quizzes.id"), primary_key=True, index=True)
+    best_score: Mapped[int] = mapped_column(default=0)
+
 # Ответ пользователя на вопрос
 class UserAnswer(Base):
     __tablename__ = 'user_answers'
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    attempt_id: Mapped[int] = mapped_column(ForeignKey("quiz_attempts.id"))
+    attempt_id: Mapped[int] = mapped_column(ForeignKey("quiz_attempts.id"), index=True)
     question_id: Mapped[int] = mapped_column(ForeignKey("questions.id"))
     answer_text: Mapped[str] = mapped_column(String, nullable=True)  # только для текстовых
     selected_answer_ids: Mapped[list[int]] = mapped_column(JSON, nullable=True)  # для single/multiple
+    # результат проверки на момент отправки; не меняется при правке квиза
+    is_correct: Mapped[bool] = mapped_column(Boolean, default=False, server_default="0")
+    points_awarded: Mapped[int] = mapped_column(default=0, server_default="0")
 
     attempt: Mapped["QuizAttempt"] = relationship(
-        back_populates="answers", lazy="selectin"
+        back_populates="answers", lazy="raise"
     )
 
+# Счётчики ответов на вопрос (ведутся при отправке попытки, пересчитываются из user_answers)
+class QuestionStats(Base):
+    __tablename__ = 'question_stats'
+
+    question_id: Mapped[int] = mapped_column(ForeignKey("questions.id"), primary_key=True)
+    answered: Mapped[int] = mapped_column(default=0)
+    correct: Mapped[int] = mapped_column(default=0)
+
+# Сколько ответов выбрали каждый вариант
+class AnswerOptionStats(Base):
+    __tablename__ = 'answer_option_stats'
+
+    question_id: Mapped[int] = mapped_column(ForeignKey("questions.id"), primary_key=True)
+    # индекс для удаления счётчиков вместе с вариантом ответа
+    answer_id: Mapped[int] = mapped_column(ForeignKey("answers.id"), primary_key=True, index=True)
+    picks: Mapped[int] = mapped_column(default=0)
+
+
+
 
+# Версии содержимого для ETag и кэшей ("catalog", "tags", "quiz:<id>"),
+# увеличиваются в той же транзакции, что и запись
+class ContentVersion(Base):
+    __tablename__ = 'content_versions'
 
+    key: Mapped[str] = mapped_column(String(40), primary_key=True)
+    counter: Mapped[int] = mapped_column(default=0)
+    modified: Mapped[float] = mapped_column(Float)  # unix time последнего изменения
@@ -135,6 +135,67 @@ class UserRanking(BaseModel):
     username: str
     total_score: int
 
+class RankingEntry(BaseModel):
+    rank: int
+    user_id: int
+    username: str
+    score: int
+
+class MyRank(BaseModel):
+    rank: int
+    score: int
+    participants: int
+
 
 class QuizPrompt(BaseModel):
-    topic: str
\ No newline at end of file
+    topic: str
+
+# Whole-quiz authoring (POST /quiz/full, PUT /quiz/{id}/full). On PUT an item
+# with an id updates that row, an item without one is inserted, and rows the
+# payload leaves out are deleted.
+class AnswerTreeItem(AnswerBase):
+    id: int | None = None
+
+
+class QuestionTreeItem(QuestionBase):
+    id: int | None = None
+    answers: List[AnswerTreeItem] = []
+
+
+class QuizTree(QuizBase):
+    questions: List[QuestionTreeItem] = []
+    tags: List[str] = []
+
+
+class QuestionTreeIds(BaseModel):
+    id: int
+    answer_ids: List[int]
+
+
+class QuizTreeIds(BaseModel):
+    quiz_id: int
+    questions: List[QuestionTreeIds]
+    tag_ids: List[int]
+    # rows actually written: {"inserted": n, "updated": n, "deleted": n}
+    changes: dict[str, int]
+
+
+class AnswerOptionStatsRead(BaseModel):
+    answer_id: int
+    text: str
+    is_correct: bool
+    picks: int
+
+class QuestionStatsRead(BaseModel):
+    question_id: int
+    text: str
+    type: QuestionType
+    answered: int
+    correct: int
+    correct_rate: float | None  # None, пока никто не отвечал
+    most_chosen_wrong: AnswerOptionStatsRead | None
+    options: List[AnswerOptionStatsRead]
+
+class QuizStatsRead(BaseModel):
+    quiz_id: int
+    questions: List[QuestionStatsRead]
@@ -0,0 +1,171 @@
+from dataclasses import dataclass, field
+
+from sqlalchemy import case, delete, insert, select, tuple_, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.DatabaseManager.bulkInsert import insert_returning_ids
+from src.Models.models import AnswerOptionStats, QuestionStats, QuizAttempt, User, UserAnswer, UserQuizBest
+from src.Services.grading import GradedAttempt
+
+attempts_table = QuizAttempt.__table__
+user_answers_table = UserAnswer.__table__
+bests_table = UserQuizBest.__table__
+users_table = User.__table__
+question_stats_table = QuestionStats.__table__
+option_stats_table = AnswerOptionStats.__table__
+
+
+@dataclass(slots=True)
+class PendingAttempt:
+    user_id: int
+    quiz_id: int
+    graded: GradedAttempt
+
+
+@dataclass(slots=True)
+class PersistedAttempts:
+    attempt_ids: list[int]
+    # (user_id, quiz_id, best_score) for every pair with a new personal best
+    new_bests: list[tuple[int, int, int]] = field(default_factory=list)
+    # users.total_score after the write, for users whose total changed
+    new_totals: dict[int, int] = field(default_factory=dict)
+
+
+async def persist_attempts(session: AsyncSession, attempts: list[PendingAttempt]) -> PersistedAttempts:
+    """
+    Writes graded attempts with Core bulk INSERTs: one multi-row INSERT ...
+    RETURNING for the attempt rows and one executemany for every answer row,
+    then moves the leaderboard forward for any new personal bests.
+    No ORM objects are created. Returns the new attempt ids in input order and
+    the leaderboard changes; the caller owns the transaction.
+    Per-question and per-option counters are bumped in the same transaction,
+    so they always agree with user_answers.
+    """
+    attempt_ids = await insert_returning_ids(session, attempts_table, [
+        {"user_id": a.user_id, "quiz_id": a.quiz_id, "score": a.graded.score, "max_score": a.graded.max_score}
+        for a in attempts
+    ])
+
+    answer_rows = [
+        {
+            "attempt_id": attempt_id,
+            "question_id": answer.question_id,
+            "answer_text": answer.answer_text,
+            "selected_answer_ids": answer.selected_answer_ids,
+            "is_correct": answer.is_correct,
+            "points_awarded": answer.points_awarded,
+        }
+        for attempt_id, attempt in zip(attempt_ids, attempts)
+        for answer in attempt.graded.answers
+    ]
+    if answer_rows:
+        await session.execute(insert(user_answers_table), answer_rows)
+        await _record_question_stats(session, attempts)
+
+    persisted = PersistedAttempts(attempt_ids)
+    await _record_bests(session, attempts, persisted)
+    return persisted
+
+
+async def _count_upsert(session: AsyncSession, table, keys: list[str], counters: list[str], rows: list[dict]) -> None:
+    upsert = sqlite_insert(table)
+    await session.execute(
+        upsert.on_conflict_do_update(
+            index_elements=[table.c[key] for key in keys],
+            set_={name: table.c[name] + upsert.excluded[name] for name in counters},
+        ),
+        rows,
+    )
+
+
+async def _record_question_stats(session: AsyncSession, attempts: list[PendingAttempt]) -> None:
+    """
+    Adds the batch's answers to question_stats and answer_option_stats: the
+    counts are summed in memory first, then each table gets one executemany
+    upsert. Mirrors what questionStats.rebuild_question_stats computes.
+    """
+    answered: dict[int, list[int]] = {}
+    picks: dict[tuple[int, int], int] = {}
+    for attempt in attempts:
+        for answer in attempt.graded.answers:
+            counts = answered.setdefault(answer.question_id, [0, 0])
+            counts[0] += 1
+            counts[1] += answer.is_correct
+            for answer_id in answer.picked_ids:
+                key = (answer.question_id, answer_id)
+                picks[key] = picks.get(key, 0) + 1
+
+    await _count_upsert(session, question_stats_table, ["question_id"], ["answered", "correct"], [
+        {"question_id": question_id, "answered": total, "correct": correct}
+        for question_id, (total, correct) in sorted(answered.items())
+    ])
+    if picks:
+        await _count_upsert(session, option_stats_table, ["question_id", "answer_id"], ["picks"], [
+            {"question_id": question_id, "answer_id": answer_id, "picks": count}
+            for (question_id, answer_id), count in sorted(picks.items())
+        ])
+
+
+async def delete_question_stats(
+    session: AsyncSession, question_ids: list[int] = (), answer_ids: list[int] = ()
+) -> None:
+    """
+    Drops the counters of deleted questions and answer options, in the
+    caller's transaction: user_answers keep their history, but a counter must
+    not outlive the row it counts.
+    """
+    if question_ids:
+        question_ids = list(question_ids)
+        await session.execute(delete(question_stats_table).where(question_stats_table.c.question_id.in_(question_ids)))
+        await session.execute(delete(option_stats_table).where(option_stats_table.c.question_id.in_(question_ids)))
+    if answer_ids:
+        await session.execute(delete(option_stats_table).where(option_stats_table.c.answer_id.in_(list(answer_ids))))
+
+
+async def _record_bests(session: AsyncSession, attempts: list[PendingAttempt], persisted: PersistedAttempts) -> None:
+    """
+    Raises user_quiz_best and users.total_score where a submitted score beats
+    the stored best. The attempt INSERT above already holds SQLite's write
+    lock, so the bests read here cannot change under us before commit.
+    """
+    candidates: dict[tuple[int, int], int] = {}
+    for a in attempts:
+        key = (a.user_id, a.quiz_id)
+        candidates[key] = max(candidates.get(key, a.graded.score), a.graded.score)
+
+    result = await session.execute(
+        select(bests_table.c.user_id, bests_table.c.quiz_id, bests_table.c.best_score)
+        .where(tuple_(bests_table.c.user_id, bests_table.c.quiz_id).in_(list(candidates)))
+    )
+    stored = {(user_id, quiz_id): best for user_id, quiz_id, best in result}
+
+    improved = []
+    deltas: dict[int, int] = {}
+    for (user_id, quiz_id), score in candidates.items():
+        # a first attempt counts even at 0 points: the user joins the leaderboard
+        previous = stored.get((user_id, quiz_id))
+        if previous is None or score > previous:
+            improved.append({"user_id": user_id, "quiz_id": quiz_id, "best_score": score})
+            persisted.new_bests.append((user_id, quiz_id, score))
+            deltas[user_id] = deltas.get(user_id, 0) + score - (previous or 0)
+    if not improved:
+        return
+
+    upsert = sqlite_insert(bests_table)
+    await session.execute(
+        upsert.on_conflict_do_update(
+            index_elements=[bests_table.c.user_id, bests_table.c.quiz_id],
+            set_={"best_score": upsert.excluded.best_score},
+        ),
+        improved,
+    )
+
+    # one UPDATE ... RETURNING for all users; the new totals feed the in-memory boards
+    result = await session.execute(
+        update(users_table)
+        .where(users_table.c.id.in_(list(deltas)))
+        .values(total_score=users_table.c.total_score + case(deltas, value=users_table.c.id))
+        .returning(users_table.c.id, users_table.c.total_score)
+    )
+    persisted.new_totals.update(result.tuples().all())
@@ -0,0 +1,164 @@
+import asyncio
+import contextvars
+import time
+from typing import NamedTuple
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.Cache.leaderboardCache import leaderboard_cache
+from src.Config.settings import settings
+from src.DatabaseManager.queries import new_session
+from src.Services.attemptStore import PendingAttempt, PersistedAttempts, persist_attempts
+from src.Services.histogram import Histogram
+
+
+class WrittenAttempt(NamedTuple):
+    attempt_id: int
+    score: int
+
+
+class _Job(NamedTuple):
+    attempt: PendingAttempt
+    future: asyncio.Future
+    queued_at: float
+
+
+class AttemptWriter:
+    """
+    Group commit for attempt submissions. Requests hand their graded attempt
+    to submit() and await a future; one background task collects whatever is
+    queued for up to `window` seconds (or until `batch_max` jobs) and writes
+    the lot with persist_attempts in a single transaction, so a burst of
+    submissions shares one commit/fsync. If a batch fails, its jobs are
+    retried one transaction each and only the failing ones see the error.
+
+    batch_max=0 writes every attempt in its own transaction on the caller's
+    task, which is how submit used to work.
+    """
+
+    def __init__(self, sessionmaker: async_sessionmaker, batch_max: int, window: float):
+        self.sessionmaker = sessionmaker
+        self.batch_max = batch_max
+        self.window = window
+        self._queue: asyncio.Queue[_Job | None] | None = None
+        self._task: asyncio.Task | None = None
+        self.batches = 0
+        self.fallback_batches = 0
+        self.failed = 0
+        self.batch_size = Histogram(buckets=tuple(2 ** i for i in range(max(batch_max, 1).bit_length() + 1)))
+        self.flush_latency = Histogram()
+        self.wait_latency = Histogram()
+
+    async def submit(self, attempt: PendingAttempt) -> WrittenAttempt:
+        if self.batch_max <= 0:
+            return self._written([attempt], await self._write([attempt]))[0]
+
+        self._ensure_running()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(_Job(attempt, future, time.perf_counter()))
+        return await future
+
+    async def stop(self) -> None:
+        """Flushes everything queued so far and stops the background task."""
+        if self._task is None or self._task.done():
+            return
+        self._queue.put_nowait(None)
+        await self._task
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "batch_max": self.batch_max,
+            "window_ms": round(self.window * 1000, 3),
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "fallback_batches": self.fallback_batches,
+            "failed": self.failed,
+            "batch_size": self.batch_size.snapshot(),
+            "flush_seconds": self.flush_latency.snapshot(),
+            "queue_wait_seconds": self.wait_latency.snapshot(),
+        }
+
+    def _ensure_running(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._task.get_loop() is loop:
+            return
+        self._queue = asyncio.Queue()
+        # a fresh context: the task must not inherit the first caller's
+        # request-scoped context vars (e.g. the query budget counter)
+        self._task = loop.create_task(self._run(), context=contextvars.Context())
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                break
+            batch = [first]
+            deadline = time.perf_counter() + self.window
+            while len(batch) < self.batch_max:
+                timeout = deadline - time.perf_counter()
+                try:
+                    job = self._queue.get_nowait() if timeout <= 0 else await asyncio.wait_for(self._queue.get(), timeout)
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+                if job is None:
+                    stopping = True
+                    break
+                batch.append(job)
+            try:
+                await self._flush(batch)
+            except Exception as exc:
+                # never leave a request waiting on a future nobody will resolve
+                for job in batch:
+                    if not job.future.done():
+                        job.future.set_exception(exc)
+
+    async def _flush(self, batch: list[_Job]) -> None:
+        started = time.perf_counter()
+        for job in batch:
+            self.wait_latency.observe(started - job.queued_at)
+        self.batches += 1
+        self.batch_size.observe(len(batch))
+        try:
+            persisted = await self._write([job.attempt for job in batch])
+        except Exception:
+            self.fallback_batches += 1
+            for job in batch:
+                await self._write_alone(job)
+        else:
+            for job, result in zip(batch, self._written([job.attempt for job in batch], persisted)):
+                # a request that went away while queued still gets its attempt stored
+                if not job.future.done():
+                    job.future.set_result(result)
+        self.flush_latency.observe(time.perf_counter() - started)
+
+    async def _write_alone(self, job: _Job) -> None:
+        try:
+            persisted = await self._write([job.attempt])
+        except Exception as exc:
+            self.failed += 1
+            if not job.future.done():
+                job.future.set_exception(exc)
+            return
+        result = self._written([job.attempt], persisted)[0]
+        if not job.future.done():
+            job.future.set_result(result)
+
+    async def _write(self, attempts: list[PendingAttempt]) -> PersistedAttempts:
+        async with self.sessionmaker() as session:
+            persisted = await persist_attempts(session, attempts)
+            await session.commit()
+        return persisted
+
+    @staticmethod
+    def _written(attempts: list[PendingAttempt], persisted: PersistedAttempts) -> list[WrittenAttempt]:
+        # committed: move the in-memory leaderboards forward before anyone hears back
+        leaderboard_cache.record(persisted.new_bests, persisted.new_totals)
+        return [
+            WrittenAttempt(attempt_id, attempt.graded.score)
+            for attempt_id, attempt in zip(persisted.attempt_ids, attempts)
+        ]
+
+
+attempt_writer = AttemptWriter(new_session, settings.attempt_batch_max, settings.attempt_batch_window_ms / 1000)
@@ -0,0 +1,61 @@
+from dataclasses import dataclass, field
+
+from src.Cache.answerKeyCache import AnswerKey, GradingEntry
+from src.Schemas.QuizShema import UserAnswerCreate
+
+
+@dataclass(slots=True)
+class GradedAnswer:
+    question_id: int
+    question_text: str
+    answer_text: str | None
+    selected_answer_ids: list[int]
+    is_correct: bool
+    points_awarded: int
+    # the submitted ids that are options of this question: only these are
+    # counted in answer_option_stats
+    picked_ids: frozenset[int]
+
+
+@dataclass(slots=True)
+class GradedAttempt:
+    score: int = 0
+    max_score: int = 0
+    answers: list[GradedAnswer] = field(default_factory=list)
+
+
+def is_answer_correct(entry: GradingEntry, submitted_ids: list[int]) -> bool:
+    if entry.type == "text":
+        return True
+    if entry.type == "single":
+        return len(entry.correct_ids) == 1 and len(submitted_ids) == 1 and submitted_ids[0] in entry.correct_ids
+    if entry.type == "multiple":
+        # same as comparing sorted lists: correct ids are unique, so equal length + equal set
+        return len(submitted_ids) == len(entry.correct_ids) and entry.correct_ids == frozenset(submitted_ids)
+    return False
+
+
+def grade_attempt(key: AnswerKey, answers: list[UserAnswerCreate]) -> GradedAttempt:
+    """Pure in-memory grading; answers to questions outside the quiz are skipped."""
+    graded = GradedAttempt()
+    for user_answer in answers:
+        entry = key.questions.get(user_answer.question_id)
+        if entry is None:
+            continue
+
+        submitted_ids = user_answer.selected_answer_ids or []
+        is_correct = is_answer_correct(entry, submitted_ids)
+        points_awarded = entry.points if is_correct else 0
+
+        graded.max_score += entry.points
+        graded.score += points_awarded
+        graded.answers.append(GradedAnswer(
+            question_id=user_answer.question_id,
+            question_text=entry.text,
+            answer_text=user_answer.answer_text,
+            selected_answer_ids=submitted_ids,
+            is_correct=is_correct,
+            points_awarded=points_awarded,
+            picked_ids=entry.option_ids.intersection(submitted_ids),
+        ))
+    return graded
@@ -0,0 +1,94 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+from src.Config.settings import settings
+from src.Services.histogram import Histogram
+
+
+class PasswordHasherBusy(Exception):
+    """Raised instead of queueing when the hashing pool is saturated."""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a dedicated thread pool so a login burst cannot stall the
+    event loop (bcrypt releases the GIL while hashing). Admission is bounded:
+    at most `workers` jobs run and `max_queue` wait; anything beyond that is
+    rejected immediately with PasswordHasherBusy.
+
+    workers=0 keeps the old inline behaviour, which is only useful for
+    benchmarks and debugging.
+    """
+
+    def __init__(self, context: CryptContext, workers: int, max_queue: int):
+        self.context = context
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = (
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt") if workers > 0 else None
+        )
+        self._in_flight = 0
+        self.rejected = 0
+        self.hash_latency = Histogram()
+        self.wait_latency = Histogram()
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self._in_flight - self.workers)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(self.context.verify, password, hashed_password)
+
+    async def _run(self, fn, *args):
+        if self._executor is None:
+            started = time.perf_counter()
+            result = fn(*args)
+            self.hash_latency.observe(time.perf_counter() - started)
+            return result
+
+        if self._in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise PasswordHasherBusy()
+
+        self._in_flight += 1
+        submitted = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._timed, submitted, fn, *args
+            )
+        finally:
+            self._in_flight -= 1
+
+    def _timed(self, submitted: float, fn, *args):
+        started = time.perf_counter()
+        self.wait_latency.observe(started - submitted)
+        try:
+            return fn(*args)
+        finally:
+            self.hash_latency.observe(time.perf_counter() - started)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "queue_depth": self.queue_depth,
+            "rejected": self.rejected,
+            "hash_seconds": self.hash_latency.snapshot(),
+            "queue_wait_seconds": self.wait_latency.snapshot(),
+        }
+
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+password_hasher = PasswordHasher(
+    pwd_context,
+    workers=settings.password_hash_workers,
+    max_queue=settings.password_hash_queue,
+)
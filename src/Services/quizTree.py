@@ -0,0 +1,261 @@
+from dataclasses import dataclass, field
+
+from sqlalchemy import bindparam, delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.DatabaseManager.bulkInsert import insert_returning_ids
+from src.Services.attemptStore import delete_question_stats
+from src.Models.models import Answer, Question, Quiz, Tag, quiz_tags
+from src.Schemas.QuizShema import QuestionTreeIds, QuizTree, QuizTreeIds
+
+quizzes_table = Quiz.__table__
+questions_table = Question.__table__
+answers_table = Answer.__table__
+tags_table = Tag.__table__
+
+
+class QuizTreeInvalid(Exception):
+    """The payload references rows that are not part of the quiz being edited."""
+
+
+@dataclass(slots=True)
+class StoredQuestion:
+    text: str
+    type: str
+    points: int
+    # answer id -> (text, is_correct)
+    answers: dict[int, tuple[str, bool]] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class StoredQuiz:
+    creator_id: int
+    title: str
+    description: str | None
+    questions: dict[int, StoredQuestion] = field(default_factory=dict)
+
+
+async def load_quiz_tree(session: AsyncSession, quiz_id: int) -> StoredQuiz | None:
+    """The quiz with its questions and answers in one outer-joined SELECT."""
+    rows = (await session.execute(
+        select(
+            quizzes_table.c.creator_id, quizzes_table.c.title, quizzes_table.c.description,
+            questions_table.c.id.label("question_id"), questions_table.c.text.label("question_text"),
+            questions_table.c.type, questions_table.c.points,
+            answers_table.c.id.label("answer_id"), answers_table.c.text.label("answer_text"),
+            answers_table.c.is_correct,
+        )
+        .select_from(quizzes_table)
+        .outerjoin(questions_table, questions_table.c.quiz_id == quizzes_table.c.id)
+        .outerjoin(answers_table, answers_table.c.question_id == questions_table.c.id)
+        .where(quizzes_table.c.id == quiz_id)
+        .order_by(questions_table.c.id, answers_table.c.id)
+    )).all()
+    if not rows:
+        return None
+
+    stored = StoredQuiz(rows[0].creator_id, rows[0].title, rows[0].description)
+    for row in rows:
+        if row.question_id is None:
+            continue
+        question = stored.questions.get(row.question_id)
+        if question is None:
+            question = stored.questions[row.question_id] = StoredQuestion(
+                row.question_text, row.type.value, row.points
+            )
+        if row.answer_id is not None:
+            question.answers[row.answer_id] = (row.answer_text, row.is_correct)
+    return stored
+
+
+async def create_quiz_tree(session: AsyncSession, creator_id: int, data: QuizTree) -> QuizTreeIds:
+    """
+    Inserts a whole quiz with Core bulk INSERT ... RETURNING: one statement
+    for the quiz, one for all questions, one for all answers, plus the tag
+    lookups. Ids in the payload are not allowed here. The caller owns the
+    transaction.
+    """
+    for question in data.questions:
+        if question.id is not None or any(answer.id is not None for answer in question.answers):
+            raise QuizTreeInvalid("ids are assigned by the server when creating a quiz")
+
+    quiz_id = (await session.execute(
+        insert(quizzes_table).returning(quizzes_table.c.id),
+        {"title": data.title, "description": data.description, "creator_id": creator_id},
+    )).scalar_one()
+
+    question_ids = await _insert_questions(session, quiz_id, data.questions)
+    answer_ids = await _insert_answers(session, [
+        (question_id, answer)
+        for question_id, question in zip(question_ids, data.questions)
+        for answer in question.answers
+    ])
+    tag_ids, linked = await _link_tags(session, quiz_id, data.tags, {})
+
+    answers = iter(answer_ids)
+    return QuizTreeIds(
+        quiz_id=quiz_id,
+        questions=[
+            QuestionTreeIds(id=question_id, answer_ids=[next(answers) for _ in question.answers])
+            for question_id, question in zip(question_ids, data.questions)
+        ],
+        tag_ids=tag_ids,
+        changes={
+            "inserted": 1 + len(question_ids) + len(answer_ids) + linked,
+            "updated": 0,
+            "deleted": 0,
+        },
+    )
+
+
+async def sync_quiz_tree(session: AsyncSession, quiz_id: int, stored: StoredQuiz, data: QuizTree) -> QuizTreeIds:
+    """
+    Brings the stored tree in line with `data`. Only rows whose fields differ
+    are UPDATEd (one executemany per table), new rows are bulk-inserted and
+    rows missing from the payload are deleted, answers of dropped questions
+    included. Raises QuizTreeInvalid for ids that are not part of this quiz.
+    The caller owns the transaction.
+    """
+    seen_questions: set[int] = set()
+    seen_answers: set[int] = set()
+    for question in data.questions:
+        if question.id is not None:
+            if question.id not in stored.questions or question.id in seen_questions:
+                raise QuizTreeInvalid(f"question {question.id} is not part of quiz {quiz_id}")
+            seen_questions.add(question.id)
+        known = stored.questions[question.id].answers if question.id is not None else {}
+        for answer in question.answers:
+            if answer.id is not None:
+                if answer.id not in known or answer.id in seen_answers:
+                    raise QuizTreeInvalid(f"answer {answer.id} is not part of question {question.id}")
+                seen_answers.add(answer.id)
+
+    changes = {"inserted": 0, "updated": 0, "deleted": 0}
+
+    if (data.title, data.description) != (stored.title, stored.description):
+        await session.execute(
+            update(quizzes_table).where(quizzes_table.c.id == quiz_id),
+            {"title": data.title, "description": data.description},
+        )
+        changes["updated"] += 1
+
+    changed_questions = [
+        {"b_id": question.id, "text": question.text, "type": question.type.value, "points": question.points}
+        for question in data.questions
+        if question.id is not None
+        and (question.text, question.type.value, question.points) != _question_fields(stored.questions[question.id])
+    ]
+    changed_answers = [
+        {"b_id": answer.id, "text": answer.text, "is_correct": answer.is_correct}
+        for question in data.questions if question.id is not None
+        for answer in question.answers
+        if answer.id is not None
+        and (answer.text, answer.is_correct) != stored.questions[question.id].answers[answer.id]
+    ]
+    await _update_rows(session, questions_table, changed_questions)
+    await _update_rows(session, answers_table, changed_answers)
+    changes["updated"] += len(changed_questions) + len(changed_answers)
+
+    new_questions = [question for question in data.questions if question.id is None]
+    new_question_ids = iter(await _insert_questions(session, quiz_id, new_questions))
+    question_ids = [question.id if question.id is not None else next(new_question_ids) for question in data.questions]
+
+    new_answers = [
+        (question_id, answer)
+        for question_id, question in zip(question_ids, data.questions)
+        for answer in question.answers if answer.id is None
+    ]
+    new_answer_ids = iter(await _insert_answers(session, new_answers))
+    answer_ids = [
+        [answer.id if answer.id is not None else next(new_answer_ids) for answer in question.answers]
+        for question in data.questions
+    ]
+    changes["inserted"] += len(new_questions) + len(new_answers)
+
+    dropped_questions = [question_id for question_id in stored.questions if question_id not in seen_questions]
+    dropped_answers = [
+        answer_id
+        for question in stored.questions.values()
+        for answer_id in question.answers if answer_id not in seen_answers
+    ]
+    if dropped_answers:
+        await session.execute(delete(answers_table).where(answers_table.c.id.in_(dropped_answers)))
+    if dropped_questions:
+        await session.execute(delete(questions_table).where(questions_table.c.id.in_(dropped_questions)))
+    await delete_question_stats(session, dropped_questions, dropped_answers)
+    changes["deleted"] += len(dropped_questions) + len(dropped_answers)
+
+    linked_rows = (await session.execute(
+        select(tags_table.c.name, tags_table.c.id)
+        .join(quiz_tags, quiz_tags.c.tag_id == tags_table.c.id)
+        .where(quiz_tags.c.quiz_id == quiz_id)
+    )).all()
+    tag_ids, linked = await _link_tags(session, quiz_id, data.tags, dict(linked_rows))
+    unlinked = [tag_id for name, tag_id in linked_rows if tag_id not in tag_ids]
+    if unlinked:
+        await session.execute(
+            delete(quiz_tags).where(quiz_tags.c.quiz_id == quiz_id, quiz_tags.c.tag_id.in_(unlinked))
+        )
+    changes["inserted"] += linked
+    changes["deleted"] += len(unlinked)
+
+    return QuizTreeIds(
+        quiz_id=quiz_id,
+        questions=[
+            QuestionTreeIds(id=question_id, answer_ids=ids)
+            for question_id, ids in zip(question_ids, answer_ids)
+        ],
+        tag_ids=tag_ids,
+        changes=changes,
+    )
+
+
+def _question_fields(question: StoredQuestion) -> tuple[str, str, int]:
+    return question.text, question.type, question.points
+
+
+async def _insert_questions(session: AsyncSession, quiz_id: int, questions) -> list[int]:
+    return await insert_returning_ids(session, questions_table, [
+        {"quiz_id": quiz_id, "text": question.text, "type": question.type.value, "points": question.points}
+        for question in questions
+    ])
+
+
+async def _insert_answers(session: AsyncSession, answers) -> list[int]:
+    """`answers` is a list of (question_id, answer item)."""
+    return await insert_returning_ids(session, answers_table, [
+        {"question_id": question_id, "text": answer.text, "is_correct": answer.is_correct}
+        for question_id, answer in answers
+    ])
+
+
+async def _update_rows(session: AsyncSession, table, rows: list[dict]) -> None:
+    if not rows:
+        return
+    values = {key: bindparam(key) for key in rows[0] if key != "b_id"}
+    await session.execute(update(table).where(table.c.id == bindparam("b_id")).values(values), rows)
+
+
+async def _link_tags(session: AsyncSession, quiz_id: int, names: list[str], linked: dict[str, int]) -> tuple[list[int], int]:
+    """
+    Resolves tag names to ids (creating missing tags) and links the ones not
+    already in `linked` (name -> id) to the quiz. Returns the ids in payload
+    order, without duplicates, and the number of links added.
+    """
+    names = list(dict.fromkeys(names))
+    ids = {name: linked[name] for name in names if name in linked}
+    wanted = [name for name in names if name not in ids]
+    if wanted:
+        existing = await session.execute(
+            select(tags_table.c.name, tags_table.c.id).where(tags_table.c.name.in_(wanted))
+        )
+        ids.update(existing.all())
+        missing = [name for name in wanted if name not in ids]
+        if missing:
+            created = await session.execute(
+                insert(tags_table).returning(tags_table.c.name, tags_table.c.id),
+                [{"name": name} for name in missing],
+            )
+            ids.update(created.all())
+        await session.execute(insert(quiz_tags), [{"quiz_id": quiz_id, "tag_id": ids[name]} for name in wanted])
+    return [ids[name] for name in names], len(wanted)
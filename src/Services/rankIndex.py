@@ -0,0 +1,165 @@
+from bisect import bisect_left, insort
+from typing import Any, Iterable
+
+DEFAULT_LOAD = 512
+
+
+class RankIndex:
+    """
+    Sorted multiset with positional access. Keys live in sorted buckets of
+    roughly `load` items; a Fenwick tree over the bucket sizes answers "how
+    many keys are smaller" and "which key sits at position i" in O(log n).
+    Inserts and removals touch one bucket plus the tree; a bucket that grows
+    past 2 * load is split and the tree rebuilt.
+    """
+
+    def __init__(self, keys: Iterable[Any] = (), load: int = DEFAULT_LOAD):
+        self._load = load
+        ordered = sorted(keys)
+        self._buckets: list[list] = [ordered[i:i + load] for i in range(0, len(ordered), load)]
+        self._maxes: list = [bucket[-1] for bucket in self._buckets]
+        self._len = len(ordered)
+        self._build_tree()
+
+    def __len__(self) -> int:
+        return self._len
+
+    def add(self, key: Any) -> None:
+        if not self._buckets:
+            self._buckets.append([key])
+            self._maxes.append(key)
+            self._len = 1
+            self._build_tree()
+            return
+
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            i -= 1
+            self._buckets[i].append(key)
+            self._maxes[i] = key
+        else:
+            insort(self._buckets[i], key)
+        self._len += 1
+
+        bucket = self._buckets[i]
+        if len(bucket) > 2 * self._load:
+            self._buckets[i:i + 1] = [bucket[:self._load], bucket[self._load:]]
+            self._maxes[i:i + 1] = [bucket[self._load - 1], bucket[-1]]
+            self._build_tree()
+        else:
+            self._tree_add(i, 1)
+
+    def remove(self, key: Any) -> None:
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            raise KeyError(key)
+        bucket = self._buckets[i]
+        j = bisect_left(bucket, key)
+        if j == len(bucket) or bucket[j] != key:
+            raise KeyError(key)
+
+        del bucket[j]
+        self._len -= 1
+        if bucket:
+            self._maxes[i] = bucket[-1]
+            self._tree_add(i, -1)
+        else:
+            del self._buckets[i]
+            del self._maxes[i]
+            self._build_tree()
+
+    def index(self, key: Any) -> int:
+        """Number of keys strictly smaller than `key`."""
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            return self._len
+        return self._prefix(i) + bisect_left(self._buckets[i], key)
+
+    def slice(self, start: int, stop: int) -> list:
+        """Keys at positions [start, stop), like list slicing with non-negative bounds."""
+        stop = min(stop, self._len)
+        if start >= stop:
+            return []
+        i, offset = self._locate(start)
+        result = []
+        while len(result) < stop - start:
+            result.extend(self._buckets[i][offset:offset + stop - start - len(result)])
+            i += 1
+            offset = 0
+        return result
+
+    # Fenwick tree over bucket sizes, 1-based: _tree[i] covers buckets (i - lowbit(i), i]
+
+    def _build_tree(self) -> None:
+        tree = [0] + [len(bucket) for bucket in self._buckets]
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _tree_add(self, bucket: int, delta: int) -> None:
+        i = bucket + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, bucket: int) -> int:
+        """Number of keys in the buckets before `bucket`."""
+        total = 0
+        i = bucket
+        while i:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _locate(self, position: int) -> tuple[int, int]:
+        """(bucket, offset inside it) of the key at `position`."""
+        bucket = 0
+        step = 1 << (len(self._tree).bit_length() - 1)
+        while step:
+            nxt = bucket + step
+            if nxt < len(self._tree) and self._tree[nxt] <= position:
+                bucket = nxt
+                position -= self._tree[nxt]
+            step >>= 1
+        return bucket, position
+
+
+class Leaderboard:
+    """
+    Best score per user with rank and top-K lookups in O(log n). Ranks are
+    1-based and unique: equal scores are ordered by user id, lower first.
+    Scores only ever go up, so applying the same update twice is harmless.
+    """
+
+    def __init__(self, scores: dict[int, int] | None = None):
+        self._scores: dict[int, int] = dict(scores or {})
+        self._index = RankIndex((-score, user_id) for user_id, score in self._scores.items())
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def raise_score(self, user_id: int, score: int) -> bool:
+        current = self._scores.get(user_id)
+        if current is not None and current >= score:
+            return False
+        if current is not None:
+            self._index.remove((-current, user_id))
+        self._scores[user_id] = score
+        self._index.add((-score, user_id))
+        return True
+
+    def rank(self, user_id: int) -> tuple[int, int] | None:
+        """(rank, score) of the user, or None if they are not on the board."""
+        score = self._scores.get(user_id)
+        if score is None:
+            return None
+        return self._index.index((-score, user_id)) + 1, score
+
+    def top(self, limit: int, offset: int = 0) -> list[tuple[int, int, int]]:
+        """(rank, user_id, score) for ranks offset + 1 .. offset + limit."""
+        return [
+            (offset + position + 1, user_id, -negated)
+            for position, (negated, user_id) in enumerate(self._index.slice(offset, offset + limit))
+        ]
@@ -0,0 +1,164 @@
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.Services.histogram import Histogram
+
+STATEMENT_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128)
+UNMATCHED_ROUTE = "unmatched"
+
+
+class RequestSample:
+    __slots__ = ("scope", "statements", "db_seconds", "rows")
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.rows = 0
+
+
+_current_sample: ContextVar[RequestSample | None] = ContextVar("request_sample", default=None)
+
+
+def _route_template(scope: dict) -> str:
+    # the router stores the matched APIRoute in the shared scope dict
+    return getattr(scope.get("route"), "path_format", None) or UNMATCHED_ROUTE
+
+
+# Same hook point as queryBudget's counter, but a separate context variable:
+# a strict-mode StatementCounter must not hide statements from the metrics.
+@event.listens_for(Engine, "before_cursor_execute")
+def _statement_started(conn, cursor, statement, parameters, context, executemany):
+    if _current_sample.get() is not None:
+        conn.info["metrics_started"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _statement_finished(conn, cursor, statement, parameters, context, executemany):
+    sample = _current_sample.get()
+    if sample is None:
+        return
+    sample.statements += 1
+    sample.db_seconds += time.perf_counter() - conn.info.pop("metrics_started", time.perf_counter())
+    # The aiosqlite adapter buffers the whole result while executing, so the
+    # rows a SELECT fetched are already counted here; plain DBAPI cursors report 0.
+    rows = getattr(cursor, "_rows", None)
+    if rows is not None:
+        sample.rows += len(rows)
+
+
+class RouteStats:
+    __slots__ = ("responses", "latency", "statements", "db_seconds", "rows")
+
+    def __init__(self):
+        self.responses: dict[str, int] = {}  # status class ("2xx") -> count
+        self.latency = Histogram()
+        self.statements = Histogram(buckets=STATEMENT_BUCKETS)
+        self.db_seconds = 0.0
+        self.rows = 0
+
+
+def _labels(**labels: str) -> str:
+    def escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return ",".join(f'{name}="{escape(value)}"' for name, value in labels.items())
+
+
+class RequestMetrics:
+    """
+    Per-route request counts, latency, SQL statement counts, DB time and rows
+    fetched, keyed by (method, route template) so path parameters do not
+    multiply the series. Statements issued outside a request (the attempt
+    writer's batches) are not attributed to any route.
+    """
+
+    def __init__(self):
+        self.routes: dict[tuple[str, str], RouteStats] = {}
+
+    def record(self, method: str, route: str, status: int, seconds: float, sample: RequestSample) -> None:
+        stats = self.routes.get((method, route))
+        if stats is None:
+            stats = self.routes[(method, route)] = RouteStats()
+        status_class = f"{status // 100}xx"
+        stats.responses[status_class] = stats.responses.get(status_class, 0) + 1
+        stats.latency.observe(seconds)
+        stats.statements.observe(sample.statements)
+        stats.db_seconds += sample.db_seconds
+        stats.rows += sample.rows
+
+    def clear(self) -> None:
+        self.routes.clear()
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        routes = sorted(self.routes.items())
+        lines = [
+            "# HELP http_requests_total Requests handled, by route template and status class.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route), stats in routes:
+            for status_class, count in sorted(stats.responses.items()):
+                lines.append(f"http_requests_total{{{_labels(method=method, route=route, status=status_class)}}} {count}")
+
+        for name, help_text, attribute in (
+            ("http_request_duration_seconds", "Time from receiving a request to the end of its response.", "latency"),
+            ("http_request_sql_statements", "SQL statements issued per request.", "statements"),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for (method, route), stats in routes:
+                histogram: Histogram = getattr(stats, attribute)
+                labels = _labels(method=method, route=route)
+                for bound, total in histogram.cumulative_counts():
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{name}_bucket{{{labels},le="{le}"}} {total}')
+                lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+        for name, help_text, attribute in (
+            ("http_request_db_seconds_total", "Time spent executing SQL statements.", "db_seconds"),
+            ("http_request_db_rows_total", "Rows fetched by SQL statements.", "rows"),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for (method, route), stats in routes:
+                lines.append(f"{name}{{{_labels(method=method, route=route)}}} {getattr(stats, attribute)}")
+        return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics()
+
+
+class MetricsMiddleware:
+    """
+    Times every HTTP request and collects the SQL statements it issues, then
+    records them under the matched route's template. Costs two perf_counter()
+    calls per statement and one histogram update per request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+        sample = RequestSample(scope)
+        token = _current_sample.set(sample)
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _current_sample.reset(token)
+            request_metrics.record(scope["method"], _route_template(scope), status, time.perf_counter() - started, sample)
@@ -0,0 +1,52 @@
+import enum
+import json
+from typing import Any, Iterable
+
+from fastapi import Response
+from pydantic import BaseModel
+from sqlalchemy.orm import InstrumentedAttribute
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder below is used instead
+    orjson = None
+
+
+def render_json(content: Any) -> bytes:
+    """Exactly the bytes FastAPI's JSONResponse would send for `content` (already JSON-compatible)."""
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def _encode_default(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dump_json(content: Any) -> bytes:
+    """
+    Encoder for the fast response path: dicts, lists, scalars and enums go
+    straight to bytes with no jsonable_encoder or response_model pass.
+    Uses orjson when it is installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_encode_default
+    ).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dump_json(content)
+
+
+def model_columns(schema: type[BaseModel], entity: type) -> list[InstrumentedAttribute]:
+    """The entity's columns for every field of `schema`, in the schema's field order."""
+    return [getattr(entity, name) for name in schema.model_fields]
+
+
+def row_dicts(rows: Iterable) -> list[dict]:
+    return [dict(row._mapping) for row in rows]
@@ -0,0 +1,20 @@
+import os
+import shutil
+import tempfile
+
+import pytest
+
+# Read when main.py and the settings are first imported, so this runs before
+# any test module imports them: every test drives the app over a throwaway
+# database, with the declared query budgets enforced.
+_TMP = tempfile.mkdtemp(prefix="quiz-tests-")
+DATABASE = os.path.join(_TMP, "tests.db")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{DATABASE}"
+os.environ["ADMIN_USERNAMES"] = '["alice"]'
+os.environ["QUERY_BUDGET_STRICT"] = "1"
+
+
+@pytest.fixture(scope="session")
+def database():
+    yield DATABASE
+    shutil.rmtree(_TMP, ignore_errors=True)
@@ -0,0 +1,23 @@
+import asyncio
+
+import pytest
+
+from src.CRUD.quizCRUD import get_quiz
+from src.DatabaseManager import planCheck
+from src.DatabaseManager.queryBudget import QueryBudgetExceeded, query_budget_enforced
+
+
+def test_strict_mode_is_on():
+    # set by conftest.py; without it the middleware is not installed at all
+    assert query_budget_enforced()
+
+
+def test_no_route_exceeds_its_budget(database):
+    # drive_routes raises QueryBudgetExceeded from the first route that overruns
+    asyncio.run(planCheck.capture_statements())
+
+
+def test_an_overrun_fails(database, monkeypatch):
+    monkeypatch.setattr(get_quiz, "__query_budget__", 0)
+    with pytest.raises(QueryBudgetExceeded, match="GET /quiz/"):
+        asyncio.run(planCheck.capture_statements())
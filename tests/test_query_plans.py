@@ -0,0 +1,27 @@
+import asyncio
+
+import pytest
+
+from src.DatabaseManager import planCheck
+
+
+@pytest.fixture(scope="module")
+def reports(database):
+    captured = asyncio.run(planCheck.capture_statements())
+    return planCheck.explain(database, captured)
+
+
+def test_every_route_is_explained(reports):
+    routes = {report["route"] for report in reports}
+    assert "GET /quizzes" in routes
+    assert "POST /quiz/{quiz_id}/attempt" in routes
+
+
+def test_no_unexpected_full_scans(reports):
+    failures = [
+        f"{report['route']}: full scan of {', '.join(report['unexpected'])}\n  {report['statement']}\n    "
+        + "\n    ".join(report["plan"])
+        for report in reports
+        if report["unexpected"]
+    ]
+    assert not failures, "\n".join(failures)